@@ -1,14 +1,40 @@
 """Funksjoner for testing av applikasjon"""
 
 import os
-import psutil
+import copy
 import math
+import numpy
 import mast
-import matplotlib.pyplot as plt
+import beregning
+import deltminne
+import hjelpefunksjoner
+import inndata
+import kapasitet
+import fundamast
+import klynge
+import kraft
+import laster
+import lister
+import masteavstand
+import masteplassering
+import palitelighet
+import parameterstudie
+import planlegger
+import resultatdatabase
+import resultatlager
+import strekning
+import system
+import tilstand
+import tjeneste
+import utvelgelse
+import vindtrykk
+from kraft import Kraft
 
 
 
 def memory_info():
+    import psutil
+
     process = psutil.Process(os.getpid())
     return process.memory_info().rss/10**6
 
@@ -20,6 +46,1079 @@ def print_memory_info():
     print()
 
 
+# Kombinasjoner av inndata som dekker alle grener i lastberegningene
+varianter = [
+    {},
+    {"avspenningsmast": True},
+    {"fixpunktmast": True, "radius": 800},
+    {"fixavspenningsmast": True, "strekkutligger": False, "radius": 600},
+    {"siste_for_avspenning": True, "master_bytter_side": True},
+    {"linjemast_utliggere": 2, "jord_ledn": True, "forbigang_ledn": True},
+    {"brukerdefinert_last": True, "f_x": 1000.0, "f_y": 500.0, "f_z": -800.0,
+     "e_x": 6.0, "e_y": 0.3, "e_z": 0.5, "a_vind": 1.0, "a_vind_par": 0.5},
+    {"ec3": False, "matefjern_ledn": True, "fiberoptisk_ledn": True,
+     "retur_ledn": True, "isklasse": "3   (15 N/m)"},
+    {"systemnavn": "System 25", "radius": 1200, "a1": 50.0, "a2": 65.0, "h": 10.0},
+    {"systemnavn": "System 35", "radius": 400, "s235": True,
+     "avspenningsmast": True, "avspenningsbardun": False}]
+
+
+def hent_inndata(endringer):
+    """Henter inndata fra input.ini med gitte endringer."""
+    i = inndata.Inndata("input.ini")
+    for navn in endringer:
+        setattr(i, navn, endringer[navn])
+    return i
+
+
+def kraftlister(i):
+    """Genererer kraftlister i samme rekkefølge som :func:`beregning.beregn`."""
+    master = mast.hent_master(i.h, i.s235, i.materialkoeff, i.avspenningsmast,
+                              i.fixavspenningsmast, i.avspenningsbardun)
+    sys = system.hent_system(i)
+    F_statisk_ledn, F_dynamisk_ledn = laster.laster_ledninger(i, sys, mastehoyde=i.h)
+    lastsituasjoner, lastfaktorer = lister.hent_lastkombinasjoner(i.ec3)
+    for m in master:
+        F_statisk_mast, F_dynamisk_mast = laster.laster_mast(i, sys, m)
+        F_statisk = F_statisk_ledn + F_statisk_mast
+        F_dynamisk = F_dynamisk_ledn + F_dynamisk_mast
+        for lastsituasjon in lastsituasjoner:
+            temp = lastsituasjoner[lastsituasjon]["T"]
+            F_T = [f for f in F_dynamisk if f.T == temp or f.T is None]
+            for vindretning in range(3):
+                F = list(F_statisk)
+                F.extend([f for f in F_T if f.vindretning == vindretning
+                          or f.vindretning is None])
+                yield m, F
+        yield m, [f for f in F_statisk if not f.navn.startswith("Sidekraft: KL")]
+
+
+def _reaksjonskrefter_referanse(F):
+    """Opprinnelig beregning av reaksjonskrefter, kraft for kraft."""
+    R = numpy.zeros((5, 8, 6))
+    for j in F:
+        R_0 = numpy.zeros((5, 8, 6))
+        f = j.f
+        if not numpy.count_nonzero(j.q) == 0:
+            f = numpy.array([j.q[0] * j.b, j.q[1] * j.b, j.q[2] * j.b])
+        R_0[j.type[1], j.type[0], 0] = f[0] * j.e[2] + f[2] * (-j.e[0])
+        R_0[j.type[1], j.type[0], 1] = f[1]
+        R_0[j.type[1], j.type[0], 2] = f[0] * (-j.e[1]) + f[1] * j.e[0]
+        R_0[j.type[1], j.type[0], 3] = f[2]
+        R_0[j.type[1], j.type[0], 4] = f[0]
+        if j.navn.startswith("Sidekraft: KL"):
+            R_0[j.type[1], j.type[0], 5] = f[1] * (-j.e[2]) + f[2] * j.e[1]
+        else:
+            sign = numpy.sign(numpy.sum(numpy.sum(R, axis=0), axis=0)[5])
+            sign = 1 if sign == 0 else sign
+            R_0[j.type[1], j.type[0], 5] = sign*(abs(f[1]*(-j.e[2])) + abs(f[2]*j.e[1]))
+        R += R_0
+    return R
+
+
+def test_reaksjonskrefter():
+    """Kontrollerer at vektorisert beregning gir identiske R-matriser.
+
+    Kontrollen gjøres for kraftlistene slik de genereres i beregningen,
+    samt for reverserte lister der sidekrefter i KL kommer sist.
+    """
+    antall = 0
+    for endringer in varianter:
+        i = hent_inndata(endringer)
+        for m, F in kraftlister(i):
+            for liste in (F, F[::-1]):
+                R = kraft.beregn_reaksjonskrefter(liste)
+                R_ref = _reaksjonskrefter_referanse(liste)
+                assert numpy.array_equal(R, R_ref), (m.navn, endringer)
+                antall += 1
+    print("Reaksjonskrefter: {} kraftlister kontrollert.".format(antall))
+
+
+def _deformasjoner_referanse(i, m, F):
+    """Opprinnelig beregning av forskyvninger, kraft for kraft."""
+    import scipy.integrate as integrate
+
+    fh = (i.fh + i.e) * 1000
+    E = m.E
+    D = numpy.zeros((5, 8, 3))
+    for j in F:
+        D_0 = numpy.zeros((5, 8, 3))
+        if j.e[0] < 0:
+            x = -j.e[0] * 1000
+            delta_topp = max(m.h + j.e[0], 0)
+            L = (m.h - delta_topp) * 1000
+            # Rent moment
+            I_y = L ** 2 / (2 * integrate.quad(m.Iy_int_M, 0, L, args=(delta_topp,))[0])
+            I_z = L ** 2 / (2 * integrate.quad(m.Iz_int_M, 0, L, args=(delta_topp,))[0])
+            M_y = j.f[0] * j.e[2] * 1000
+            M_z = - j.f[0] * j.e[1] * 1000
+            if fh > x:
+                D_0[j.type[1], j.type[0], 1] += (M_y*x**2)/(2*E*I_y) + numpy.tan((M_y*x)/(E*I_y))*(fh-x)
+                D_0[j.type[1], j.type[0], 0] += (M_z*x**2)/(2*E*I_z) + numpy.tan((M_z*x)/(E*I_z))*(fh-x)
+            else:
+                D_0[j.type[1], j.type[0], 1] += (M_y*fh**2)/(2*E*I_y)
+                D_0[j.type[1], j.type[0], 0] += (M_z*fh**2)/(2*E*I_z)
+            # Punktlast
+            I_y = L ** 3 / (3 * integrate.quad(m.Iy_int_P, 0, L, args=(delta_topp,))[0])
+            I_z = L ** 3 / (3 * integrate.quad(m.Iz_int_P, 0, L, args=(delta_topp,))[0])
+            if fh > x:
+                D_0[j.type[1], j.type[0], 1] += (j.f[2]*x**2)/(6*E*I_y)*(3*fh-x)
+                D_0[j.type[1], j.type[0], 0] += (j.f[1]*x**2)/(6*E*I_z)*(3*fh-x)
+            else:
+                D_0[j.type[1], j.type[0], 1] += (j.f[2]*fh**2)/(6*E*I_y)*(3*x-fh)
+                D_0[j.type[1], j.type[0], 0] += (j.f[1]*fh**2)/(6*E*I_z)*(3*x-fh)
+            # Fordelt last
+            if j.b > 0:
+                delta_topp = m.h - j.b
+                L = (m.h - delta_topp) * 1000
+                I_y = L ** 4 / (4 * integrate.quad(m.Iy_int_q, 0, L, args=(delta_topp,))[0])
+                I_z = L ** 4 / (4 * integrate.quad(m.Iz_int_q, 0, L, args=(delta_topp,))[0])
+                b = j.b * 1000
+                D_0[j.type[1], j.type[0], 1] += ((j.q[2]/1000*fh**2)/(24*E*I_y))*(fh**2+6*b**2-4*b*fh)
+                D_0[j.type[1], j.type[0], 0] += ((j.q[1]/1000*fh**2)/(24*E*I_z))*(fh**2+6*b**2-4*b*fh)
+            # Torsjon
+            if m.type == "bjelke":
+                sign = numpy.sign(numpy.sum(numpy.sum(D, axis=0), axis=0)[2])
+                sign = 1 if sign == 0 else sign
+                if j.navn.startswith("Sidekraft: KL"):
+                    T = (j.f[1] * -j.e[2] + j.f[2] * j.e[1]) * 1000
+                else:
+                    T = sign*(abs(j.f[1] * -j.e[2]) + abs(j.f[2] * j.e[1])) * 1000
+                lam = math.sqrt(m.G * m.It / (E * m.Cw))
+                D_0[j.type[1], j.type[0], 2] = (180/math.pi) * T/(E*m.Cw*lam**3) * (
+                    (math.sinh(lam*(x-fh)) - math.sinh(lam*x))/math.cosh(lam*x) + lam*fh)
+        D += D_0
+    return D
+
+
+def test_deformasjoner():
+    """Kontrollerer at vektorisert beregning gir samme D-matriser.
+
+    Referansen integrerer stivheten på nytt for hver kraft, slik at
+    forskyvninger og torsjonsvinkler sammenlignes med toleranse for
+    numerisk integrasjon. Reverserte lister kontrollerer fortegn
+    for torsjonsmoment.
+    """
+    antall = 0
+    for endringer in varianter:
+        i = hent_inndata(endringer)
+        for m, F in kraftlister(i):
+            for liste in (F, F[::-1]):
+                D = beregning._beregn_deformasjoner(i, m, liste)
+                D_ref = _deformasjoner_referanse(i, m, liste)
+                assert numpy.allclose(D, D_ref, rtol=1e-9, atol=1e-12), (m.navn, endringer)
+                antall += 1
+    assert antall > 0
+
+
+def test_mastekatalog():
+    """Kontrollerer buffer for master og kompilert mastekatalog.
+
+    Kontrollerer gjenbruk av bufrede master, bytte mellom kataloger,
+    at kompilert katalog gir samme rader som .csv-filen og at den
+    forkastes når kildefilen endres.
+    """
+    import tempfile
+
+    argumenter = (8.0, False, 1.05, False, False, True)
+    mast.tom_buffer()
+    mast.hent_master(*argumenter)
+    antall = len(mast._mastebuffer)
+    master = mast.hent_master(*argumenter)
+    assert len(mast._mastebuffer) == antall
+    assert master[0].egenvekt == 360
+    assert len(mast.hent_master(9.0, *argumenter[1:])) == len(master)
+    assert len(mast._mastebuffer) == 2 * antall
+
+    with tempfile.TemporaryDirectory() as mappe:
+        sti = os.path.join(mappe, "masts.csv")
+        with open("data/masts.csv") as kilde, open(sti, "w") as fil:
+            fil.write(kilde.read().replace('"B2","B",360,', '"B2","B",999,'))
+        assert mast.hent_master(*argumenter, sti=sti)[0].egenvekt == 999
+        assert mast.hent_master(*argumenter)[0].egenvekt == 360
+
+        # Kompilert katalog gir samme rader, og forkastes når kilden endres
+        mast.kompiler_katalog(sti)
+        mtime = os.path.getmtime(sti)
+        assert mast._les_kompilert_katalog(sti, mtime) == mast._les_katalog(sti)
+        mast.tom_buffer()
+        assert mast.hent_katalog(sti) == mast._les_katalog(sti)
+        with open(sti) as fil:
+            innhold = fil.read()
+        with open(sti, "w") as fil:
+            fil.write(innhold.replace('"B2","B",999,', '"B2","B",998,'))
+        os.utime(sti, (mtime + 10, mtime + 10))
+        assert mast._les_kompilert_katalog(sti, mtime + 10) is None
+        assert mast.hent_master(*argumenter, sti=sti)[0].egenvekt == 998
+
+    mast.MASTEBUFFER_STORRELSE, storrelse = antall, mast.MASTEBUFFER_STORRELSE
+    try:
+        mast.hent_master(*argumenter)
+        mast.hent_master(9.0, *argumenter[1:])
+        assert len(mast._mastebuffer) == antall
+    finally:
+        mast.MASTEBUFFER_STORRELSE = storrelse
+        mast.tom_buffer()
+
+
+def test_vindareal_snitt():
+    """Kontrollerer vektorisert vindareal mot :func:`Mast.vindareal` per høydesnitt.
+
+    Kontrollen gjøres for samtlige master ved flere mastehøyder og
+    lengder ``x``, inkludert konstant bredde for bjelkemaster.
+    """
+    for h in (8.0, 10.0, 13.0):
+        for m in mast.hent_master(h, False, 1.05, False, False, True):
+            for x in (0.0, 0.5, 2.3, h / 2, h):
+                A_ref, b_mid = m._vindareal_snitt(x)
+                H = numpy.arange(0, int(10*x) + 5, 5) / 10
+                assert len(H) == len(A_ref) == len(b_mid)
+                for k, x_k in enumerate(H):
+                    assert math.isclose(b_mid[k], m._b_mid(x_k), rel_tol=1e-12), (m.navn, h, x)
+                    if m.type == "bjelke":
+                        assert b_mid[k] == m.b
+                    else:
+                        assert math.isclose(A_ref[k], m.vindareal(x_k), rel_tol=1e-12), (m.navn, h, x)
+
+
+def test_kraft():
+    """Kontrollerer flagg, sortering og slots for :class:`Kraft`."""
+    statisk = Kraft(navn="Egenvekt: Mast", type=(1, 0), f=(-3000, 0, 0), e=(-4.0, 0, 0))
+    fordelt = Kraft(navn="Vindlast: Mast", type=(1, 0), q=(0, 0, 500), b=8.0,
+                    e=(-4.0, 0, 0), vindretning=0)
+    sidekraft = Kraft(navn="Sidekraft: KL", type=(0, 0), f=(0, 0, 400),
+                      e=(-5.7, 0, 3.0), T=-40)
+    assert statisk.statisk and not statisk.fordelt and not statisk.kl_sidekraft
+    assert not fordelt.statisk and fordelt.fordelt
+    assert not sidekraft.statisk and sidekraft.kl_sidekraft
+    assert sidekraft < statisk and statisk == Kraft(f=(0, 3000, 0))
+    assert sorted([statisk, fordelt, sidekraft]) == [fordelt, sidekraft, statisk]
+    assert sidekraft.storrelse == 400
+
+    # f, q og e er separate vektorer
+    assert sidekraft.e[0] == -5.7 and sidekraft.q[2] == 0
+    kopi = copy.copy(sidekraft)
+    assert kopi.kl_sidekraft and numpy.array_equal(kopi.e, sidekraft.e)
+
+    assert not hasattr(statisk, "__dict__")
+    try:
+        statisk.ukjent = 1
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("Kraft skal ikke akseptere ukjente attributter")
+
+
+def test_anbefaling():
+    """Kontrollerer at anbefalt mast er letteste godkjente mast i katalogen.
+
+    Anbefalingen fra :func:`beregning.anbefal` skal være lik
+    :func:`beregning.velg_anbefalt` for ferdig beregnede master.
+
+    Resultatet sammenliknes med fullstendig beregning av samtlige
+    master, og utvelgelsens nedre grense kontrolleres mot beregnet
+    utnyttelsesgrad.
+    """
+    for endringer in varianter:
+        i = hent_inndata(endringer)
+        master = beregning.beregn(i)
+        sys = system.hent_system(i)
+        F_statisk_ledn, F_dynamisk_ledn = laster.laster_ledninger(i, sys, mastehoyde=i.h)
+        UR_min = utvelgelse.nedre_grense_utnyttelse(i, sys, master, F_statisk_ledn, F_dynamisk_ledn)
+        forventet = {False: None, True: None}
+        for m, UR in sorted(zip(master, UR_min), key=lambda x: x[0].egenvekt):
+            m.sorter_grenseverdier()
+            UR_max = m.tilstand_UR_max.utnyttelsesgrad
+            assert UR <= UR_max * (1 + utvelgelse.TOLERANSE), (m.navn, UR, UR_max, endringer)
+            bjelke = m.type == "bjelke"
+            if forventet[bjelke] is None and m.h_max >= i.h and UR_max <= 1.0:
+                forventet[bjelke] = m
+        for bjelke in (False, True):
+            # Samme regel benyttes for visning av resultater i GUI
+            valgt = beregning.velg_anbefalt([m for m in master if (m.type == "bjelke") == bjelke], i.h)
+            assert valgt is forventet[bjelke], endringer
+        gittermast, bjelkemast, forkastet = beregning.anbefal(i)
+        for m, m_ref in zip((gittermast, bjelkemast), (forventet[False], forventet[True])):
+            if m_ref is None:
+                assert m is None, endringer
+            else:
+                assert m.navn == m_ref.navn, (m.navn, m_ref.navn, endringer)
+                assert m.tilstand_UR_max.utnyttelsesgrad == m_ref.tilstand_UR_max.utnyttelsesgrad
+        print("Anbefaling {}: {} av {} master forkastet.".format(endringer, forkastet, len(master)))
+
+
+def test_masteavstand():
+    """Kontrollerer største masteavstand mot fullstendig beregning.
+
+    Ved funnet masteavstand skal utnyttelsesgraden være :math:`\\leq 1.0`,
+    og :math:`0.1m` lenger masteavstand skal gi utnyttelsesgrad over 1.0
+    dersom øvre grense for masteavstand ikke er nådd.
+    """
+    for endringer in ({}, {"systemnavn": "System 35", "radius": 400},
+                      {"ec3": False, "isklasse": "3   (15 N/m)"}):
+        i = hent_inndata(endringer)
+        masteavstander = masteavstand.maks_masteavstand(i)
+        a_max = math.floor(10 * hjelpefunksjoner.beregn_masteavstand_max(
+            i.systemnavn.split()[1], i.radius, i.fh, lister.stromavtaker_list[2])) / 10
+        for navn, a in masteavstander.items():
+            if a is None:
+                continue
+            kontroller = [(a, True)]
+            if a < a_max:
+                kontroller.append((round(a + 0.1, 1), False))
+            for a_k, godkjent in kontroller:
+                m = [m for m in beregning.beregn(i.kopi(a1=a_k, a2=a_k)) if m.navn == navn][0]
+                m.sorter_grenseverdier()
+                assert (m.tilstand_UR_max.utnyttelsesgrad <= 1.0) == godkjent, (navn, a_k, endringer)
+        print("Masteavstand {}: {}".format(endringer, masteavstander))
+
+
+def test_masteplassering():
+    """Kontrollerer optimal masteplassering for en kort strekning.
+
+    Hver masteavstand skal være innenfor øvre grense, ingen master skal
+    stå i hindringer, og valgt mast skal være godkjent ved fullstendig
+    beregning med masteavstandene på begge sider.
+    """
+    i = hent_inndata({})
+    kurvatur, hindringer = [(10.0, 1000), (10.15, 600)], [(10.05, 10.07)]
+    for malfunksjon in ("antall", "vekt"):
+        plasseringer, total = masteplassering.optimer(
+            i, 10.0, 10.3, kurvatur, hindringer, steg=5.0, malfunksjon=malfunksjon)
+        assert plasseringer is not None
+        for p in plasseringer:
+            assert not any(km_fra <= p["km"] <= km_til for km_fra, km_til in hindringer), p
+            a_max = hjelpefunksjoner.beregn_masteavstand_max(
+                i.systemnavn.split()[1], p["radius"], i.fh, lister.stromavtaker_list[2])
+            assert max(p["a1"], p["a2"]) <= a_max, p
+            i_p = i.kopi(radius=p["radius"], a1=p["a1"], a2=p["a2"], h=p["h"])
+            m = [m for m in beregning.beregn(i_p) if m.navn == p["mast"]][0]
+            m.sorter_grenseverdier()
+            assert m.tilstand_UR_max.utnyttelsesgrad <= 1.0, p
+        print("Masteplassering ({}): {} master, kostnad {}.".format(
+            malfunksjon, len(plasseringer), total))
+    for hindring in ((9.99, 10.01), (10.28, 10.3)):
+        try:
+            masteplassering.optimer(i, 10.0, 10.3, kurvatur, [hindring], steg=5.0)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Endepunkt i hindring ga ingen feil: {}".format(hindring))
+
+
+def test_strekning():
+    """Kontrollerer beregning av strekning mot beregning per mastepunkt.
+
+    Etter endring av en masteavstand skal kun mastepunktene ved
+    spennets ender beregnes på nytt.
+    """
+    i = hent_inndata({"forbigang_ledn": True, "jord_ledn": True})
+    s = strekning.Strekning(i, [60.0, 60.0, 45.0, 60.0],
+                            [{}, {"radius": 600}, {}, {"h": 9.0}, {}])
+
+    def kontroller():
+        for n, (gittermast, bjelkemast) in enumerate(s.beregn()):
+            g_ref, b_ref, forkastet = beregning.anbefal(s.inndata(n))
+            for m, m_ref in ((gittermast, g_ref), (bjelkemast, b_ref)):
+                assert (m is None) == (m_ref is None), n
+                if m is not None:
+                    assert m.navn == m_ref.navn, (n, m.navn, m_ref.navn)
+                    assert (m.tilstand_UR_max.utnyttelsesgrad
+                            == m_ref.tilstand_UR_max.utnyttelsesgrad), n
+
+    kontroller()
+    # Én oppføring per ledning og spenn (referansespenn, spennlengde),
+    # felles for mastepunktene 2 og 3, med samtlige klimatilstander
+    assert {spenn[-2:] for spenn in s.spenntabell} == {
+        (60.0, 60.0), (52.5, 52.5), (52.5, 60.0), (52.5, 45.0)}
+    assert len(s.spenntabell) == 4 * len({spenn[:-2] for spenn in s.spenntabell})
+    assert all(len(klima) == 4 for klima in s.spenntabell.values())
+    beregnet = list(s.resultater)
+    assert s.endre_masteavstand(2, 55.0) == [2, 3]
+    kontroller()
+    for n in (0, 1, 4):
+        assert s.resultater[n] is beregnet[n], n
+    for rad in s.oppsummering():
+        print(rad)
+
+
+def test_parameterstudie():
+    """Kontrollerer parameterstudier mot fullstendig beregning per punkt."""
+    i = hent_inndata({"forbigang_ledn": True})
+    studier = [
+        (("sms",), [2.5, 3.0, 3.5]),
+        (("materialkoeff",), [1.0, 1.1]),
+        (("radius", "isklasse"), [[600, 2000], ["1   (2.5 N/m)", "3   (15 N/m)"]]),
+        ((("a1", "a2"), "h"), [[45.0, 60.0], [8.0, 9.5]])]
+    for felt, verdier in studier:
+        if len(felt) == 1:
+            navn, UR, Dz, phi = parameterstudie.sveip(i, felt[0], verdier)
+            punkter = [((n,), parameterstudie._endring(felt[0], v)) for n, v in enumerate(verdier)]
+        else:
+            navn, UR, Dz, phi = parameterstudie.rutenett(i, felt[0], verdier[0], felt[1], verdier[1])
+            punkter = []
+            for n_a, v_a in enumerate(verdier[0]):
+                for n_b, v_b in enumerate(verdier[1]):
+                    endring = parameterstudie._endring(felt[0], v_a)
+                    endring.update(parameterstudie._endring(felt[1], v_b))
+                    punkter.append(((n_a, n_b), endring))
+        for indeks, endring in punkter:
+            for k, m in enumerate(beregning.beregn(i.kopi(**endring))):
+                m.sorter_grenseverdier()
+                assert navn[k] == m.navn
+                assert UR[indeks + (k,)] == m.tilstand_UR_max.utnyttelsesgrad, (endring, m.navn)
+                assert Dz[indeks + (k,)] == m.tilstand_Dz_kl_max.K_D[1], (endring, m.navn)
+                assert phi[indeks + (k,)] == m.tilstand_phi_kl_max.K_D[2], (endring, m.navn)
+        print("Parameterstudie {}: {} punkter kontrollert.".format(felt, len(punkter)))
+    for studie in (lambda: parameterstudie.sveip(i, "sms", []),
+                   lambda: parameterstudie.rutenett(i, "sms", [3.0], "h", [])):
+        try:
+            studie()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Tom liste med verdier ga ingen feil.")
+
+
+def test_fundamast():
+    """Kontrollerer skriving, lesing og sammenlikning av FUNDAMAST.DAT."""
+    import tempfile
+
+    # Eksempelfilen leses og skrives uendret
+    with open("FUNDAMAST.DAT", "rb") as fil:
+        eksempel = fil.read()
+    post, = fundamast.les("FUNDAMAST.DAT")
+    assert post.navn == "B6" and post.banestrekning == "0010 Oslo S"
+    assert post.krefter[2] == 106.1
+    assert fundamast.formater(post).encode(fundamast.KODING) == eksempel
+
+    i = hent_inndata({})
+    master = beregning.beregn(i)
+    poster = []
+    for n, m in enumerate(master[0:6]):
+        m.sorter_grenseverdier()
+        poster.append(fundamast.fra_mast(i.kopi(mastenr=str(n)), m))
+    assert poster[0].krefter[2] == abs(master[0].tilstand_My_max.K[0]) / 1000
+    utstedt = [fundamast.tolk(fundamast.formater(p)) for p in poster]
+
+    with tempfile.TemporaryDirectory() as mappe:
+        # Samlet fil med indeks
+        sti = os.path.join(mappe, "FUNDAMAST.DAT")
+        indeks = fundamast.skriv_strom(poster, sti)
+        assert indeks[1][2] == len(fundamast.formater(poster[0]).encode(fundamast.KODING))
+        assert fundamast.les(sti) == utstedt
+        indeks = fundamast.les_indeks(sti)
+        assert fundamast.les_post(sti, i.banestrekning, "3", indeks) == utstedt[3]
+        # Én fil per mastepunkt
+        stier = fundamast.skriv_filer(poster, mappe)
+        assert [fundamast.les(s)[0] for s in stier] == utstedt
+        try:
+            fundamast.skriv_filer(poster, mappe, filnavn="{banestrekning}.DAT")
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Flertydig filnavn ga ingen feil.")
+        gamle = fundamast.les(sti)
+
+    # Sammenlikning med nye resultater uten ny beregning
+    assert fundamast.sammenlign(gamle, poster) == {"nye": [], "fjernet": [], "endret": {}}
+    nye = poster[1:] + [fundamast.fra_mast(i.kopi(mastenr="9"), master[0])]
+    nye[0] = fundamast.Fundamast(nye[0].navn, nye[0].dato, nye[0].banestrekning, nye[0].mastenr,
+                                 nye[0].fundamentnr, nye[0].prosjektnr, nye[0].geometri,
+                                 (nye[0].krefter[0] + 1.0,) + nye[0].krefter[1:])
+    forskjell = fundamast.sammenlign(gamle, nye)
+    assert forskjell["nye"] == [(i.banestrekning, "9")]
+    assert forskjell["fjernet"] == [(i.banestrekning, "0")]
+    assert list(forskjell["endret"]) == [(i.banestrekning, "1")]
+    assert [felt[0] for felt in forskjell["endret"][(i.banestrekning, "1")]] == ["N_brudd"]
+
+    # Anbefalte master på en strekning
+    s = strekning.Strekning(i, [60.0], [{"mastenr": "1"}, {"mastenr": "2"}])
+    poster = fundamast.fra_strekning(s, bjelkemast=True)
+    assert [(p.mastenr, p.navn) for p in poster] == [
+        (str(n + 1), bjelkemast.navn) for n, (gittermast, bjelkemast) in enumerate(s.resultater)]
+
+
+def test_resultatdatabase():
+    """Kontrollerer skriving og spørringer i resultatdatabasen mot beregnede master."""
+    import tempfile
+
+    mastepunkter = []
+    for km, endringer in ((61.0, varianter[0]), (70.0, varianter[5]), (85.0, varianter[5])):
+        i = hent_inndata(endringer).kopi(km=km, banestrekning="0560")
+        master = beregning.beregn(i)
+        for m in master:
+            m.sorter_grenseverdier()
+        mastepunkter.append((i, master))
+    alle = [(i, m) for i, master in mastepunkter for m in master]
+
+    with tempfile.TemporaryDirectory() as mappe:
+        with resultatdatabase.Resultatdatabase(os.path.join(mappe, "resultater.db")) as db:
+            assert db.skriv(mastepunkter) == [1, 2, 3]
+            assert db._db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert db.inndata(2)["linjemast_utliggere"] == 2
+
+            # Mastepunkter der B4 ikke tilfredsstiller kravene
+            treff = db.sok(banestrekning="0560", mast="B4", UR_over=1.0)
+            assert [t["km"] for t in treff] == [
+                i.km for i, m in alle if m.navn == "B4" and m.tilstand_UR_max.utnyttelsesgrad > 1.0]
+            # Største torsjonsvinkler mellom km 61 og 80
+            treff = db.sok(km=(61.0, 80.0), sorter="phi_kl", antall=5)
+            phi = sorted((abs(m.tilstand_phi_kl_max.K_D[2]) for i, m in alle if i.km <= 80.0),
+                         reverse=True)[:5]
+            assert [t["phi_kl"] for t in treff] == phi
+            # Master dimensjonert av gitt lastsituasjon, inkludert ulykkeslast
+            styrende = {(i.km, m.navn): max(m.bruddgrense + m.ulykke,
+                                            key=lambda t: t.utnyttelsesgrad).lastsituasjon
+                        for i, m in alle}
+            for lastsituasjon in set(styrende.values()) | {"Ulykkeslast"}:
+                assert {(t["km"], t["navn"]) for t in db.sok(lastsituasjon=lastsituasjon)} == \
+                    {punkt for punkt, s in styrende.items() if s == lastsituasjon}
+            for t in db.sok(km=(70.0, 70.0)):
+                m = next(m for i, m in alle if i.km == 70.0 and m.navn == t["navn"])
+                assert t["UR_ulykke"] == max(u.utnyttelsesgrad for u in m.ulykke)
+            assert all(t["UR_ulykke"] is None for t in db.sok(km=(61.0, 61.0)))
+            # Anbefalte master og krefter til FUNDAMAST
+            for i, master in mastepunkter:
+                navn = {t["navn"] for t in db.sok(km=(i.km, i.km), anbefalt=True)}
+                for bjelke in (False, True):
+                    m = beregning.velg_anbefalt(
+                        [m for m in master if (m.type == "bjelke") == bjelke], i.h)
+                    assert m is None or m.navn in navn
+                t = db.sok(km=(i.km, i.km), mast=master[0].navn)[0]
+                assert t["M_brudd"] == abs(master[0].tilstand_My_max.K[0]) / 1000
+                assert t["UR"] == master[0].tilstand_UR_max.utnyttelsesgrad
+            try:
+                db.sok(sorter="UR; DROP TABLE mast")
+            except ValueError:
+                pass
+            else:
+                raise AssertionError("Ugyldig sortering ga ingen feil.")
+
+            # Strekning skrives med anbefalte master
+            s = strekning.Strekning(hent_inndata({}), [60.0])
+            id = db.skriv_strekning(s)
+            for n, (gittermast, bjelkemast) in zip(id, s.resultater):
+                assert {t["navn"] for t in db.sok(km=(s.i.km, s.i.km), anbefalt=True)
+                        if t["id"] == n} == {gittermast.navn, bjelkemast.navn}
+
+
+def test_vindtrykk():
+    """Kontrollerer utnyttelsesgrad og kritisk vindkasthastighetstrykk mot fullstendig beregning."""
+    for endringer in (varianter[0], varianter[5], varianter[6], varianter[7]):
+        i = hent_inndata(endringer)
+        analyser = vindtrykk.hent_analyser(i)
+        for q_p in (0.0, 400.0, 1500.0):
+            for analyse, m in zip(analyser, beregning.beregn(i.kopi(vindkasthastighetstrykk=q_p))):
+                m.sorter_grenseverdier()
+                UR = m.tilstand_UR_max.utnyttelsesgrad
+                assert abs(analyse.utnyttelsesgrad(q_p) - UR) <= 1e-12 * UR, (m.navn, q_p, endringer)
+        kritiske = [(analyse, analyse.kritisk_vindtrykk()) for analyse in analyser]
+        for analyse, q_krit in [(a, q) for a, q in kritiske if q][0:2]:
+            for q_p, godkjent in ((q_krit - 0.1, True), (q_krit + 0.1, False)):
+                m = [m for m in beregning.beregn(i.kopi(vindkasthastighetstrykk=q_p))
+                     if m.navn == analyse.mast.navn][0]
+                m.sorter_grenseverdier()
+                assert (m.tilstand_UR_max.utnyttelsesgrad <= 1.0) == godkjent, (m.navn, q_p)
+        print("Vindtrykk {}: {}".format(endringer, vindtrykk.kritiske_vindtrykk(i)))
+
+
+def test_masteavstand_tabell():
+    """Kontrollerer tabell for maksimal masteavstand mot skalar beregning."""
+    for fh in (5.3, 5.6, 6.0):
+        for hoyfjellsgrense in (False, True):
+            tabell = hjelpefunksjoner.masteavstand_max_tabell(fh, hoyfjellsgrense)
+            for n_s, systemnavn in enumerate(lister.system_list):
+                for n_r, radius in enumerate(lister.radius_list):
+                    for n_p, stromavtaker in enumerate(lister.stromavtaker_list):
+                        a = hjelpefunksjoner.beregn_masteavstand_max(
+                            systemnavn.split()[1], int(radius), fh, stromavtaker, hoyfjellsgrense)
+                        assert a == tabell[n_s, n_r, n_p], (systemnavn, radius, stromavtaker)
+    assert hjelpefunksjoner.beregn_masteavstand_max("25", 1800.0, 5.6, "1800") == \
+        hjelpefunksjoner.beregn_masteavstand_max("25", 1800, 5.6, "1800")
+    for radius, stromavtaker in ((150, "1800"), ("stor", "1800"), (600, "2000")):
+        try:
+            hjelpefunksjoner.beregn_masteavstand_max("25", radius, 5.6, stromavtaker)
+        except ValueError as feil:
+            assert "Ugyldig" in str(feil)
+        else:
+            raise AssertionError("Ugyldig oppslag ga ingen feil: {}".format((radius, stromavtaker)))
+    print("Masteavstandstabell: {} verdier kontrollert.".format(6 * tabell.size))
+
+
+def test_radiustabeller():
+    """Kontrollerer oppslag og interpolering i tabeller over kurveradius."""
+    radier = numpy.array([float(r) for r in lister.radius_list])
+    tabeller = {"20A": (lister.D_20A, lister.sikksakk_20),
+                "20B": (lister.D_20B_35, lister.sikksakk_20),
+                "25": (lister.D_25, lister.sikksakk_25),
+                "35": (lister.D_20B_35, lister.sikksakk_35)}
+    for systemnavn, (D, sikksakk) in tabeller.items():
+        for r in lister.radius_list:
+            assert hjelpefunksjoner.overhoyde(systemnavn, int(r)) == D[r]
+            assert list(hjelpefunksjoner.beregn_sikksakk(systemnavn, int(r))) == sikksakk[r]
+        assert numpy.array_equal(hjelpefunksjoner.overhoyde(systemnavn, radier),
+                                 [D[r] for r in lister.radius_list])
+        # Mellom tabulerte radier
+        for r_0, r_1 in zip(radier[:-1], radier[1:]):
+            r = numpy.array([0.25, 0.5, 0.75]) * (r_1 - r_0) + r_0
+            w = (1 / r_0 - 1 / r) / (1 / r_0 - 1 / r_1)
+            D_0, D_1 = D[str(int(r_0))], D[str(int(r_1))]
+            assert numpy.allclose(hjelpefunksjoner.overhoyde(systemnavn, r),
+                                  (1 - w) * D_0 + w * D_1, rtol=1e-12, atol=1e-15)
+            B1, B2 = hjelpefunksjoner.beregn_sikksakk(systemnavn, r)
+            assert (B1 == sikksakk[str(int(r_0))][0]).all()
+            assert (B2 == sikksakk[str(int(r_0))][1]).all()
+        assert hjelpefunksjoner.overhoyde(systemnavn, 1e9) == 0.0
+    # Kringkasting over systemer og radier
+    systemer = numpy.array(["20A", "25", "35"])[:, None]
+    r = numpy.array([180.0, 650.0, 4500.0, 20000.0])[None, :]
+    B1, B2 = hjelpefunksjoner.beregn_sikksakk(systemer, r)
+    D = hjelpefunksjoner.overhoyde(systemer, r)
+    assert B1.shape == B2.shape == D.shape == (3, 4)
+    for n in range(3):
+        for k in range(4):
+            assert D[n, k] == hjelpefunksjoner.overhoyde(systemer[n, 0], r[0, k])
+            assert (B1[n, k], B2[n, k]) == hjelpefunksjoner.beregn_sikksakk(systemer[n, 0], r[0, k])
+    assert numpy.array_equal(hjelpefunksjoner.vindutblasning("20A", r[0], 5.6, "1800"),
+                             [hjelpefunksjoner.vindutblasning("20A", x, 5.6, "1800") for x in r[0]])
+    for radius in (179.0, numpy.nan, "stor", [600.0, 100.0]):
+        try:
+            hjelpefunksjoner.overhoyde("25", radius)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Ugyldig radius ga ingen feil: {}".format(radius))
+    # Beregning med kurveradius mellom tabulerte verdier
+    i = hent_inndata({"radius": 650.5})
+    arm = [system.hent_system(hent_inndata({"radius": r})).arm
+           for r in (600, 650.5, 700)]
+    assert min(arm[0], arm[2]) <= arm[1] <= max(arm[0], arm[2])
+    assert beregning.beregn(i)
+    print("Radiustabeller: {} radier per tabell.".format(len(radier)))
+
+
+def test_vindkasthastighetstrykk():
+    """Kontrollerer vindkasthastighetstrykk og nivåfaktor for mange steder og høyder."""
+    # Terrengkategori II, z = 10 m, c_alt = 1.1
+    v_b = 1.1 * 26
+    I_v = 1 / math.log(10 / 0.05)
+    q_p = 0.5 * 1.25 * (0.19 * math.log(10 / 0.05) * v_b) ** 2 * (1 + 7 * I_v)
+    verdier = hjelpefunksjoner.vindkasthastighetstrykk(26, 1.0, 1.0, 1.1, 1.0, 1.0, 2, 10)
+    assert all(isinstance(v, float) for v in verdier)
+    assert math.isclose(verdier[0], q_p, rel_tol=1e-14) and verdier[5] == I_v
+
+    v_b_0 = numpy.array([22.0, 26.0, 30.0, 31.0])[:, None]
+    regioner = numpy.array(lister.regioner_list + lister.regioner_list[:1])[:, None]
+    H = numpy.array([300.0, 800.0, 1200.0, 100.0])[:, None]
+    kategorier = numpy.array([0, 2, 3, 4])[:, None]
+    z = numpy.array([1.0, 4.0, 10.0, 16.0, 60.0, 250.0])
+    c = hjelpefunksjoner.c_alt(v_b_0, regioner, H)
+    tabell = hjelpefunksjoner.vindkasthastighetstrykk(v_b_0, 1.0, 0.9, c, 1.0, 1.1, kategorier, z)
+    assert c.shape == (4, 1) and all(v.shape == (4, 6) for v in tabell)
+    for n in range(4):
+        c_n = hjelpefunksjoner.c_alt(v_b_0[n, 0], regioner[n, 0], H[n, 0])
+        assert c_n == c[n, 0]
+        for k in range(6):
+            skalar = hjelpefunksjoner.vindkasthastighetstrykk(
+                v_b_0[n, 0], 1.0, 0.9, c_n, 1.0, 1.1, kategorier[n, 0], z[k])
+            assert skalar == tuple(v[n, k] for v in tabell)
+    assert c[2, 0] == c[3, 0] == 1.0 and c[0, 0] < 1.0
+
+    # Vindkasthastighetstrykk per mastepunkt på en strekning
+    s = strekning.Strekning(hent_inndata({}), [60.0, 60.0])
+    endret = s.sett_vindkasthastighetstrykk([22.0, 26.0, 26.0], lister.regioner_list[0],
+                                            [300.0, 900.0, 1200.0], terrengkategori=[2, 2, 3])
+    assert endret == [0, 1, 2]
+    for n, (v, H_n, kategori) in enumerate(((22.0, 300.0, 2), (26.0, 900.0, 2),
+                                            (26.0, 1200.0, 3))):
+        c_n = hjelpefunksjoner.c_alt(v, lister.regioner_list[0], H_n)
+        assert s.inndata(n).vindkasthastighetstrykk == hjelpefunksjoner.vindkasthastighetstrykk(
+            v, 1.0, 1.0, c_n, 1.0, 1.0, kategori, 10.0)[0]
+    assert s.sett_vindkasthastighetstrykk([22.0, 26.0, 26.0], lister.regioner_list[0],
+                                          [300.0, 900.0, 1200.0], terrengkategori=[2, 2, 3]) == []
+    print("Vindkasthastighetstrykk: {}".format(tabell[0][:, 2]))
+
+
+def test_palitelighet():
+    """Kontrollerer klimamodell mot direkte beregning og reproduserbarhet ved parallell beregning."""
+    i = hent_inndata(varianter[5])
+    modell = palitelighet.Klimamodell(i, [10.0, 20.0], [-45.0, -35.0])
+    q_p = numpy.array([400.0, 800.0, 800.0])
+    G_sno_lett = numpy.array([10.0, 15.0, 20.0])
+    T_min = numpy.array([-45.0, -40.0, -35.0])
+    UR = modell.utnyttelsesgrad(q_p, G_sno_lett, T_min)
+    for n in range(len(q_p)):
+        analyser = vindtrykk.hent_analyser(i.kopi(
+            islast=G_sno_lett[n], T_min=T_min[n]))
+        for k, analyse in enumerate(analyser):
+            UR_direkte = analyse.utnyttelsesgrad(q_p[n])
+            # Eksakt i rutenettets hjørner, interpolert i midten
+            toleranse = 1e-3 if n == 1 else 1e-12
+            assert abs(UR[k, n] - UR_direkte) <= toleranse * UR_direkte, (analyse.mast.navn, n)
+    fordelinger = {"vindkasthastighetstrykk": palitelighet.Fordeling("gumbel", 500.0, 100.0),
+                   "G_sno_lett": palitelighet.Fordeling("uniform", 5.0, 25.0),
+                   "T_min": palitelighet.Fordeling("normal", -40.0, 3.0)}
+    serie = palitelighet.bruddsannsynlighet(i, fordelinger, n=2000, seed=1,
+                                            blokkstorrelse=500, n_nivaer=3)
+    parallell = palitelighet.bruddsannsynlighet(i, fordelinger, n=2000, seed=1, blokkstorrelse=500,
+                                                prosesser=2, n_nivaer=3)
+    assert serie == parallell
+    print("Bruddsannsynlighet: {}".format(serie))
+
+    # Interpolasjonsavvik med standard rutenett, samtlige fastavspente ledninger
+    i = hent_inndata(varianter[7]).kopi(a1=40.0, a2=70.0, at_ledn=True,
+                                         forbigang_ledn=True, jord_ledn=True)
+    modell = palitelighet.Klimamodell(i, numpy.linspace(5.0, 25.0, 9),
+                                      numpy.linspace(-52.0, -28.0, 9))
+    rng = numpy.random.RandomState(3)
+    q_p, G_sno_lett, T_min = rng.uniform(200.0, 1200.0, 6), rng.uniform(5.0, 25.0, 6), \
+        rng.uniform(-52.0, -28.0, 6)
+    UR = modell.utnyttelsesgrad(q_p, G_sno_lett, T_min)
+    for n in range(len(q_p)):
+        analyser = vindtrykk.hent_analyser(i.kopi(islast=G_sno_lett[n], T_min=T_min[n]))
+        for k, analyse in enumerate(analyser):
+            UR_direkte = analyse.utnyttelsesgrad(q_p[n])
+            assert abs(UR[k, n] - UR_direkte) <= 5e-3 * UR_direkte, (analyse.mast.navn, n)
+
+    # Islast fra inndata erstatter isklassen
+    assert system.hent_islast(i) == 15.0
+    assert system.hent_islast(i.kopi(islast=12.5)) == 12.5
+
+    # Laveste temperatur: standardverdien er -40C, og tilstanden "-40C"
+    # for fastavspente ledninger beregnes ved i.T_min
+    assert hent_inndata({}).T_min == -40.0
+    strekk = {}
+    for T in (-40.0, -30.0):
+        sys = system.hent_system(i.kopi(T_min=T))
+        for ledning in sys.ledninger:
+            if isinstance(ledning, system.Fastavspent):
+                s = ledning.temperaturdata["-40C"]["s"]
+                assert s == ledning._kabellikevekt(system.Ledning.a_mid, 0.0, T, ledning.s)
+                strekk[(ledning.navn, T)] = s
+    for (navn, T), s in strekk.items():
+        if T == -30.0:
+            assert s < strekk[(navn, -40.0)], navn
+
+
+def test_kapasitetsflate():
+    """Kontrollerer kapasitetsflate og nedre grense mot kontroll av utnyttelsesgrad."""
+    i = hent_inndata({})
+    rng = numpy.random.RandomState(0)
+    K = rng.normal(size=(10000, 6)) * numpy.array([5e4, 5e3, 2e4, 5e3, 3e4, 1e3])
+    A = rng.uniform(0, 3, 10000)
+    A[0:10], A[10:20], K[20:30, 0] = numpy.nan, numpy.inf, 0.0
+    for h in (8.0, 13.0):
+        for m in mast.hent_master(h, i.s235, i.materialkoeff, i.avspenningsmast,
+                                  i.fixavspenningsmast, i.avspenningsbardun):
+            UR = kapasitet.Kapasitetsflate(m).utnyttelsesgrad(K, A)
+            UR_eksakt = tilstand.utnyttelsesgrad(m, K, A)
+            assert numpy.array_equal(UR, UR_eksakt, equal_nan=True), (m.navn, h)
+            # Uten momentandel gir kontrollen nedre grense, se utvelgelse
+            UR_min = tilstand.utnyttelsesgrad(m, K)
+            endelig = numpy.isfinite(A)
+            assert numpy.all(UR_min[endelig] <= UR_eksakt[endelig]), (m.navn, h)
+    print("Kapasitetsflate: {} tilstander kontrollert.".format(len(K)))
+
+
+def test_tjeneste():
+    """Kontrollerer beregningstjenesten mot direkte beregning, samt sammenslåing og buffer.
+
+    Ugyldige forespørsler og en prosess som avsluttes uventet skal
+    besvares med feilkode uten at tjenesten blir ubrukelig.
+    """
+    import asyncio
+    import json
+    import signal
+    import urllib.error
+    import urllib.request
+
+    def post(port, endringer):
+        foresporsel = urllib.request.Request(
+            "http://127.0.0.1:{}/beregn".format(port), data=json.dumps(endringer).encode("utf-8"))
+        try:
+            with urllib.request.urlopen(foresporsel) as svar:
+                return svar.status, json.loads(svar.read().decode("utf-8"))
+        except urllib.error.HTTPError as feil:
+            return feil.code, json.loads(feil.read().decode("utf-8"))
+
+    async def raa(port, data):
+        leser, skriver = await asyncio.open_connection("127.0.0.1", port)
+        skriver.write(data)
+        await skriver.drain()
+        statuslinje = await leser.readline()
+        skriver.close()
+        await skriver.wait_closed()
+        return int(statuslinje.split()[1])
+
+    async def kjor():
+        t = tjeneste.Beregningstjeneste(prosesser=1)
+        port = await t.start(port=0)
+        loop = asyncio.get_running_loop()
+        try:
+            endringer = {"a1": 60, "a2": 60}
+            svar = await asyncio.gather(*[loop.run_in_executor(None, post, port, endringer)
+                                          for k in range(4)])
+            svar.append(await loop.run_in_executor(None, post, port, endringer))
+            svar_feil = [(await loop.run_in_executor(None, post, port, feil))[0]
+                         for feil in ({"ukjent": 1}, {"a1": "60"}, {"matefjern_antall": 1.5},
+                                      {"ec3": 1}, [60])]
+            svar_feil.append(await raa(port, b"TULL\r\n\r\n"))
+            for lengde in ("x", tjeneste._MAKS_INNHOLD + 1):
+                svar_feil.append(await raa(port, "POST /beregn HTTP/1.1\r\n"
+                                           "Content-Length: {}\r\n\r\n".format(lengde).encode()))
+            # Prosessen i poolen avsluttes: 500, deretter ny pool
+            for pid in list(t._pool._processes):
+                os.kill(pid, signal.SIGKILL)
+            endringer = {"a1": 55, "a2": 55}
+            svar_feil.append((await loop.run_in_executor(None, post, port, endringer))[0])
+            svar_ny_pool = await loop.run_in_executor(None, post, port, endringer)
+            metrikker = t.metrikker()
+            latens = len(t._latens)
+        finally:
+            await t.stopp()
+        return svar, svar_feil, svar_ny_pool, metrikker, latens
+
+    svar, svar_feil, svar_ny_pool, metrikker, latens = asyncio.run(kjor())
+    i = hent_inndata({"a1": 60.0, "a2": 60.0})
+    for m, resultat in zip(beregning.beregn(i), svar[0][1]["master"]):
+        m.sorter_grenseverdier()
+        assert resultat["navn"] == m.navn
+        assert resultat["UR"] == m.tilstand_UR_max.utnyttelsesgrad, m.navn
+    assert all(s == svar[0] for s in svar)
+    assert svar_feil == [400, 400, 400, 400, 400, 400, 400, 413, 500], svar_feil
+    assert svar_ny_pool[0] == 200
+    assert metrikker["beregninger"] == 3
+    assert metrikker["bufret"] + metrikker["sammenslatt"] == 4
+    assert metrikker["pagaende"] == 0
+    assert metrikker["ny_pool"] == 1
+    assert metrikker["feil"] == len(svar_feil)
+    # Svartider kun for vellykkede beregninger
+    assert latens == len(svar) + 1
+    assert tjeneste._tolk(i, "matefjern_antall", 2.0) == 2
+    assert tjeneste._tolk(i, "a1", 60) == 60.0
+    assert tjeneste._tolk(i, "islast", 12) == 12.0
+    print("Tjeneste: {}".format(metrikker))
+
+
+def test_deltminne():
+    """Kontrollerer mastekatalog og spenntabell i delt minne, også via beregningstjenesten."""
+    import asyncio
+
+    i = hent_inndata({})
+    s = strekning.Strekning(i, [60.0, 45.0], [{}, {}, {"radius": 600}])
+    s.beregn()
+    katalog = [dict(rad) for rad in mast.hent_katalog()]
+    try:
+        with deltminne.Deltminne(spenntabell=s.spenntabell) as delt:
+            kolonner, spenntabell = deltminne.koble_til(delt.beskrivelse)
+            assert not kolonner["d"].flags.writeable and not kolonner["d"].flags.owndata
+            assert spenntabell == s.spenntabell
+            rader = mast.hent_katalog()
+            assert [rad["navn"] for rad in rader] == [rad["navn"] for rad in katalog]
+            for rad, original in zip(rader, katalog):
+                assert set(rad) == set(original)
+                for k in rad:
+                    if k not in ("navn", "type"):
+                        assert rad[k] == float(original[k])
+
+            async def kjor():
+                t = tjeneste.Beregningstjeneste(prosesser=1, delt_minne=True,
+                                                spenntabell=s.spenntabell)
+                await t.start(port=0)
+                try:
+                    return await t.beregn({"a1": 45.0, "a2": 45.0, "radius": 600})
+                finally:
+                    await t.stopp()
+
+            resultat = asyncio.run(kjor())
+    finally:
+        mast.tom_buffer()
+    master = beregning.beregn(s.inndata(2))
+    for m in master:
+        m.sorter_grenseverdier()
+    assert resultat == [tjeneste._resultat(m) for m in master]
+    print("Delt minne: {} master, {} spenn.".format(len(katalog), len(spenntabell)))
+
+
+def test_planlegger():
+    """Kontrollerer kostnadsmodell, fordeling med lengste først og stjeling av mastepunkter."""
+    import collections
+    import tempfile
+
+    punkter = [hent_inndata(varianter[k]) for k in (0, 7, 4, 6, 5)]
+    modell = planlegger.Kostnadsmodell()
+    kostnad = [modell.estimer(i) for i in punkter]
+    assert kostnad[1] > kostnad[0] and kostnad[2] > kostnad[0] and kostnad[4] > kostnad[2]
+
+    p = planlegger.Planlegger(prosesser=2, modell=modell)
+    koer = p.fordel(punkter)
+    assert sorted(n for ko in koer for n in ko) == list(range(len(punkter)))
+    for ko in koer:
+        assert [kostnad[n] for n in ko] == sorted((kostnad[n] for n in ko), reverse=True)
+    last = [sum(kostnad[n] for n in ko) for ko in koer]
+    assert max(last) - min(last) <= max(kostnad)
+
+    class Pool(object):
+        def submit(self, *args):
+            return object()
+
+    pagaende = {}
+    koer = [collections.deque(), collections.deque([0]), collections.deque([1, 2, 3])]
+    p._tildel(Pool(), None, punkter, koer, 0, pagaende)
+    assert list(pagaende.values()) == [(0, 3)] and p.stjalet == 1
+
+    resultater = p.kjor(beregning.beregn, punkter)
+    for i, master in zip(punkter, resultater):
+        direkte = beregning.beregn(i)
+        assert [m.navn for m in master] == [m.navn for m in direkte]
+        for m, d in zip(master, direkte):
+            m.sorter_grenseverdier()
+            d.sorter_grenseverdier()
+            assert m.tilstand_UR_max.utnyttelsesgrad == d.tilstand_UR_max.utnyttelsesgrad
+    assert len(modell.observasjoner) == len(punkter)
+
+    # Tilpasning til beregningstider fra kjente vekter
+    vekter = numpy.array([0.03, 0.01, 0.02, 0.0, 0.004])
+    modell = planlegger.Kostnadsmodell(regularisering=1e-9)
+    for i in punkter + [hent_inndata(varianter[k]) for k in (1, 2, 3)]:
+        modell.registrer(i, modell.egenskaper(i).dot(vekter))
+    modell.registrer(punkter[:2], sum(modell.egenskaper(i).dot(vekter) for i in punkter[:2]))
+    assert numpy.allclose(modell.tilpass(), vekter, atol=1e-6)
+    with tempfile.TemporaryDirectory() as mappe:
+        sti = os.path.join(mappe, "kostnad.json")
+        modell.lagre(sti)
+        lest = planlegger.Kostnadsmodell.les(sti)
+        assert numpy.array_equal(lest.vekter, modell.vekter)
+        assert lest.observasjoner == modell.observasjoner
+
+    # Koordinatoren tildeler blokken med størst estimert kostnad først
+    s = strekning.Strekning(hent_inndata({}), [60.0] * 5,
+                            [{}] * 4 + [{"siste_for_avspenning": True}] * 2)
+    assert klynge.Koordinator(s, blokkstorrelse=2).rekkefolge == [2, 0, 1]
+    print("Planlegger: vekter {}.".format(modell.vekter))
+
+
+def test_klynge():
+    """Kontrollerer fordelt beregning av strekning, med en arbeider som kobles fra."""
+    import asyncio
+    import multiprocessing
+    import socket
+    import tempfile
+
+    i = hent_inndata({"forbigang_ledn": True})
+    s = strekning.Strekning(i, [60.0, 55.0, 45.0, 60.0, 50.0],
+                            [{}, {"radius": 600}, {}, {"h": 9.0}, {}, {}])
+
+    def frakoblet_arbeider(port):
+        with socket.create_connection(("127.0.0.1", port)) as tilkobling:
+            fil = tilkobling.makefile("rb")
+            fil.readline()  # Grunnlag
+            fil.readline()  # Oppgave, kobler fra uten svar
+
+    prosesser = []
+
+    async def kjor():
+        koordinator = klynge.Koordinator(s, blokkstorrelse=2, total_tidsavbrudd=300.0)
+        port = await koordinator.start()
+        await asyncio.get_running_loop().run_in_executor(None, frakoblet_arbeider, port)
+        for n in range(2):
+            prosess = multiprocessing.Process(target=klynge.arbeider, args=("127.0.0.1", port))
+            prosess.start()
+            prosesser.append(prosess)
+        return await koordinator.vent(), koordinator.tildelinger, koordinator.modell
+
+    try:
+        rader, tildelinger, modell = asyncio.run(kjor())
+    finally:
+        for prosess in prosesser:
+            prosess.join(30)
+    assert not any(prosess.is_alive() for prosess in prosesser)
+    assert rader == s.oppsummering()
+    assert tildelinger == 4
+    assert len(modell.observasjoner) == 3
+    with tempfile.TemporaryDirectory() as mappe:
+        sti = os.path.join(mappe, "resultater.csv")
+        klynge.skriv_resultater(sti, rader)
+        with open(sti) as csvfile:
+            assert len(csvfile.readlines()) == len(s) + 1
+
+    async def uten_arbeidere():
+        koordinator = klynge.Koordinator(s, blokkstorrelse=2, total_tidsavbrudd=0.5)
+        await koordinator.start()
+        return await koordinator.vent()
+
+    try:
+        asyncio.run(uten_arbeidere())
+        assert False, "Forventet RuntimeError uten arbeidere"
+    except RuntimeError:
+        pass
+    print("Klynge: {} mastepunkter, {} tildelinger.".format(len(rader), tildelinger))
+
+
+def test_resultatlager():
+    """Kontrollerer poster som arbeidere skriver direkte til resultatfil."""
+    import tempfile
+
+    i = hent_inndata({})
+    s = strekning.Strekning(i, [60.0, 45.0, 55.0], [{}, {"radius": 600}, {}, {"h": 9.0}])
+    with tempfile.TemporaryDirectory() as mappe:
+        sti = os.path.join(mappe, "resultater.dat")
+        rader = klynge.koordiner(s, os.path.join(mappe, "resultater.csv"), blokkstorrelse=2,
+                                 total_tidsavbrudd=300.0, lokale_arbeidere=2, lager=sti)
+        assert rader == s.oppsummering()
+        lager = resultatlager.Resultatlager(sti)
+        assert isinstance(lager.data, numpy.memmap)
+        assert len(lager) == len(s) and lager.data["beregnet"].all()
+        for n in range(len(s)):
+            master = beregning.beregn(s.inndata(n))
+            for mast in master:
+                mast.sorter_grenseverdier()
+            k = [lager.master.index(mast.navn) for mast in master]
+            UR = [mast.tilstand_UR_max.utnyttelsesgrad for mast in master]
+            assert numpy.allclose(lager.data["UR"][n, k], UR, rtol=1e-12)
+            assert numpy.allclose(lager.data["K"][n, k],
+                                  [mast.tilstand_UR_max.K for mast in master], rtol=1e-12)
+            assert numpy.allclose(lager.data["phi_kl"][n, k],
+                                  [abs(mast.tilstand_phi_kl_max.K_D[2]) for mast in master])
+            assert lager.anbefalt(n) == [rader[n]["gittermast"], rader[n]["bjelkemast"]]
+        del lager
+        try:
+            resultatlager.Resultatlager(sti + ".mangler")
+            assert False, "Forventet feil for manglende resultatfil"
+        except (IOError, OSError):
+            pass
+    print("Resultatlager: {} mastepunkter.".format(len(s)))
+
+
+def test_importtid():
+    """Kontrollerer at beregningsmodulene importeres uten SciPy, tkinter og matplotlib.
+
+    Importtiden måles med ``python -X importtime``, og modulene med
+    lengst samlet importtid skrives ut.
+    """
+    import subprocess
+    import sys
+
+    moduler = ("main", "beregning", "strekning", "klynge", "tjeneste", "resultatlager",
+               "resultatdatabase", "fundamast", "deltminne", "planlegger")
+    prosess = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(moduler)],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    assert prosess.returncode == 0, prosess.stderr
+    importert = []
+    for linje in prosess.stderr.splitlines():
+        if linje.startswith("import time:") and "|" in linje and "self [us]" not in linje:
+            selv, samlet, navn = linje[len("import time:"):].split("|")
+            importert.append((int(samlet), navn.strip()))
+    navn = {n for t, n in importert}
+    for modul in ("scipy", "tkinter", "_tkinter", "matplotlib", "psutil"):
+        assert not any(n == modul or n.startswith(modul + ".") for n in navn), modul
+    assert set(moduler) <= navn
+    print("Importtid [ms]:")
+    for samlet, n in sorted(importert, reverse=True)[:10]:
+        print("  {:8.1f}  {}".format(samlet / 1000, n))
+
 
 if __name__ == "__main__":
     from tkinter import *
@@ -2,11 +2,12 @@
 from __future__ import unicode_literals
 import numpy
 import math
-import scipy.integrate as integrate
 import system
 import lister
 import laster
+import kraft
 import tilstand
+import utvelgelse
 from kraft import Kraft
 import mast as module_mast
 
@@ -78,10 +79,12 @@ Forskyvning :math:`[mm]` og rotasjon :math:`[^{\\circ}]` av mast i kontakttrådh
 """
 
 
-def beregn(i):
+def beregn(i, spenntabell=None):
     """Gjennomfører beregning og returnerer masteobjekter med resultater.
 
     :param Inndata i: Input fra bruker
+    :param dict spenntabell: Spenntabell for fastavspente ledninger,
+     se :func:`system.hent_system`
     :return: Liste med master
     :rtype: :class:`list`
     """
@@ -90,131 +93,197 @@ def beregn(i):
         i.h, i.s235, i.materialkoeff, i.avspenningsmast,
         i.fixavspenningsmast, i.avspenningsbardun)
     # Oppretter systemobjekt med data for ledninger, utliggere og geometri
-    sys = system.hent_system(i)
+    sys = system.hent_system(i, spenntabell)
     # F_statisk_ledn = laster uavhengige av temperatur, snø og vind
     # F_dynamisk_ledn = laster som varierer med én eller flere klimaforhold
     F_statisk_ledn, F_dynamisk_ledn = laster.laster_ledninger(i, sys, mastehoyde=i.h)
     iterasjon = 0
     for mast in master:
-        F_statisk_mast, F_dynamisk_mast = laster.laster_mast(i, sys, mast)
-        F_statisk = F_statisk_ledn + F_statisk_mast
-        F_dynamisk = F_dynamisk_ledn + F_dynamisk_mast
-        lastsituasjoner, lastfaktorer = lister.hent_lastkombinasjoner(i.ec3)
-        for lastsituasjon in lastsituasjoner:
-            psi_T = lastsituasjoner.get(lastsituasjon)["psi_T"]
-            psi_S = lastsituasjoner.get(lastsituasjon)["psi_S"]
-            psi_V = lastsituasjoner.get(lastsituasjon)["psi_V"]
-            temp = lastsituasjoner.get(lastsituasjon)["T"]
-            # F_T = klimaavhengige laster ved gitt temperatur
-            F_T = []
-            F_T.extend([f for f in F_dynamisk if f.T==temp or f.T==None])
-            # 0: Vind fra mast mot spor
-            # 1: Vind fra spor mot mast
-            # 2: Vind parallelt sporet
-            for vindretning in range(3):
-                # F = alle dimensjonerende krefter ved gitte klimaforhold
-                F = []
-                F.extend(F_statisk)
-                F.extend([f for f in F_T if f.vindretning==vindretning or f.vindretning==None])
-                R_0 = _beregn_reaksjonskrefter(F)
-                D_0 = _beregn_deformasjoner(i, mast, F)
-                R = numpy.zeros((5, 8, 6))
-                for G in lastfaktorer["G"]:
-                    # Egenvekt
-                    R[0, :, :] = R_0[0, :, :] * G
-                    for L in lastfaktorer["L"]:
-                        # Strekk
-                        R[1, :, :] = R_0[1, :, :] * L
-                        for T in lastfaktorer["T"]:
-                            # Temperatur
-                            R[2, :, :] = R_0[2, :, :] * psi_T * T
-                            for S in lastfaktorer["S"]:
-                                # Snø
-                                R[3, :, :] = R_0[3, :, :] * psi_S * S
-                                for V in lastfaktorer["V"]:
-                                    # Vind
-                                    R[4, :, :] = R_0[4, :, :] * psi_V * V
-                                    t = tilstand.Tilstand(
-                                        mast, i, lastsituasjon, vindretning,
-                                        grensetilstand=0, F=F, R=R, G=G, L=L,
-                                        T=T, S=S, V=V, psi_T=psi_T, psi_S=psi_S,
-                                        psi_V=psi_V, temp=temp, iterasjon=iterasjon)
-                                    mast.lagre_tilstand(t)
-                                    iterasjon += 1
-                # Bruksgrense, forskyvning totalt
-                R = numpy.zeros((5, 8, 6))
-                R[0:2, :, :] = R_0[0:2, :, :]
-                R[2, :, :] = R_0[2, :, :] * psi_T
-                R[3, :, :] = R_0[3, :, :] * psi_S
-                R[4, :, :] = R_0[4, :, :] * psi_V
-                D = numpy.zeros((5, 8, 3))
-                D[0:2, :, :] = D_0[0:2, :, :]
-                D[2, :, :] = D_0[2, :, :] * psi_T
-                D[3, :, :] = D_0[3, :, :] * psi_S
-                D[4, :, :] = D_0[4, :, :] * psi_V
-                D += _utliggerbidrag(sys, R)
-                t = tilstand.Tilstand(
-                    mast, i, lastsituasjon, vindretning,
-                    grensetilstand=1, R=R, D=D, iterasjon=iterasjon)
-                mast.lagre_tilstand(t)
-                # Bruksgrense, forskyvning KL
-                R[0:2, :, :], D[0:2, :, :] = 0, 0  # Nullstiller bidrag fra egenvekt og strekk
-                t = tilstand.Tilstand(
-                    mast, i, lastsituasjon, vindretning,
-                    grensetilstand=2, R=R, D=D, iterasjon=iterasjon)
-                mast.lagre_tilstand(t)
-                iterasjon += 1
-        # Ulykkeslast
-        if i.siste_for_avspenning or i.linjemast_utliggere > 1:
-            lastsituasjon = "Ulykkeslast"
-            F_ulykke = []
-            F_ulykke.extend([f for f in F_statisk if not f.navn.startswith("Sidekraft: KL")])
-            R_ulykke = _beregn_reaksjonskrefter(F_ulykke)
-            # Tilleggskraft ved ulykke
-            ulykkeslast = laster.ulykkeslast(
-                i, sys, numpy.sum(numpy.sum(R, axis=0), axis=0)[5])
-            R_ulykke += _beregn_reaksjonskrefter(ulykkeslast)
-            t = tilstand.Tilstand(
-                mast, i, lastsituasjon, 0, grensetilstand=3, F=F_ulykke,
-                R=R_ulykke, iterasjon=iterasjon)
-            mast.lagre_tilstand(t)
-            iterasjon += 1
+        iterasjon = beregn_mast(i, sys, mast, F_statisk_ledn, F_dynamisk_ledn, iterasjon)
     return master
 
 
-def _beregn_reaksjonskrefter(F):
-    """Beregner reaksjonskrefter ved masteinnspenning grunnet krefter i ``F``.
+def anbefal(i, Dz_grense=None, phi_grense=None, spenntabell=None):
+    """Finner anbefalt gittermast og bjelkemast uten å beregne hele katalogen.
 
-    :param list F: Liste med :class:`Kraft`-objekter påført systemet
-    :return: Matrise med reaksjonskrefter
-    :rtype: :class:`numpy.array`
+    Master som beviselig ikke tilfredsstiller kravene forkastes først
+    av :func:`utvelgelse.utvelg`. Gjenværende master av hver type
+    beregnes fullstendig i stigende rekkefølge etter egenvekt, inntil
+    første mast med utnyttelsesgrad :math:`\\leq 1.0` er funnet.
+    Tyngre master av samme type forkastes da uten beregning.
+
+    Dersom grenser for forskyvning i kontakttrådhøyde er gitt,
+    må disse også være overholdt, se :func:`tilfredsstiller_krav`.
+    Resultatet er det samme som :func:`velg_anbefalt` gir etter
+    beregning av samtlige master.
+
+    :param Inndata i: Input fra bruker
+    :param float Dz_grense: Største tillatte forskyvning :math:`D_z` (KL) :math:`[mm]`
+    :param float phi_grense: Største tillatte torsjonsvinkel :math:`\\phi` (KL) :math:`[^{\\circ}]`
+    :param dict spenntabell: Spenntabell for fastavspente ledninger,
+     se :func:`system.hent_system`
+    :return: Anbefalt gittermast og bjelkemast med beregnede og sorterte
+     tilstander (``None`` dersom ingen mast av gitt type tilfredsstiller kravene),
+     antall master forkastet uten fullstendig beregning
+    :rtype: :class:`Mast`, :class:`Mast`, :class:`int`
+    """
+    master = module_mast.hent_master(
+        i.h, i.s235, i.materialkoeff, i.avspenningsmast,
+        i.fixavspenningsmast, i.avspenningsbardun)
+    sys = system.hent_system(i, spenntabell)
+    F_statisk_ledn, F_dynamisk_ledn = laster.laster_ledninger(i, sys, mastehoyde=i.h)
+    gittermaster = [mast for mast in master if not mast.type == "bjelke"]
+    bjelkemaster = [mast for mast in master if mast.type == "bjelke"]
+    anbefalt, forkastet = [], 0
+    for masteliste in (gittermaster, bjelkemaster):
+        kandidater, n = utvelgelse.utvelg(i, sys, masteliste, F_statisk_ledn, F_dynamisk_ledn)
+        forkastet += n
+        anbefalt_mast = None
+        for k, mast in enumerate(kandidater):
+            beregn_mast(i, sys, mast, F_statisk_ledn, F_dynamisk_ledn)
+            mast.sorter_grenseverdier()
+            if tilfredsstiller_krav(mast, Dz_grense, phi_grense):
+                anbefalt_mast = mast
+                forkastet += len(kandidater) - k - 1
+                break
+        anbefalt.append(anbefalt_mast)
+    return anbefalt[0], anbefalt[1], forkastet
+
+
+def velg_anbefalt(master, h, Dz_grense=None, phi_grense=None):
+    """Velger anbefalt mast blant ferdig beregnede master.
+
+    Anbefalt mast er letteste mast med tillatt høyde :math:`\\geq h`
+    som tilfredsstiller kravene i :func:`tilfredsstiller_krav`.
+    Regelen er den samme som i :func:`anbefal`.
+
+    :param list master: Master med sorterte tilstander
+    :param float h: Valgt mastehøyde :math:`[m]`
+    :param float Dz_grense: Største tillatte forskyvning :math:`D_z` (KL) :math:`[mm]`
+    :param float phi_grense: Største tillatte torsjonsvinkel :math:`\\phi` (KL) :math:`[^{\\circ}]`
+    :return: Anbefalt mast, ``None`` dersom ingen mast tilfredsstiller kravene
+    :rtype: :class:`Mast`
     """
-    # Initierer R-matrisen for reaksjonskrefter
-    R = numpy.zeros((5, 8, 6))
-    for j in F:
-        R_0 = numpy.zeros((5, 8, 6))
-        f = j.f
-        if not numpy.count_nonzero(j.q) == 0:
-            f = numpy.array([j.q[0] * j.b, j.q[1] * j.b, j.q[2] * j.b])
-        # Sorterer bidrag til reaksjonskrefter
-        R_0[j.type[1], j.type[0], 0] = f[0] * j.e[2] + f[2] * (-j.e[0])
-        R_0[j.type[1], j.type[0], 1] = f[1]
-        R_0[j.type[1], j.type[0], 2] = f[0] * (-j.e[1]) + f[1] * j.e[0]
-        R_0[j.type[1], j.type[0], 3] = f[2]
-        R_0[j.type[1], j.type[0], 4] = f[0]
-        if j.navn.startswith("Sidekraft: KL"):
-            R_0[j.type[1], j.type[0], 5] = f[1] * (-j.e[2]) + f[2] * j.e[1]
-        else:
-            sign = numpy.sign(numpy.sum(numpy.sum(R, axis=0), axis=0)[5])
-            sign = 1 if sign == 0 else sign
-            R_0[j.type[1], j.type[0], 5] = sign*(abs(f[1]*(-j.e[2])) + abs(f[2]*j.e[1]))
-        R += R_0
-    return R
+    for mast in sorted(master, key=lambda mast: mast.egenvekt):
+        if mast.h_max >= h and tilfredsstiller_krav(mast, Dz_grense, phi_grense):
+            return mast
+    return None
+
+
+def tilfredsstiller_krav(mast, Dz_grense=None, phi_grense=None):
+    """Kontrollerer beregnet mast mot krav til utnyttelse og forskyvning.
+
+    Forskyvningsgrensene gjelder bruksgrensetilstander for KL, og
+    kontrolleres kun dersom de er gitt.
+
+    :param Mast mast: Mast med sorterte tilstander
+    :param float Dz_grense: Største tillatte forskyvning :math:`D_z` (KL) :math:`[mm]`
+    :param float phi_grense: Største tillatte torsjonsvinkel :math:`\\phi` (KL) :math:`[^{\\circ}]`
+    :return: ``True`` dersom samtlige krav er oppfylt
+    :rtype: :class:`Boolean`
+    """
+    if mast.tilstand_UR_max.utnyttelsesgrad > 1.0:
+        return False
+    if Dz_grense is not None and abs(mast.tilstand_Dz_kl_max.K_D[1]) > Dz_grense:
+        return False
+    if phi_grense is not None and abs(mast.tilstand_phi_kl_max.K_D[2]) > phi_grense:
+        return False
+    return True
+
+
+def beregn_mast(i, sys, mast, F_statisk_ledn, F_dynamisk_ledn, iterasjon=0):
+    """Beregner og lagrer samtlige tilstander for én mast.
+
+    :param Inndata i: Input fra bruker
+    :param System sys: Data for ledninger og utliggere
+    :param Mast mast: Aktuell mast
+    :param list F_statisk_ledn: Laster fra ledninger uavhengige av klimaforhold
+    :param list F_dynamisk_ledn: Laster fra ledninger avhengige av klimaforhold
+    :param int iterasjon: Løpenummer for første tilstand
+    :return: Løpenummer for neste tilstand
+    :rtype: :class:`int`
+    """
+    F_statisk_mast, F_dynamisk_mast = laster.laster_mast(i, sys, mast)
+    F_statisk = F_statisk_ledn + F_statisk_mast
+    F_dynamisk = F_dynamisk_ledn + F_dynamisk_mast
+    lastsituasjoner, lastfaktorer = lister.hent_lastkombinasjoner(i.ec3)
+    for lastsituasjon, vindretning, F in lister.kraftlister(lastsituasjoner, F_statisk, F_dynamisk):
+        psi_T = lastsituasjoner.get(lastsituasjon)["psi_T"]
+        psi_S = lastsituasjoner.get(lastsituasjon)["psi_S"]
+        psi_V = lastsituasjoner.get(lastsituasjon)["psi_V"]
+        temp = lastsituasjoner.get(lastsituasjon)["T"]
+        R_0 = kraft.beregn_reaksjonskrefter(F)
+        D_0 = _beregn_deformasjoner(i, mast, F)
+        R = numpy.zeros((5, 8, 6))
+        for G in lastfaktorer["G"]:
+            # Egenvekt
+            R[0, :, :] = R_0[0, :, :] * G
+            for L in lastfaktorer["L"]:
+                # Strekk
+                R[1, :, :] = R_0[1, :, :] * L
+                for T in lastfaktorer["T"]:
+                    # Temperatur
+                    R[2, :, :] = R_0[2, :, :] * psi_T * T
+                    for S in lastfaktorer["S"]:
+                        # Snø
+                        R[3, :, :] = R_0[3, :, :] * psi_S * S
+                        for V in lastfaktorer["V"]:
+                            # Vind
+                            R[4, :, :] = R_0[4, :, :] * psi_V * V
+                            t = tilstand.Tilstand(
+                                mast, i, lastsituasjon, vindretning,
+                                grensetilstand=0, F=F, R=R, G=G, L=L,
+                                T=T, S=S, V=V, psi_T=psi_T, psi_S=psi_S,
+                                psi_V=psi_V, temp=temp, iterasjon=iterasjon)
+                            mast.lagre_tilstand(t)
+                            iterasjon += 1
+        # Bruksgrense, forskyvning totalt
+        R = numpy.zeros((5, 8, 6))
+        R[0:2, :, :] = R_0[0:2, :, :]
+        R[2, :, :] = R_0[2, :, :] * psi_T
+        R[3, :, :] = R_0[3, :, :] * psi_S
+        R[4, :, :] = R_0[4, :, :] * psi_V
+        D = numpy.zeros((5, 8, 3))
+        D[0:2, :, :] = D_0[0:2, :, :]
+        D[2, :, :] = D_0[2, :, :] * psi_T
+        D[3, :, :] = D_0[3, :, :] * psi_S
+        D[4, :, :] = D_0[4, :, :] * psi_V
+        D += _utliggerbidrag(sys, R)
+        t = tilstand.Tilstand(
+            mast, i, lastsituasjon, vindretning,
+            grensetilstand=1, R=R, D=D, iterasjon=iterasjon)
+        mast.lagre_tilstand(t)
+        # Bruksgrense, forskyvning KL
+        R[0:2, :, :], D[0:2, :, :] = 0, 0  # Nullstiller bidrag fra egenvekt og strekk
+        t = tilstand.Tilstand(
+            mast, i, lastsituasjon, vindretning,
+            grensetilstand=2, R=R, D=D, iterasjon=iterasjon)
+        mast.lagre_tilstand(t)
+        iterasjon += 1
+    # Ulykkeslast
+    if i.siste_for_avspenning or i.linjemast_utliggere > 1:
+        lastsituasjon = "Ulykkeslast"
+        F_ulykke = []
+        F_ulykke.extend([f for f in F_statisk if not f.kl_sidekraft])
+        R_ulykke = kraft.beregn_reaksjonskrefter(F_ulykke)
+        # Tilleggskraft ved ulykke
+        ulykkeslast = laster.ulykkeslast(
+            i, sys, numpy.sum(numpy.sum(R, axis=0), axis=0)[5])
+        R_ulykke += kraft.beregn_reaksjonskrefter(ulykkeslast)
+        t = tilstand.Tilstand(
+            mast, i, lastsituasjon, 0, grensetilstand=3, F=F_ulykke,
+            R=R_ulykke, iterasjon=iterasjon)
+        mast.lagre_tilstand(t)
+        iterasjon += 1
+    return iterasjon
 
 
 def _beregn_deformasjoner(i, mast, F):
     """Beregner forskyvninger i kontakttrådhøyde grunnet krefter i ``F``.
 
+    Bjelkeformlene evalueres for samtlige krefter samtidig, og
+    bidragene summeres inn i D-matrisen med én spredt addisjon.
+
     :param Inndata i: Input fra bruker
     :param Mast mast: Aktuell mast som beregnes
     :param list F: Liste med :class:`Kraft`-objekter påført systemet
@@ -225,21 +294,50 @@ def _beregn_deformasjoner(i, mast, F):
     fh_korrigert = i.fh + i.e
     # Initierer deformasjonsmatrisen, D
     D = numpy.zeros((5, 8, 3))
-    for j in F:
-        D_0 = numpy.zeros((5, 8, 3))
-        D_0 += (_bjelkeformel_P(mast, j, fh_korrigert)
-                +_bjelkeformel_q(mast, j, fh_korrigert)
-                +_bjelkeformel_M(mast, j, fh_korrigert))
-        if mast.type == "bjelke":
-            sign = numpy.sign(numpy.sum(numpy.sum(D, axis=0), axis=0)[2])
-            sign = 1 if sign == 0 else sign
-            D_0 += _torsjonsvinkel(mast, j, fh_korrigert, sign)
-        D += D_0
+    if not F:
+        return D
+    rad, etasje, f, q, b, e, kl = kraft.kraftdata(F)
+    D_0 = (_bjelkeformel_P(mast, f, e, fh_korrigert)
+           + _bjelkeformel_q(mast, q, b, e, fh_korrigert)
+           + _bjelkeformel_M(mast, f, e, fh_korrigert))
+    if mast.type == "bjelke":
+        D_0[:, 2] += _torsjonsvinkel(mast, f, e, kl, fh_korrigert)
+    numpy.add.at(D, (etasje, rad), D_0)
     return D
 
 
-def _bjelkeformel_M(mast, j, fh):
-    """Beregner deformasjoner i kontakttrådhøyde grunnet et rent moment.
+def _stivhet(mast, integrand, potens, delta_topp):
+    """Beregner ekvivalent annet arealmoment for mastens utkragede del.
+
+    Ekvivalent arealmoment :math:`I = \\frac{L^n}{n \\int_0^L integrand}`
+    beregnes for hver unike verdi av ``delta_topp``. Resultatene lagres
+    i mastens ``stivhetskoeffisienter`` slik at hver kombinasjon kun
+    integreres én gang per mast og mastehøyde. SciPy importeres først
+    når et arealmoment må integreres.
+
+    :param Mast mast: Aktuell mast som beregnes
+    :param str integrand: Navn på integrandmetode i :class:`Mast`
+    :param int potens: Eksponent :math:`n` for lengden :math:`L`
+    :param numpy.array delta_topp: Avstand fra mastetopp til lastens angrepspunkt :math:`[m]`
+    :return: Ekvivalente arealmomenter :math:`[mm^4]`
+    :rtype: :class:`numpy.array`
+    """
+    unike, indekser = numpy.unique(delta_topp, return_inverse=True)
+    I = numpy.empty(len(unike))
+    for k, d in enumerate(unike):
+        nokkel = (integrand, mast.h, d)
+        if nokkel not in mast.stivhetskoeffisienter:
+            from scipy.integrate import quad
+
+            L = (mast.h - d) * 1000
+            delta = quad(getattr(mast, integrand), 0, L, args=(d,))
+            mast.stivhetskoeffisienter[nokkel] = L ** potens / (potens * delta[0])
+        I[k] = mast.stivhetskoeffisienter[nokkel]
+    return I[indekser]
+
+
+def _bjelkeformel_M(mast, f, e, fh):
+    """Beregner deformasjoner i kontakttrådhøyde grunnet rene momenter.
 
     Funksjonen beregner horisontale forskyvninger basert på følgende bjelkeformel:
     :math:`\\delta = \\frac{M*fh^2}{2EI}`
@@ -249,38 +347,37 @@ def _bjelkeformel_M(mast, j, fh):
     der :math:`\\theta` er mastens utbøyningsvinkel i høyde :math:`x`.
 
     :param Mast mast: Aktuell mast som beregnes
-    :param Kraft j: Last som skal påføres ``mast``
+    :param numpy.array f: Kraftvektorer :math:`[N]`
+    :param numpy.array e: Eksentrisiteter :math:`[m]`
     :param float fh: Kontakttrådhøyde i :math:`[m]`
-    :return: Matrise med forskyvningsbidrag i :math:`[mm]`
+    :return: Forskyvningsbidrag [Dy, Dz, phi] per kraft :math:`[mm]`
     :rtype: :class:`numpy.array`
     """
-    D = numpy.zeros((5, 8, 3))
-    if j.e[0] < 0:
+    D = numpy.zeros((len(f), 3))
+    aktiv = e[:, 0] < 0
+    if numpy.any(aktiv):
+        f, e = f[aktiv], e[aktiv]
         E = mast.E
-        delta_topp = mast.h + j.e[0]
-        delta_topp = 0 if delta_topp < 0 else delta_topp
-        L = (mast.h - delta_topp) * 1000
-        delta_y = integrate.quad(mast.Iy_int_M, 0, L, args=(delta_topp,))
-        delta_z = integrate.quad(mast.Iz_int_M, 0, L, args=(delta_topp,))
-        I_y = L ** 2 / (2 * delta_y[0])
-        I_z = L ** 2 / (2 * delta_z[0])
-        M_y = j.f[0] * j.e[2] * 1000
-        M_z = - j.f[0] * j.e[1] * 1000
-        x = -j.e[0] * 1000
+        delta_topp = numpy.maximum(mast.h + e[:, 0], 0)
+        I_y = _stivhet(mast, "Iy_int_M", 2, delta_topp)
+        I_z = _stivhet(mast, "Iz_int_M", 2, delta_topp)
+        M_y = f[:, 0] * e[:, 2] * 1000
+        M_z = - f[:, 0] * e[:, 1] * 1000
+        x = -e[:, 0] * 1000
         fh *= 1000
-        if fh > x:
-            theta_y = (M_y * x) / (E * I_y)
-            theta_z = (M_z * x) / (E * I_z)
-            D[j.type[1], j.type[0], 1] = (M_y*x**2)/(2*E*I_y) + numpy.tan(theta_y)*(fh-x)
-            D[j.type[1], j.type[0], 0] = (M_z*x**2)/(2*E*I_z) + numpy.tan(theta_z)*(fh-x)
-        else:
-            D[j.type[1], j.type[0], 1] = (M_y*fh**2)/(2*E*I_y)
-            D[j.type[1], j.type[0], 0] = (M_z*fh**2)/(2*E*I_z)
+        theta_y = (M_y * x) / (E * I_y)
+        theta_z = (M_z * x) / (E * I_z)
+        D[aktiv, 1] = numpy.where(fh > x,
+                                  (M_y*x**2)/(2*E*I_y) + numpy.tan(theta_y)*(fh-x),
+                                  (M_y*fh**2)/(2*E*I_y))
+        D[aktiv, 0] = numpy.where(fh > x,
+                                  (M_z*x**2)/(2*E*I_z) + numpy.tan(theta_z)*(fh-x),
+                                  (M_z*fh**2)/(2*E*I_z))
     return D
 
 
-def _bjelkeformel_P(mast, j, fh):
-    """Beregner deformasjoner i kontakttrådhøyde grunnet en punklast.
+def _bjelkeformel_P(mast, f, e, fh):
+    """Beregner deformasjoner i kontakttrådhøyde grunnet punklaster.
 
     Dersom lasten angriper under kontakttrådhøyde:
     :math:`\\delta = \\frac{P*x^2}{6EI}(3fh-x)`
@@ -289,36 +386,35 @@ def _bjelkeformel_P(mast, j, fh):
     :math:`\\delta = \\frac{P*fh^2}{6EI}(3x-fh)`
 
     :param Mast mast: Aktuell mast som beregnes
-    :param Kraft j: Last som skal påføres ``mast``
+    :param numpy.array f: Kraftvektorer :math:`[N]`
+    :param numpy.array e: Eksentrisiteter :math:`[m]`
     :param float fh: Kontakttrådhøyde :math:`[m]`
-    :return: Matrise med forskyvningsbidrag :math:`[mm]`
+    :return: Forskyvningsbidrag [Dy, Dz, phi] per kraft :math:`[mm]`
     :rtype: :class:`numpy.array`
     """
-    D = numpy.zeros((5, 8, 3))
-    if j.e[0] < 0:
+    D = numpy.zeros((len(f), 3))
+    aktiv = e[:, 0] < 0
+    if numpy.any(aktiv):
+        f, e = f[aktiv], e[aktiv]
         E = mast.E
-        delta_topp = mast.h + j.e[0]
-        delta_topp = 0 if delta_topp < 0 else delta_topp
-        L = (mast.h - delta_topp) * 1000
-        delta_y = integrate.quad(mast.Iy_int_P, 0, L, args=(delta_topp,))
-        delta_z = integrate.quad(mast.Iz_int_P, 0, L, args=(delta_topp,))
-        I_y = L ** 3 / (3 * delta_y[0])
-        I_z = L ** 3 / (3 * delta_z[0])
-        f_y = j.f[1]
-        f_z = j.f[2]
-        x = -j.e[0] * 1000
+        delta_topp = numpy.maximum(mast.h + e[:, 0], 0)
+        I_y = _stivhet(mast, "Iy_int_P", 3, delta_topp)
+        I_z = _stivhet(mast, "Iz_int_P", 3, delta_topp)
+        f_y = f[:, 1]
+        f_z = f[:, 2]
+        x = -e[:, 0] * 1000
         fh *= 1000
-        if fh > x:
-            D[j.type[1], j.type[0], 1] = (f_z*x**2)/(6*E*I_y)*(3*fh-x)
-            D[j.type[1], j.type[0], 0] = (f_y*x**2)/(6*E*I_z)*(3*fh-x)
-        else:
-            D[j.type[1], j.type[0], 1] = (f_z*fh**2)/(6*E*I_y)*(3*x-fh)
-            D[j.type[1], j.type[0], 0] = (f_y*fh**2)/(6*E*I_z)*(3*x-fh)
+        D[aktiv, 1] = numpy.where(fh > x,
+                                  (f_z*x**2)/(6*E*I_y)*(3*fh-x),
+                                  (f_z*fh**2)/(6*E*I_y)*(3*x-fh))
+        D[aktiv, 0] = numpy.where(fh > x,
+                                  (f_y*x**2)/(6*E*I_z)*(3*fh-x),
+                                  (f_y*fh**2)/(6*E*I_z)*(3*x-fh))
     return D
 
 
-def _bjelkeformel_q(mast, j, fh):
-    """Beregner deformasjoner i kontakttrådhøyde grunnet en fordelt last.
+def _bjelkeformel_q(mast, q, b, e, fh):
+    """Beregner deformasjoner i kontakttrådhøyde grunnet fordelte laster.
 
     Funksjonen beregner horisontale forskyvninger basert på følgende bjelkeformel:
     :math:`\\delta = \\frac{q*fh^2}{24EI}(fh^2+6h^2-4h*fh)`
@@ -327,60 +423,68 @@ def _bjelkeformel_q(mast, j, fh):
     med resultant i høyde :math:`h/2`
 
     :param Mast mast: Aktuell mast som beregnes
-    :param Kraft j: Last som skal påføres ``mast``
+    :param numpy.array q: Fordelte laster :math:`[\\frac{N}{m}]`
+    :param numpy.array b: Utstrekning av fordelte laster :math:`[m]`
+    :param numpy.array e: Eksentrisiteter :math:`[m]`
     :param float fh: Kontakttrådhøyde :math:`[m]`
-    :return: Matrise med forskyvningsbidrag :math:`[mm]`
+    :return: Forskyvningsbidrag [Dy, Dz, phi] per kraft :math:`[mm]`
     :rtype: :class:`numpy.array`
     """
-    D = numpy.zeros((5, 8, 3))
-    if j.b > 0 and j.e[0] < 0:
+    D = numpy.zeros((len(q), 3))
+    aktiv = (b > 0) & (e[:, 0] < 0)
+    if numpy.any(aktiv):
+        q, b = q[aktiv], b[aktiv]
         E = mast.E
-        delta_topp = mast.h - j.b
-        L = (mast.h - delta_topp) * 1000
-        delta_y = integrate.quad(mast.Iy_int_q, 0, L, args=(delta_topp,))
-        delta_z = integrate.quad(mast.Iz_int_q, 0, L, args=(delta_topp,))
-        I_y = L ** 4 / (4 * delta_y[0])
-        I_z = L ** 4 / (4 * delta_z[0])
-        q_y = j.q[1] / 1000
-        q_z = j.q[2] / 1000
-        b = j.b * 1000
+        delta_topp = mast.h - b
+        I_y = _stivhet(mast, "Iy_int_q", 4, delta_topp)
+        I_z = _stivhet(mast, "Iz_int_q", 4, delta_topp)
+        q_y = q[:, 1] / 1000
+        q_z = q[:, 2] / 1000
+        b = b * 1000
         fh *= 1000
-        D[j.type[1], j.type[0], 1] = ((q_z*fh**2)/(24*E*I_y))*(fh**2+6*b**2-4*b*fh)
-        D[j.type[1], j.type[0], 0] = ((q_y*fh**2)/(24*E*I_z))*(fh**2+6*b**2-4*b*fh)
+        D[aktiv, 1] = ((q_z*fh**2)/(24*E*I_y))*(fh**2+6*b**2-4*b*fh)
+        D[aktiv, 0] = ((q_y*fh**2)/(24*E*I_z))*(fh**2+6*b**2-4*b*fh)
     return D
 
 
-def _torsjonsvinkel(mast, j, fh, sign):
-    """Beregner torsjonsvinkel i kontakttrådhøyde grunnet en eksentrisk horisontal last.
+def _torsjonsvinkel(mast, f, e, kl, fh):
+    """Beregner torsjonsvinkel i kontakttrådhøyde grunnet eksentriske horisontale laster.
 
     Funksjonen beregner torsjonsvinkel i grader basert på følgende bjelkeformel:
     :math:`\\phi = \\frac{T}{2EC_w\\lambda}
     [\\frac{sinh(\\lambda(x-fh))-sinh(\\lambda x)}{cosh(\\lambda x)} + \\lambda*fh],
     \\ \\lambda = \\sqrt{\\frac{GI_T}{EC_w}}`
 
+    Fortegnet på torsjonsmomentet fra laster som ikke er sidekrefter i KL
+    følger løpende torsjonsvinkel, tilsvarende beregningen av reaksjonskrefter.
+
     :param Mast mast: Aktuell mast som beregnes
-    :param Kraft j: Last som skal påføres ``mast``
+    :param numpy.array f: Kraftvektorer :math:`[N]`
+    :param numpy.array e: Eksentrisiteter :math:`[m]`
+    :param numpy.array kl: Maske for sidekrefter i KL
     :param float fh: Kontakttrådhøyde :math:`[m]`
-    :param float sign: Fortegn for torsjonsmoment
-    :return: Matrise med rotasjonsbidrag :math:`[^{\\circ}]`
+    :return: Rotasjonsbidrag per kraft :math:`[^{\\circ}]`
     :rtype: :class:`numpy.array`
     """
-    D = numpy.zeros((5, 8, 3))
-    if j.e[0] < 0:
-        if j.navn.startswith("Sidekraft: KL"):
-            T = (j.f[1] * -j.e[2] + j.f[2] * j.e[1]) * 1000
-        else:
-            T = sign*(abs(j.f[1] * -j.e[2]) + abs(j.f[2] * j.e[1])) * 1000
+    phi = numpy.zeros(len(f))
+    aktiv = e[:, 0] < 0
+    if numpy.any(aktiv):
         E = mast.E
         G = mast.G
         I_T = mast.It
         C_w = mast.Cw
         lam = math.sqrt(G * I_T / (E * C_w))
         fh = fh * 1000
-        x = -j.e[0] * 1000
-        D[j.type[1], j.type[0], 2] = (180/math.pi) * T/(E*C_w*lam**3) * ((math.sinh(lam*(x-fh))
-                                                 - math.sinh(lam*x))/math.cosh(lam*x) + lam*fh)
-    return D
+        x = -e[:, 0] * 1000
+        vinkel = numpy.where(aktiv, (180/math.pi) / (E*C_w*lam**3) * (
+            (numpy.sinh(lam*(x-fh)) - numpy.sinh(lam*x))/numpy.cosh(lam*x) + lam*fh), 0)
+        T = kraft.fortegnsjusterte_bidrag(
+            (f[:, 1] * -e[:, 2] + f[:, 2] * e[:, 1]) * 1000,
+            (numpy.abs(f[:, 1] * -e[:, 2]) + numpy.abs(f[:, 2] * e[:, 1])) * 1000,
+            kl, faktor=vinkel)
+        phi[aktiv] = ((180/math.pi) * T/(E*C_w*lam**3) * ((numpy.sinh(lam*(x-fh))
+                      - numpy.sinh(lam*x))/numpy.cosh(lam*x) + lam*fh))[aktiv]
+    return phi
 
 
 def _utliggerbidrag(sys, R):
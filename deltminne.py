@@ -0,0 +1,135 @@
+# -*- coding: utf8 -*-
+"""Mastekatalog og spenntabell i delt minne for prosesspooler.
+
+Uten delt minne leser hver prosess i en pool mastekatalogen fra disk
+og beregner kabelstrekk for fastavspente ledninger på nytt. Med
+:class:`Deltminne` publiserer hovedprosessen katalogens kolonner og en
+ferdig beregnet spenntabell én gang med
+:mod:`multiprocessing.shared_memory`, og hver prosess kobler seg til
+med :func:`koble_til` fra poolens ``initializer``.
+
+Katalogens tallkolonner deles som én matrise [mast, kolonne] med
+``nan`` for tomme felt, tilsvarende :func:`mast.kompiler_katalog`.
+Spenntabellen deles som én matrise med én rad per oppføring: nøkkelen
+for spennet (se :meth:`system.Fastavspent._strekklikevekt`), islast
+:math:`G_{sno}`, temperatur :math:`T` og kabelstrekk :math:`H_x`.
+
+Prosessene leser matrisene uten kopiering. Master med avledede
+parametre for aktuell høyde bufres fortsatt i hver prosess av
+:func:`mast.hent_master`.
+
+Eksempel::
+
+    with Deltminne(spenntabell=s.spenntabell) as delt:
+        with concurrent.futures.ProcessPoolExecutor(
+                initializer=koble_til, initargs=(delt.beskrivelse,)) as pool:
+            ...
+"""
+from __future__ import unicode_literals
+import os
+from multiprocessing import shared_memory
+import numpy
+import mast as module_mast
+
+# Antall verdier i nøkkelen for et spenn: E, A, G_0, alpha, s30, s70, a_mid, L
+SPENNLENGDE = 8
+
+# Delt minne som gjeldende prosess er koblet til, beholdes til prosessen avsluttes
+_tilkoblinger = []
+
+
+class Deltminne(object):
+    """Klasse for mastekatalog og spenntabell publisert i delt minne."""
+
+    def __init__(self, sti="data/masts.csv", spenntabell=None):
+        """Initialiserer :class:`Deltminne`-objekt og publiserer dataene.
+
+        :param str sti: Sti til mastekatalog (.csv)
+        :param dict spenntabell: Ferdig beregnet spenntabell, se
+         :func:`system.hent_system`
+        """
+        rader = module_mast.hent_katalog(sti)
+        kolonner = []
+        for rad in rader:
+            kolonner.extend([k for k in rad if k not in kolonner and k not in ("navn", "type")])
+        katalog = numpy.array([[rad.get(k, numpy.nan) for k in kolonner] for rad in rader],
+                              dtype=float).reshape(len(rader), len(kolonner))
+        tabell = numpy.array([spenn + klima + (H_x,)
+                              for spenn, verdier in (spenntabell or {}).items()
+                              for klima, H_x in verdier.items()],
+                             dtype=float).reshape(-1, SPENNLENGDE + 3)
+        self._minne = [_publiser(katalog), _publiser(tabell)]
+        self.beskrivelse = {
+            "sti": sti, "mtime": os.path.getmtime(sti), "kolonner": kolonner,
+            "navn": [rad["navn"] for rad in rader], "type": [rad["type"] for rad in rader],
+            "katalog": (self._minne[0].name, katalog.shape),
+            "spenntabell": (self._minne[1].name, tabell.shape)}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.lukk()
+
+    def lukk(self):
+        """Lukker og frigir delt minne.
+
+        Prosesser som er koblet til beholder sine data til de avsluttes.
+        """
+        for minne in self._minne:
+            minne.close()
+            minne.unlink()
+        self._minne = []
+
+
+def koble_til(beskrivelse):
+    """Kobler gjeldende prosess til publisert mastekatalog og spenntabell.
+
+    Katalogen legges i bufferen til :func:`mast.hent_katalog`, slik at
+    kildefilen ikke leses så lenge den er uendret.
+
+    :param dict beskrivelse: Beskrivelse fra :attr:`Deltminne.beskrivelse`
+    :return: Katalogens tallkolonner {kolonne: verdier per mast} og spenntabell
+    :rtype: :class:`dict`, :class:`dict`
+    """
+    katalog = _koble_til(*beskrivelse["katalog"])
+    tabell = _koble_til(*beskrivelse["spenntabell"])
+    kolonner = {k: katalog[:, n] for n, k in enumerate(beskrivelse["kolonner"])}
+    rader = []
+    for m, (navn, type) in enumerate(zip(beskrivelse["navn"], beskrivelse["type"])):
+        rad = {"navn": navn, "type": type}
+        rad.update((k, float(v[m])) for k, v in kolonner.items() if not numpy.isnan(v[m]))
+        rader.append(rad)
+    module_mast._katalogbuffer[beskrivelse["sti"]] = (beskrivelse["mtime"], rader)
+    spenntabell = {}
+    for rad in tabell.tolist():
+        klima = spenntabell.setdefault(tuple(rad[:SPENNLENGDE]), {})
+        klima[tuple(rad[SPENNLENGDE:SPENNLENGDE + 2])] = rad[-1]
+    return kolonner, spenntabell
+
+
+def _publiser(data):
+    """Kopierer en matrise til nytt delt minne.
+
+    :param numpy.array data: Matrise med flyttall
+    :return: Delt minne
+    :rtype: :class:`multiprocessing.shared_memory.SharedMemory`
+    """
+    minne = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+    numpy.ndarray(data.shape, dtype=float, buffer=minne.buf)[...] = data
+    return minne
+
+
+def _koble_til(navn, form):
+    """Kobler til delt minne og setter opp matrise uten kopiering.
+
+    :param str navn: Navn på delt minne
+    :param tuple form: Matrisens form
+    :return: Matrise i delt minne (skrivebeskyttet)
+    :rtype: :class:`numpy.array`
+    """
+    minne = shared_memory.SharedMemory(name=navn)
+    _tilkoblinger.append(minne)
+    data = numpy.ndarray(tuple(form), dtype=float, buffer=minne.buf)
+    data.flags.writeable = False
+    return data
@@ -0,0 +1,302 @@
+# -*- coding: utf8 -*-
+"""Skriving og lesing av FUNDAMAST.DAT for overlevering til fundamentberegning.
+
+Hver post inneholder reaksjonskrefter ved masteinnspenning for én mast
+i samme format som eksport fra brukergrensesnittet:
+
+.. code-block:: none
+
+    *** Reaksjonskrefter for B6  (KL_mast, 31.8.2017)
+    Banestrekning 0010 Oslo S, Mast nr. 0, Fundament nr. 0, Prosjektnummer 0
+    *** Systemkonfigurasjon SMS  - FH  - e-mål
+    3.5
+    ...
+
+Postene skrives enten til én fil per mastepunkt med :func:`skriv_filer`
+(én enkelt post med :func:`skriv`),
+eller etter hverandre i én fil med :func:`skriv_strom`. En samlet fil
+får en indeksfil (``.idx``, JSON) med posisjon og lengde i byte for hver
+post, slik at enkeltposter kan leses med :func:`les_post` uten å lese
+hele filen. Tidligere utstedte filer kan sammenliknes med nye
+resultater med :func:`sammenlign` uten ny beregning.
+
+Filene skrives og leses med tegnkoding latin-1.
+"""
+from __future__ import unicode_literals
+import io
+import json
+import os
+import re
+
+# Tegnkoding for FUNDAMAST.DAT
+KODING = "latin-1"
+
+# Krefter i hver post: N [kN], V [kN] og M [kNm] for bruddgrense
+# og bruksgrense 2 (KL) og 3 (totalt)
+KREFTER = ("N_brudd", "V_brudd", "M_brudd",
+           "N_bruk_kl", "V_bruk_kl", "M_bruk_kl",
+           "N_bruk_tot", "V_bruk_tot", "M_bruk_tot")
+
+# Geometri i hver post: SMS, FH og e-mål [m]
+GEOMETRI = ("sms", "fh", "e")
+
+_TITTEL = re.compile(r"^\*\*\* Reaksjonskrefter for (.*)  \(KL_mast, (.*)\)$")
+_INFO = re.compile(r"^Banestrekning (.*), Mast nr\. (.*), "
+                   r"Fundament nr\. (.*), Prosjektnummer (.*)$")
+
+
+class Fundamast(object):
+    """Klasse for å representere én post i FUNDAMAST.DAT."""
+
+    __slots__ = ("navn", "dato", "banestrekning", "mastenr", "fundamentnr", "prosjektnr",
+                 "geometri", "krefter")
+
+    def __init__(self, navn, dato, banestrekning, mastenr, fundamentnr, prosjektnr,
+                 geometri, krefter):
+        """Initialiserer :class:`Fundamast`-objekt.
+
+        :param str navn: Mastenavn
+        :param str dato: Dato for beregningen
+        :param str banestrekning: Banestrekning
+        :param str mastenr: Mastenummer
+        :param str fundamentnr: Fundamentnummer
+        :param str prosjektnr: Prosjektnummer
+        :param tuple geometri: SMS, FH og e-mål :math:`[m]`
+        :param tuple krefter: Krefter i rekkefølgen gitt av :data:`KREFTER`
+        """
+        self.navn = navn
+        self.dato = dato
+        self.banestrekning = str(banestrekning)
+        self.mastenr = str(mastenr)
+        self.fundamentnr = str(fundamentnr)
+        self.prosjektnr = str(prosjektnr)
+        self.geometri = tuple(float(x) for x in geometri)
+        self.krefter = tuple(float(x) for x in krefter)
+
+    def __repr__(self):
+        return "Fundamast({}, {}, mast nr. {})".format(self.navn, self.banestrekning, self.mastenr)
+
+    def __eq__(self, other):
+        return isinstance(other, Fundamast) and all(
+            getattr(self, k) == getattr(other, k) for k in self.__slots__)
+
+    def __ne__(self, other):
+        return not self == other
+
+    @property
+    def nokkel(self):
+        """Banestrekning og mastenummer, identifiserer posten ved sammenlikning."""
+        return self.banestrekning, self.mastenr
+
+
+def krefter(mast):
+    """Henter krefter til FUNDAMAST for en beregnet mast.
+
+    Kreftene er absoluttverdier av normalkraft :math:`N`, skjærkraft
+    :math:`V_z` og moment :math:`M_y` for tilstanden med største
+    moment (bruddgrense) og største forskyvning (bruksgrense KL og totalt).
+
+    :param Mast mast: Mast med sorterte tilstander
+    :return: Krefter i rekkefølgen gitt av :data:`KREFTER`
+    :rtype: :class:`tuple`
+    """
+    k = ()
+    for tilstand in (mast.tilstand_My_max, mast.tilstand_Dz_kl_max, mast.tilstand_Dz_tot_max):
+        k += tuple(abs(float(tilstand.K[n])) / 1000 for n in (4, 3, 0))
+    return k
+
+
+def fra_mast(i, mast):
+    """Setter opp post for en beregnet mast.
+
+    Fundamentnummer settes lik prosjektnummer, som ved eksport
+    fra brukergrensesnittet.
+
+    :param Inndata i: Input fra bruker
+    :param Mast mast: Mast med sorterte tilstander
+    :return: Post til FUNDAMAST.DAT
+    :rtype: :class:`Fundamast`
+    """
+    # Hvor finnes fundamentnr.?
+    return Fundamast(mast.navn, i.dato, i.banestrekning, i.mastenr, i.prosjektnr,
+                     i.prosjektnr, (i.sms, i.fh, i.e), krefter(mast))
+
+
+def fra_strekning(strekning, bjelkemast=False):
+    """Setter opp poster for anbefalte master på en strekning.
+
+    Mastepunkter uten anbefalt mast av gitt type utelates.
+
+    :param Strekning strekning: Strekning, beregnes dersom nødvendig
+    :param bool bjelkemast: ``True`` for anbefalt bjelkemast, ellers gittermast
+    :return: Poster til FUNDAMAST.DAT
+    :rtype: :class:`list`
+    """
+    poster = []
+    for n, anbefalt in enumerate(strekning.beregn()):
+        mast = anbefalt[1] if bjelkemast else anbefalt[0]
+        if mast is not None:
+            poster.append(fra_mast(strekning.inndata(n), mast))
+    return poster
+
+
+def formater(post):
+    """Formaterer én post.
+
+    :param Fundamast post: Post til FUNDAMAST.DAT
+    :return: Postens tekst
+    :rtype: :class:`str`
+    """
+    s = "*** Reaksjonskrefter for {}  (KL_mast, {})\n".format(post.navn, post.dato)
+    s += "Banestrekning {}, Mast nr. {}, Fundament nr. {}, Prosjektnummer {}\n".format(
+        post.banestrekning, post.mastenr, post.fundamentnr, post.prosjektnr)
+    s += "*** Systemkonfigurasjon SMS  - FH  - e-mål\n"
+    s += "".join("{:.1f}\n".format(x) for x in post.geometri)
+    for n, tittel in enumerate(("Bruddgrense   ", "Bruksgrense 2 ", "Bruksgrense 3 ")):
+        s += "*** {} N (kN) - V (kN) - M (kNm)\n".format(tittel)
+        s += "".join("{:.1f}\n".format(x) for x in post.krefter[3 * n:3 * n + 3])
+    return s
+
+
+def tolk(tekst):
+    """Tolker én post.
+
+    :param str tekst: Postens tekst
+    :return: Post fra FUNDAMAST.DAT
+    :rtype: :class:`Fundamast`
+    :raises ValueError: Dersom teksten ikke er en gyldig post
+    """
+    linjer = [linje.rstrip("\r") for linje in tekst.strip("\r\n").split("\n")]
+    tittel = _TITTEL.match(linjer[0])
+    info = _INFO.match(linjer[1]) if len(linjer) > 1 else None
+    if tittel is None or info is None or not len(linjer) == 18:
+        raise ValueError("Ugyldig post i FUNDAMAST.DAT: {}".format(linjer[0]))
+    verdier = [float(linjer[n]) for n in (3, 4, 5, 7, 8, 9, 11, 12, 13, 15, 16, 17)]
+    return Fundamast(tittel.group(1), tittel.group(2), *info.groups(),
+                     geometri=verdier[0:3], krefter=verdier[3:])
+
+
+def skriv(post, sti):
+    """Skriver én post til fil.
+
+    :param Fundamast post: Post til FUNDAMAST.DAT
+    :param str sti: Sti til fil
+    """
+    with io.open(sti, "w", encoding=KODING, newline="") as fil:
+        fil.write(formater(post))
+
+
+def skriv_filer(poster, mappe, filnavn="{mastenr}_FUNDAMAST.DAT"):
+    """Skriver én fil per post.
+
+    :param list poster: Poster til FUNDAMAST.DAT
+    :param str mappe: Mappe filene skrives til
+    :param str filnavn: Mal for filnavn med postens attributter, f.eks. ``{mastenr}``
+    :return: Stier til skrevne filer
+    :rtype: :class:`list`
+    :raises ValueError: Dersom to poster gir samme filnavn
+    """
+    stier = [os.path.join(mappe, filnavn.format(**{k: getattr(post, k) for k in post.__slots__}))
+             for post in poster]
+    if not len(set(stier)) == len(stier):
+        raise ValueError("Filnavnet {} er ikke entydig for postene.".format(filnavn))
+    for sti, post in zip(stier, poster):
+        skriv(post, sti)
+    return stier
+
+
+def skriv_strom(poster, sti, bufferstorrelse=2 ** 20):
+    """Skriver poster etter hverandre til én fil med indeks.
+
+    Indeksen skrives til ``sti + ".idx"`` og inneholder posisjon og
+    lengde i byte for hver post, i samme rekkefølge som postene.
+
+    :param list poster: Poster til FUNDAMAST.DAT
+    :param str sti: Sti til fil
+    :param int bufferstorrelse: Størrelse på skrivebuffer i byte
+    :return: Indeks med banestrekning, mastenummer, posisjon og lengde for hver post
+    :rtype: :class:`list`
+    """
+    indeks, posisjon = [], 0
+    with io.open(sti, "wb", buffering=bufferstorrelse) as fil:
+        for post in poster:
+            data = formater(post).encode(KODING)
+            fil.write(data)
+            indeks.append([post.banestrekning, post.mastenr, posisjon, len(data)])
+            posisjon += len(data)
+    with io.open(sti + ".idx", "w", encoding="utf-8") as fil:
+        json.dump(indeks, fil)
+    return indeks
+
+
+def les_indeks(sti):
+    """Leser indeks for en samlet fil, se :func:`skriv_strom`.
+
+    :param str sti: Sti til samlet fil
+    :return: Posisjon og lengde i byte per (banestrekning, mastenummer)
+    :rtype: :class:`dict`
+    """
+    with io.open(sti + ".idx", encoding="utf-8") as fil:
+        return {(banestrekning, mastenr): (posisjon, lengde)
+                for banestrekning, mastenr, posisjon, lengde in json.load(fil)}
+
+
+def les_post(sti, banestrekning, mastenr, indeks=None):
+    """Leser én post fra en samlet fil ved hjelp av indeksen.
+
+    :param str sti: Sti til samlet fil
+    :param str banestrekning: Banestrekning
+    :param str mastenr: Mastenummer
+    :param dict indeks: Indeks fra :func:`les_indeks`, leses dersom ikke gitt
+    :return: Post fra FUNDAMAST.DAT
+    :rtype: :class:`Fundamast`
+    """
+    if indeks is None:
+        indeks = les_indeks(sti)
+    posisjon, lengde = indeks[(str(banestrekning), str(mastenr))]
+    with io.open(sti, "rb") as fil:
+        fil.seek(posisjon)
+        return tolk(fil.read(lengde).decode(KODING))
+
+
+def les(sti):
+    """Leser samtlige poster fra en fil med én eller flere poster.
+
+    :param str sti: Sti til fil
+    :return: Poster fra FUNDAMAST.DAT
+    :rtype: :class:`list`
+    """
+    with io.open(sti, encoding=KODING, newline="") as fil:
+        tekst = fil.read()
+    deler = re.split(r"(?m)^(?=\*\*\* Reaksjonskrefter for )", tekst)
+    return [tolk(post) for post in deler if post.strip()]
+
+
+def sammenlign(gamle, nye, toleranse=0.0):
+    """Sammenlikner tidligere utstedte poster med nye.
+
+    Poster identifiseres med banestrekning og mastenummer. Verdier
+    sammenliknes slik de står i filen, dvs. avrundet til én desimal.
+
+    :param list gamle: Tidligere utstedte poster, f.eks. fra :func:`les`
+    :param list nye: Nye poster
+    :param float toleranse: Største avvik som ikke regnes som endring
+    :return: Nøkler for nye og fjernede poster, samt endrede poster
+     med (felt, gammel verdi, ny verdi) for hvert endret felt
+    :rtype: :class:`dict`
+    """
+    gamle = {post.nokkel: post for post in gamle}
+    nye = {post.nokkel: post for post in nye}
+    endret = {}
+    for nokkel in sorted(set(gamle) & set(nye)):
+        gammel, ny = gamle[nokkel], nye[nokkel]
+        felt = [("navn", gammel.navn, ny.navn)] if not gammel.navn == ny.navn else []
+        for navn, a, b in zip(GEOMETRI + KREFTER, gammel.geometri + gammel.krefter,
+                              ny.geometri + ny.krefter):
+            if abs(round(a, 1) - round(b, 1)) > toleranse + 1e-9:
+                felt.append((navn, a, b))
+        if felt:
+            endret[nokkel] = felt
+    return {"nye": sorted(set(nye) - set(gamle)),
+            "fjernet": sorted(set(gamle) - set(nye)),
+            "endret": endret}
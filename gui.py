@@ -7,6 +7,8 @@ import math
 from collections import OrderedDict
 from datetime import date
 import main
+import beregning
+import fundamast
 import numpy
 import hjelpefunksjoner
 from tkinter import filedialog
@@ -825,57 +827,18 @@ class Hovedvindu(tk.Frame):
         """Beregner maksimal tillatt masteavstand grunnet utblåsning av KL."""
 
         systemnavn = self.master.systemnavn.get()
-        systemnavn = systemnavn.split()[1] if systemnavn.startswith("System") else systemnavn
+        if not systemnavn.startswith("System"):
+            systemnavn = "System {}".format(systemnavn)
         radius = self.master.radius.get()
         fh = self.master.fh.get()
         stromavtakerbredde = self.stromavtakerbredde.get()
 
-        B1, B2 = hjelpefunksjoner.beregn_sikksakk(systemnavn, radius)
-        e = hjelpefunksjoner.vindutblasning(systemnavn, radius, fh, stromavtakerbredde)
-
-        masteavstand_grense = 75.0
-
-        if systemnavn == "20A" or systemnavn == "20B":
-            s_kl = 2 * 10000
-            A_ref = (12 + 9)/1000  # [m^2/m]
-        elif systemnavn == "25":
-            s_kl = 2 * 15000
-            A_ref = (13.2 + 10.5)/1000  # [m^2/m]
-        else:  # System 35
-            s_kl = 2 * 7100
-            A_ref = (12 + 9)/1000  # [m^2/m]
-            masteavstand_grense = 60.0
-
-        if self._hoyfjellsgrense.get():
-            v = 37
-        else:
-            v = 30
-        rho = 1.25
-        q_p = 0.5 * rho * v**2
-        c_f = 1.1
-        q = 1.2 * q_p * c_f * A_ref
-
-        B1, B2 = -B1, -B2
-        c1 = 2*e - B1 - B2
-        c2 = 2*e + B1 + B2
-        c3 = B1 - B2
-
-        A = math.sqrt((2*s_kl / (q + s_kl/radius)) * (c2 + math.sqrt((c2**2 - c3**2))))
-        if q - s_kl/radius > 0:
-            B = math.sqrt((2*s_kl / (q - s_kl/radius)) * (c1 + math.sqrt((c1**2 - c3**2))))
-        else:
-            B = A
-
-        masteavstand_max = min(A, B, masteavstand_grense)
+        tabell = hjelpefunksjoner.masteavstand_max_tabell(fh, self._hoyfjellsgrense.get())
+        masteavstand_max = tabell[lister.system_list.index(systemnavn),
+                                  lister.radius_list.index(str(radius)),
+                                  lister.stromavtaker_list.index(stromavtakerbredde)]
         masteavstand_max_avrundet = math.floor(masteavstand_max * 10) / 10
 
-        """
-        print("\nSystemnavn = {}  B1, B2 = {:.2f}, {:.2f}  e = {:.3f}\n  A_ref = {:.3f}  "
-              " q = {:.3f}".format(systemnavn, B1, B2, e, A_ref, q))
-        print("c1 = {:.2f}  c2 = {:.3f}  c3 = {:.3f}".format(c1, c2 ,c3))
-        print("A = {:.3f}  B = {:.3f}\n  masteavstand_max = {:.1f}".format(A, B, masteavstand_max_avrundet))
-        """
-
         self.a1_spinbox.config(state="normal")
         self.a2_spinbox.config(state="normal")
         self.a1_spinbox.config(from_=0.0, to=masteavstand_max_avrundet)
@@ -1999,11 +1962,7 @@ class Resultater(tk.Frame):
         self.masteboks.delete(1.0, "end")
         masteliste = self.M.gittermaster if self.M.gittermast.get() else self.M.bjelkemaster
 
-        anbefalt_mast = None
-        for mast in masteliste:
-            if mast.h_max>=self.M.master.h.get() and mast.tilstand_UR_max.utnyttelsesgrad<=1.0:
-                anbefalt_mast = mast
-                break
+        anbefalt_mast = beregning.velg_anbefalt(masteliste, self.M.master.h.get())
 
         s = "\n"
         if anbefalt_mast:
@@ -2079,34 +2038,13 @@ class Resultater(tk.Frame):
                 mast = m
                 break
 
-        s = "*** Reaksjonskrefter for {}  (KL_mast, {})\n".format(mast.navn, self.M.i.dato)
-        s += "Banestrekning {}, Mast nr. {}, ".format(self.M.master.banestrekning.get(),
-                                                      self.M.master.mastenr.get())
-        # Hvor finnes fundamentnr.?
-        s += "Fundament nr. {}, Prosjektnummer {}\n".format(self.M.master.prosjektnr.get(),
-                                                      self.M.master.prosjektnr.get())
-        s += "*** Systemkonfigurasjon SMS  - FH  - e-mål\n"
-        s += "{:.1f}\n{:.1f}\n{:.1f}\n".format(self.M.master.sms.get(),
-                                               self.M.master.fh.get(),
-                                               self.M.master.e.get())
-        s += "*** Bruddgrense    N (kN) - V (kN) - M (kNm)\n"
-        s += "{:.1f}\n{:.1f}\n{:.1f}\n".format(abs(mast.tilstand_My_max.K[4] / 1000),
-                                               abs(mast.tilstand_My_max.K[3] / 1000),
-                                               abs(mast.tilstand_My_max.K[0] / 1000))
-        s += "*** Bruksgrense 2  N (kN) - V (kN) - M (kNm)\n"
-        s += "{:.1f}\n{:.1f}\n{:.1f}\n".format(abs(mast.tilstand_Dz_kl_max.K[4] / 1000),
-                                               abs(mast.tilstand_Dz_kl_max.K[3] / 1000),
-                                               abs(mast.tilstand_Dz_kl_max.K[0] / 1000))
-        s += "*** Bruksgrense 3  N (kN) - V (kN) - M (kNm)\n"
-        s += "{:.1f}\n{:.1f}\n{:.1f}\n".format(abs(mast.tilstand_Dz_tot_max.K[4] / 1000),
-                                               abs(mast.tilstand_Dz_tot_max.K[3] / 1000),
-                                               abs(mast.tilstand_Dz_tot_max.K[0] / 1000))
         filename = filedialog.asksaveasfilename(
             parent=self, title="Lagre som...",
             initialfile="FUNDAMAST.DAT",
             filetypes=[("Fundamast", "*.dat"), ("All files", "*")])
-        with open(filename, "w+") as fil:
-            fil.write(s)
+        if not filename:
+            return
+        fundamast.skriv(fundamast.fra_mast(self.M.i, mast), filename)
 
         self.eksporter_btn.config(text="Eksport av {}-mast fullført".format(mast.navn), font=plain)
 
@@ -2246,7 +2184,7 @@ class Bidrag(tk.Frame):
 
         f = j.f
 
-        if not numpy.count_nonzero(j.q) == 0:
+        if j.fordelt:
             f = numpy.array([j.q[0] * j.b, j.q[1] * j.b, j.q[2] * j.b])
 
         # Sorterer bidrag til reaksjonskrefter
@@ -2255,7 +2193,7 @@ class Bidrag(tk.Frame):
         R[j.type[1], j.type[0], 2] = f[0] * (-j.e[1]) + f[1] * j.e[0]
         R[j.type[1], j.type[0], 3] = f[2]
         R[j.type[1], j.type[0], 4] = f[0]
-        if j.navn.startswith("Sidekraft: KL"):
+        if j.kl_sidekraft:
             R[j.type[1], j.type[0], 5] = f[1] * (-j.e[2]) + f[2] * j.e[1]
         else:
             sign = 1 if sign == 0 else sign
@@ -2317,11 +2255,7 @@ class Tabell(tk.Frame):
         self.tabellboks.delete(1.0, "end")
         masteliste = self.M.gittermaster if self.M.gittermast.get() else self.M.bjelkemaster
 
-        anbefalt_mast = None
-        for m in masteliste:
-            if m.h_max >= self.M.master.h.get() and m.tilstand_UR_max.utnyttelsesgrad <= 1.0:
-                anbefalt_mast = m
-                break
+        anbefalt_mast = beregning.velg_anbefalt(masteliste, self.M.master.h.get())
 
         kolonnebredde = 52
 
@@ -2363,7 +2297,7 @@ class Tabell(tk.Frame):
         s += "Mastehøyde [m]".ljust(kolonnebredde) + "{}\n".format(self.M.i.h)
         s += "Masteavstand (forrige mast) [m]".ljust(kolonnebredde) + "{}\n".format(self.M.i.a1)
         s += "Masteavstand (neste mast) [m]".ljust(kolonnebredde) + "{}\n".format(self.M.i.a2)
-        s += "Kurveradius [m]".ljust(kolonnebredde) + "{}\n".format(self.M.i.radius)
+        s += "Kurveradius [m]".ljust(kolonnebredde) + "{:g}\n".format(self.M.i.radius)
         s += "\n"
 
         s += "Mastefunksjoner\n"
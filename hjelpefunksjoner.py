@@ -3,14 +3,35 @@
 
 from __future__ import unicode_literals
 import math
+import numpy
 import lister
 
+# Buffer for tabeller fra masteavstand_max_tabell, {(fh, hoyfjellsgrense): tabell}
+_masteavstandstabeller = {}
+
+# Tabeller i :mod:`lister` for overhøyde og sikksakk per system
+_OVERHOYDE = {"20A": "D_20A", "20B": "D_20B_35", "25": "D_25", "35": "D_20B_35"}
+_SIKKSAKK = {"20A": "sikksakk_20", "20B": "sikksakk_20", "25": "sikksakk_25",
+             "35": "sikksakk_35"}
+
+# Tabellenes kurveradier i stigende rekkefølge [m]
+_RADIER = numpy.array([float(r) for r in lister.radius_list])
+
+# Buffer for tabeller fra _radiustabell, {navn: verdier per radius}
+_radiustabeller = {}
+
 
 def vindkasthastighetstrykk(v_b_0, c_dir, c_season, c_alt, c_prob, C_0, terrengkategori, z):
     """Beregner dimensjonerende vindkasthastighetstrykk.
 
     Basert på NS-EN 1991-1-4 seksjon 4, inkl. nasjonalt tillegg.
 
+    Argumentene kan også gis som ``numpy.array``-objekter, som
+    kringkastes mot hverandre. Verdier for mange steder og høyder
+    beregnes f.eks. med stedsvise parametre av form ``(n, 1)`` og
+    høyder ``z`` av form ``(m,)``. Samtlige returverdier er da
+    ``numpy.array``-objekter av kringkastet form.
+
     :param float v_b_0: Referansevindhastighet for aktuell kommune :math:`[\\frac{m}{s}]`
     :param float c_dir: Retningsfaktor
     :param float c_season: Årstidsfaktor
@@ -28,35 +49,31 @@ def vindkasthastighetstrykk(v_b_0, c_dir, c_season, c_alt, c_prob, C_0, terrengk
     :rtype: :class:`float`, :class:`float`, :class:`float`, :class:`float`,
      :class:`float`, :class:`float`, :class:`float`
     """
+    v_b_0, c_dir, c_season, c_alt, c_prob, C_0, terrengkategori, z = numpy.broadcast_arrays(
+        *[numpy.asarray(a) for a in (v_b_0, c_dir, c_season, c_alt, c_prob, C_0,
+                                     terrengkategori, z)])
     # Basisvindhastighet [m/s]
     v_b = c_dir * c_season * c_alt * c_prob * v_b_0
-    k_r = lister.terrengkategorier[terrengkategori]["k_r"]
-    z_0 = lister.terrengkategorier[terrengkategori]["z_0"]
-    z_min = lister.terrengkategorier[terrengkategori]["z_min"]
+    k_r, z_0, z_min = _oppslag(_terrengparametre, terrengkategori)
     z_max = 200
-    if z > z_max:
-        z = z_max
-    if z <= z_min:
-        c_r = k_r * math.log(z_min / z_0)
-    else:
-        c_r = k_r * math.log(z / z_0)
+    z = numpy.minimum(z, z_max)
+    # Høyden begrenses nedad til z_min
+    ln_z = numpy.log(numpy.maximum(z, z_min) / z_0)
+    c_r = k_r * ln_z
     # Stedets middelvindhastighet [m/s]
     v_m = c_r * C_0 * v_b
     # Stedets vindhastighetstrykk [N/m^2]
     rho = 1.25                  # [kg/m^3] Luftens densitet
     q_m = 0.5 * rho * v_m**2    # [N / m^2]
     # Turbulensintensiteten
-    k_l = 1.0  # Turbulensintensiteten, anbefalt verdi er 1.0
+    k_l = numpy.full(v_b.shape, 1.0)  # Turbulensintensiteten, anbefalt verdi er 1.0
     k_p = 3.5
-    if z <= z_min:
-        I_v = k_l / (C_0 * math.log(z_min / z_0))
-    else:
-        I_v = k_l / (C_0 * math.log(z / z_0))
+    I_v = k_l / (C_0 * ln_z)
     # Vindkasthastigheten
-    v_p = v_m * math.sqrt(1 + 2 * k_p * I_v)
+    v_p = v_m * numpy.sqrt(1 + 2 * k_p * I_v)
     # Vindkasthastighetstrykket
     q_p = q_m * (1 + 2 * k_p * I_v)  # [N/m^2]
-    return q_p, v_b, v_m, v_p, q_m, I_v, k_l
+    return tuple(_skalar(v) for v in (q_p, v_b, v_m, v_p, q_m, I_v, k_l))
 
 
 def c_alt(v_b_0, region, H):
@@ -64,6 +81,9 @@ def c_alt(v_b_0, region, H):
 
     Basert på NS-EN 1991-1-4 nasjonalt tillegg NA.4.2(2)P (901.1).
 
+    Argumentene kan også gis som ``numpy.array``-objekter, som
+    kringkastes mot hverandre. Det returneres da et ``numpy.array``.
+
     :param float v_b_0: Referansevindhastighet for aktuell kommune :math:`[\\frac{m}{s}]`
     :param str region: Aktuell region
     :param int H: Høyde over havet for aktuelt byggested :math:`[m]`
@@ -71,38 +91,68 @@ def c_alt(v_b_0, region, H):
     :rtype: :class:`float`
     """
     v_0 = 30
-    if v_b_0<v_0:
-        H_0 = lister.regioner[region]["H_0"]
-        H_topp = lister.regioner[region]["H_topp"]
-        return 1.0 + (v_0 - v_b_0) * (H - H_0) / (v_b_0 * (H_topp - H_0))
-    else:
-        return 1.0
+    v_b_0 = numpy.asarray(v_b_0, dtype=float)
+    H_0, H_topp = _oppslag(_regionparametre, region)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        c = 1.0 + (v_0 - v_b_0) * (H - H_0) / (v_b_0 * (H_topp - H_0))
+    return _skalar(numpy.where(v_b_0 < v_0, c, 1.0))
+
+
+def _terrengparametre(terrengkategori):
+    """Henter ``k_r``, ``z_0`` og ``z_min`` for én terrengkategori."""
+    kategori = lister.terrengkategorier[int(terrengkategori)]
+    return kategori["k_r"], kategori["z_0"], kategori["z_min"]
+
+
+def _regionparametre(region):
+    """Henter ``H_0`` og ``H_topp`` for én region."""
+    return lister.regioner[region]["H_0"], lister.regioner[region]["H_topp"]
 
 
 def beregn_sikksakk(systemnavn, radius):
-    """Beregner sikksakk og største tillat utblåsning av KL.
+    """Henter sikksakkverdier for kontaktledningen.
+
+    Verdiene hentes for nærmeste tabulerte kurveradius som er mindre
+    enn eller lik ``radius``, se :func:`_kurveradius`. Argumentene kan
+    også gis som ``numpy.array``-objekter, som kringkastes mot hverandre.
 
     :param str systemnavn: Systemets navn
-    :param int radius: Sporkurvaturens radius :math:`[m]`
-    :return: Sikksakkverdier ``B1`` og ``B1`` :math:`[m]`
+    :param float radius: Sporkurvaturens radius :math:`[m]`
+    :return: Sikksakkverdier ``B1`` og ``B2`` :math:`[m]`
     :rtype: :class:`float`, :class:`float`
+    :raises ValueError: Dersom radius er ugyldig
     """
-    r = radius
-    # Systemavhengige sikksakk-verdier til input i største masteavstand.
-    # struktur i sikksakk-ordbøker under: { "radius": [B1, B2] } i [m]
-    # største tillatt utblåsning e_max i [m], bestemmes i indre if-setning.
-    if systemnavn == "20A" or systemnavn == "20B":
-        sikksakk = lister.sikksakk_20
-    elif systemnavn == "25":
-        sikksakk = lister.sikksakk_25
-    else:  # System 35
-        sikksakk = lister.sikksakk_35
-    B1 = 0
-    B2 = 0
-    if str(r) in sikksakk:
-        B1 = sikksakk[str(r)][0]
-        B2 = sikksakk[str(r)][1]
-    return B1, B2
+    systemnavn, r = numpy.broadcast_arrays(numpy.asarray(systemnavn), _kurveradius(radius))
+    n = numpy.searchsorted(_RADIER, r, side="right") - 1
+    B = numpy.empty(r.shape + (2,))
+    for navn in numpy.unique(systemnavn):
+        maske = systemnavn == navn
+        B[maske] = _radiustabell(_SIKKSAKK.get(str(navn).split()[-1], "sikksakk_35"))[n[maske]]
+    return _skalar(B[..., 0]), _skalar(B[..., 1])
+
+
+def overhoyde(systemnavn, radius):
+    """Henter overhøyde :math:`D` for sporet.
+
+    Overhøyden interpoleres lineært i krumningen :math:`\\frac{1}{R}`
+    mellom tabulerte kurveradier, slik at tabellens verdier gjenskapes
+    for tabulerte radier. For radier større enn største tabulerte
+    radius benyttes verdien for rettlinjet spor. Argumentene kan også
+    gis som ``numpy.array``-objekter, som kringkastes mot hverandre.
+
+    :param str systemnavn: Systemets navn
+    :param float radius: Sporkurvaturens radius :math:`[m]`
+    :return: Overhøyde :math:`[m]`
+    :rtype: :class:`float`
+    :raises ValueError: Dersom radius er ugyldig
+    """
+    systemnavn, r = numpy.broadcast_arrays(numpy.asarray(systemnavn), _kurveradius(radius))
+    D = numpy.empty(r.shape)
+    for navn in numpy.unique(systemnavn):
+        maske = systemnavn == navn
+        verdier = _radiustabell(_OVERHOYDE.get(str(navn).split()[-1], "D_20B_35"))
+        D[maske] = numpy.interp(1 / r[maske], 1 / _RADIER[::-1], verdier[::-1])
+    return _skalar(D)
 
 
 def vindutblasning(systemnavn, radius, fh, stromavtakerbredde, v_egendefinert=None):
@@ -110,47 +160,26 @@ def vindutblasning(systemnavn, radius, fh, stromavtakerbredde, v_egendefinert=No
 
     Verdien beregnes i henhold til EN 50367 kapittel 5.2.5.3.
 
+    Argumentene kan også gis som ``numpy.array``-objekter, som
+    kringkastes mot hverandre. Det returneres da et ``numpy.array``.
+
     :param str systemnavn: Valgt system
-    :param int radius: Sporkurvaturens radius :math:`[m]`
+    :param float radius: Sporkurvaturens radius :math:`[m]`
     :param int fh: Kontakttrådhøyde :math:`[m]`
     :param str stromavtakerbredde: Bredde av valgt strømavtaker
     :param int v_egendefinert: Overstyrer automatisk kjørehastighet :math:`[\\frac{m}{s}]`
     :return: Maksimal tillatt vindutblåsning :math:`[m]`
     :rtype: :class:`float`
     """
-    R = radius
-    h_nom = fh
-    if systemnavn=="20A":
-        S_OCL = 20000
-        v = 200
-        D = lister.D_20A[str(R)]
-    elif systemnavn == "20B":
-        S_OCL = 20000
-        v = 160
-        D = lister.D_20B_35[str(R)]
-    elif systemnavn=="25":
-        S_OCL = 30000
-        v = 250
-        D = lister.D_25[str(R)]
-    else:  # System 35
-        S_OCL = 14126
-        v = 150
-        D = lister.D_20B_35[str(R)]
+    S_OCL, v, b_v, b_w, b_wc, alpha = _oppslag(
+        _utblasningsparametre, systemnavn, stromavtakerbredde)
+    D = overhoyde(systemnavn, radius)
+    R = numpy.asarray(radius, dtype=float)
+    h_nom = numpy.asarray(fh, dtype=float)
     if v_egendefinert is not None:
-        v = v_egendefinert
-    if v<=200:
-        F_m = 0.00047 * v**2 + 90
-    else:
-        F_m = 0.00097 * v**2 + 70
-    stromavtaker = None
-    for s in lister.stromavtakere:
-        if s["Navn"] == stromavtakerbredde:
-            stromavtaker = s
-            break
-    b_v = stromavtaker["b_v"]
-    b_w = stromavtaker["b_w"]
-    b_wc = stromavtaker["b_wc"]
-    alpha = math.radians(stromavtaker["alpha"])
+        v = numpy.full_like(v, v_egendefinert)
+    F_m = numpy.where(v <= 200, 0.00047 * v**2 + 90, 0.00097 * v**2 + 70)
+    alpha = numpy.radians(alpha)
     d = 1.410
     d_cant = 0.010
     d_inst = 0.030
@@ -193,21 +222,18 @@ def vindutblasning(systemnavn, radius, fh, stromavtakerbredde, v_egendefinert=No
     # Tilleggskast innerside/ytterside av kurver
     s_ia_merket = 2.5/R + (l_max-d)/2
     # Kvasistatisk effekt
-    if D-D_0 >= 0:
-        qs_ia_merket = s_0_merket/L * (D-D_0) * (h_ref-h_c0)
-    else:
-        qs_ia_merket = 0
+    qs_ia_merket = numpy.where(D-D_0 >= 0, s_0_merket/L * (D-D_0) * (h_ref-h_c0), 0)
     # Sideveis bevegelse av kontakttråd grunnet ikke-horisontale
     # deler av straømavtakerens vippeprofil
-    u_p = (L_sp * F_m * math.tan(alpha)) / (4 * S_OCL)
+    u_p = (L_sp * F_m * numpy.tan(alpha)) / (4 * S_OCL)
     # Kontaktledningens toleranser
     sum_T_OCL_2 = d_cant**2 + d_inst**2 + d_mess**2 + d_pole**2 + d_supp**2 + u_p**2
     # Stabilitetsgrense til mekanisk frittromsprofil for strømavtaker (nedre verifikasjonspunkt)
     b_u_mec_merket = b_v + e_pu + s_ia_merket + qs_ia_merket + \
-                     k_merket * math.sqrt(sum_T_Tu_2+sum_T_OCL_2)
+                     k_merket * numpy.sqrt(sum_T_Tu_2+sum_T_OCL_2)
     # Stabilitetsgrense til mekanisk frittromsprofil for strømavtaker (øvre verifikasjonspunkt)
     b_o_mec_merket = b_v + e_po + s_ia_merket + qs_ia_merket + \
-                     k_merket * math.sqrt(sum_T_To_2 + sum_T_OCL_2)
+                     k_merket * numpy.sqrt(sum_T_To_2 + sum_T_OCL_2)
     # Stabilitetsgrense til mekanisk frittromsprofil for samspill mellom
     # strømavtaker og kontakttråd i referansehøyde h_ref
     b_h_mec_merket = b_u_mec_merket + \
@@ -225,5 +251,187 @@ def vindutblasning(systemnavn, radius, fh, stromavtakerbredde, v_egendefinert=No
     # Driftsgrense for tillat sideveis forskyvning av kontakttråd uten trådavsporing
     d_lg = b_w + b_wc - b_h_OCL_merket
     # Tillat sideveis forskyvning av kontakttråd fra spormidt
-    d_l = min([d_lv, d_lg])
-    return d_l
+    d_l = numpy.minimum(d_lv, d_lg)
+    return _skalar(d_l)
+
+
+def beregn_masteavstand_max(systemnavn, radius, fh, stromavtakerbredde, hoyfjellsgrense=False):
+    """Beregner maksimal tillatt masteavstand grunnet utblåsning av KL.
+
+    Argumentene kan også gis som ``numpy.array``-objekter, som
+    kringkastes mot hverandre. Det returneres da et ``numpy.array``.
+    Se også :func:`masteavstand_max_tabell`.
+
+    :param str systemnavn: Systemets navn
+    :param float radius: Sporkurvaturens radius :math:`[m]`
+    :param float fh: Kontakttrådhøyde :math:`[m]`
+    :param str stromavtakerbredde: Bredde av valgt strømavtaker
+    :param Boolean hoyfjellsgrense: Angir om strekningen ligger over høyfjellsgrensen
+    :return: Maksimal tillatt masteavstand :math:`[m]`
+    :rtype: :class:`float`
+    """
+    s_kl, A_ref, masteavstand_grense = _oppslag(_masteavstandsparametre, systemnavn)
+    B1, B2 = beregn_sikksakk(systemnavn, radius)
+    e = vindutblasning(systemnavn, radius, fh, stromavtakerbredde)
+    r = numpy.asarray(radius, dtype=float)
+
+    v = numpy.where(hoyfjellsgrense, 37, 30)
+    rho = 1.25
+    q_p = 0.5 * rho * v**2
+    c_f = 1.1
+    q = 1.2 * q_p * c_f * A_ref
+
+    B1, B2 = -B1, -B2
+    c1 = 2*e - B1 - B2
+    c2 = 2*e + B1 + B2
+    c3 = B1 - B2
+
+    A = numpy.sqrt((2*s_kl / (q + s_kl/r)) * (c2 + numpy.sqrt((c2**2 - c3**2))))
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        B = numpy.sqrt((2*s_kl / (q - s_kl/r)) * (c1 + numpy.sqrt((c1**2 - c3**2))))
+    B = numpy.where(q - s_kl/r > 0, B, A)
+
+    return _skalar(numpy.minimum(numpy.minimum(A, B), masteavstand_grense))
+
+
+def masteavstand_max_tabell(fh, hoyfjellsgrense=False):
+    """Henter tabell med maksimal tillatt masteavstand.
+
+    Tabellen dekker samtlige systemer, kurveradier og strømavtakere
+    i :mod:`lister`, og indekseres ``[system, radius, strømavtaker]``
+    i rekkefølgen gitt av ``lister.system_list``, ``lister.radius_list``
+    og ``lister.stromavtaker_list``. Tabellen beregnes én gang for hver
+    kombinasjon av kontakttrådhøyde og høyfjellsgrense.
+
+    :param float fh: Kontakttrådhøyde :math:`[m]`
+    :param Boolean hoyfjellsgrense: Angir om strekningen ligger over høyfjellsgrensen
+    :return: Maksimal tillatt masteavstand :math:`[m]`
+    :rtype: :class:`numpy.array`
+    """
+    nokkel = (float(fh), bool(hoyfjellsgrense))
+    if nokkel not in _masteavstandstabeller:
+        systemer = numpy.array(lister.system_list)[:, None, None]
+        radier = numpy.array([int(r) for r in lister.radius_list])[None, :, None]
+        stromavtakere = numpy.array(lister.stromavtaker_list)[None, None, :]
+        _masteavstandstabeller[nokkel] = beregn_masteavstand_max(
+            systemer, radier, fh, stromavtakere, hoyfjellsgrense)
+    return _masteavstandstabeller[nokkel]
+
+
+def _utblasningsparametre(systemnavn, stromavtakerbredde):
+    """Henter parametre til :func:`vindutblasning` for ett system.
+
+    :return: Strekk i KL ``S_OCL`` :math:`[N]`, kjørehastighet ``v``
+     :math:`[\\frac{km}{h}]` og strømavtakerens ``b_v``, ``b_w``,
+     ``b_wc`` :math:`[m]` og ``alpha`` :math:`[^{\\circ}]`
+    :rtype: :class:`tuple`
+    """
+    systemnavn = systemnavn.split()[-1]
+    if systemnavn=="20A":
+        S_OCL = 20000
+        v = 200
+    elif systemnavn == "20B":
+        S_OCL = 20000
+        v = 160
+    elif systemnavn=="25":
+        S_OCL = 30000
+        v = 250
+    else:  # System 35
+        S_OCL = 14126
+        v = 150
+    stromavtaker = None
+    for s in lister.stromavtakere:
+        if s["Navn"] == stromavtakerbredde:
+            stromavtaker = s
+            break
+    if stromavtaker is None:
+        raise ValueError("Ugyldig strømavtaker: {}. Gyldige strømavtakere: {}.".format(
+            stromavtakerbredde, ", ".join(lister.stromavtaker_list)))
+    return (S_OCL, v, stromavtaker["b_v"], stromavtaker["b_w"],
+            stromavtaker["b_wc"], stromavtaker["alpha"])
+
+
+def _kurveradius(radius):
+    """Kontrollerer kurveradius for oppslag i tabellene i :mod:`lister`.
+
+    Tabellene gjelder fra minste tabulerte radius. Radier over største
+    tabulerte radius regnes som rettlinjet spor.
+
+    :param float radius: Sporkurvaturens radius :math:`[m]`, eventuelt ``numpy.array``
+    :return: Kurveradius :math:`[m]`
+    :rtype: :class:`numpy.array`
+    :raises ValueError: Dersom radius ikke er et tall eller er mindre
+     enn minste tabulerte radius
+    """
+    try:
+        r = numpy.asarray(radius, dtype=float)
+    except (TypeError, ValueError):
+        r = numpy.asarray(numpy.nan)
+    if not numpy.all(r >= _RADIER[0]):
+        raise ValueError("Ugyldig kurveradius: {}. Kurveradius må være minst {:g} m.".format(
+            radius, _RADIER[0]))
+    return r
+
+
+def _radiustabell(navn):
+    """Henter tabell i :mod:`lister` som verdier sortert etter kurveradius.
+
+    :param str navn: Tabellens navn, f.eks. ``"D_25"``
+    :return: Verdier i rekkefølgen gitt av :data:`_RADIER`
+    :rtype: :class:`numpy.array`
+    """
+    if navn not in _radiustabeller:
+        tabell = getattr(lister, navn)
+        _radiustabeller[navn] = numpy.array([tabell[r] for r in lister.radius_list], dtype=float)
+    return _radiustabeller[navn]
+
+
+def _masteavstandsparametre(systemnavn):
+    """Henter parametre til :func:`beregn_masteavstand_max` for ett system.
+
+    :return: Strekk ``s_kl`` :math:`[N]`, vindareal ``A_ref`` :math:`[\\frac{m^2}{m}]`
+     og øvre grense for masteavstand :math:`[m]`
+    :rtype: :class:`tuple`
+    """
+    systemnavn = systemnavn.split()[-1]
+
+    masteavstand_grense = 75.0
+
+    if systemnavn == "20A" or systemnavn == "20B":
+        s_kl = 2 * 10000
+        A_ref = (12 + 9)/1000  # [m^2/m]
+    elif systemnavn == "25":
+        s_kl = 2 * 15000
+        A_ref = (13.2 + 10.5)/1000  # [m^2/m]
+    else:  # System 35
+        s_kl = 2 * 7100
+        A_ref = (12 + 9)/1000  # [m^2/m]
+        masteavstand_grense = 60.0
+
+    return s_kl, A_ref, masteavstand_grense
+
+
+def _oppslag(funksjon, *argumenter):
+    """Evaluerer ``funksjon`` elementvis over kringkastede argumenter.
+
+    Funksjonen kalles én gang per unike kombinasjon av argumenter.
+
+    :param funksjon: Funksjon av skalare argumenter med tuppel som returverdi
+    :param argumenter: Skalarer eller ``numpy.array``-objekter
+    :return: Ett ``numpy.array`` per element i returverdien
+    :rtype: :class:`list`
+    """
+    argumenter = numpy.broadcast_arrays(*[numpy.asarray(a) for a in argumenter])
+    form = argumenter[0].shape
+    buffer = {}
+    verdier = []
+    for nokkel in zip(*[a.ravel().tolist() for a in argumenter]):
+        if nokkel not in buffer:
+            buffer[nokkel] = funksjon(*nokkel)
+        verdier.append(buffer[nokkel])
+    return [numpy.array(v, dtype=float).reshape(form) for v in zip(*verdier)]
+
+
+def _skalar(verdi):
+    """Returnerer 0-dimensjonale ``numpy.array``-objekter som :class:`float`."""
+    return float(verdi) if numpy.ndim(verdi) == 0 else verdi
@@ -1,5 +1,6 @@
 from __future__ import unicode_literals
 import configparser
+import copy
 
 class Inndata(object):
     """Container-klasse for enkel tilgang til inngangsparametre fra .ini-fil."""
@@ -43,12 +44,13 @@ class Inndata(object):
         self.differansestrekk = cfg.getfloat("Fastavspent", "differansestrekk")
         # System
         self.systemnavn = cfg.get("System", "systemnavn")
-        self.radius = cfg.getint("System", "radius")
+        self.radius = cfg.getfloat("System", "radius")
         self.a1 = cfg.getfloat("System", "a1")
         self.a2 = cfg.getfloat("System", "a2")
         self.delta_h1 = cfg.getfloat("System", "delta_h1")
         self.delta_h2 = cfg.getfloat("System", "delta_h2")
         self.vindkasthastighetstrykk = cfg.getfloat("System", "vindkasthastighetstrykk")
+        self.T_min = cfg.getfloat("System", "T_min", fallback=-40.0)
         # Geometri
         self.h = cfg.getfloat("Geometri", "h")
         self.hfj = cfg.getfloat("Geometri", "hfj")
@@ -65,6 +67,8 @@ class Inndata(object):
         self.traverslengde = cfg.getfloat("Div", "traverslengde")
         self.ec3 = cfg.getboolean("Div", "ec3")
         self.isklasse = cfg.get("Div", "isklasse")
+        # Islast [N/m] som erstatter verdien fra isklassen dersom gitt
+        self.islast = cfg.getfloat("Div", "islast", fallback=None)
         # Brukerdefinert last
         self.brukerdefinert_last = cfg.getboolean("Brukerdefinert last", "brukerdefinert_last")
         self.f_x = cfg.getfloat("Brukerdefinert last", "f_x")
@@ -78,3 +82,17 @@ class Inndata(object):
         # Hjelpevariabler
         self.referansevindhastighet = cfg.getint("Hjelpevariabler", "referansevindhastighet")
         self.kastvindhastighet = cfg.getfloat("Hjelpevariabler", "kastvindhastighet")
+
+    def kopi(self, **endringer):
+        """Returnerer kopi av inndata med gitte endringer.
+
+        :param endringer: Parametre som skal endres, f.eks. ``a1=60.0``
+        :return: Kopi av :class:`Inndata`-objektet
+        :rtype: :class:`Inndata`
+        """
+        i = copy.copy(self)
+        for navn in endringer:
+            if not hasattr(i, navn):
+                raise AttributeError("Ukjent inndataparameter: {}".format(navn))
+            setattr(i, navn, endringer[navn])
+        return i
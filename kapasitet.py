@@ -0,0 +1,37 @@
+# -*- coding: utf8 -*-
+"""Forhåndsberegnet kapasitetsflate for rask kontroll av utnyttelsesgrad.
+
+For gitt mast og mastehøyde er kontrollen i :func:`tilstand.utnyttelsesgrad`
+en fast funksjon av dimensjonerende krefter og momentandelen fra vindlast
+:math:`A`. Reduksjonsfaktorer for knekking, bredde og lokal knekking
+av gurt og diagonal avhenger kun av masten, og beregnes derfor én gang
+med :func:`tilstand.kapasitetsparametre`.
+
+Kapasitetsflaten er ment for screening, optimering og Monte Carlo-
+simulering, der samme mast kontrolleres for svært mange lasttilstander.
+Resultatet er identisk med :func:`tilstand.utnyttelsesgrad`.
+"""
+from __future__ import unicode_literals
+import tilstand
+
+
+class Kapasitetsflate(object):
+    """Klasse for utnyttelsesgrad som funksjon av dimensjonerende krefter for én mast."""
+
+    def __init__(self, mast):
+        """Initialiserer :class:`Kapasitetsflate`-objekt.
+
+        :param Mast mast: Aktuell mast med gitt høyde
+        """
+        self.mast = mast
+        self.parametre = tilstand.kapasitetsparametre(mast)
+
+    def utnyttelsesgrad(self, K, A):
+        """Beregner utnyttelsesgrad for flere sett av dimensjonerende krefter.
+
+        :param numpy.array K: Dimensjonerende reaksjonskrefter [tilstand, kolonne]
+        :param numpy.array A: Momentandel fra vindlast per tilstand
+        :return: Utnyttelsesgrad per tilstand
+        :rtype: :class:`numpy.array`
+        """
+        return tilstand.utnyttelsesgrad(self.mast, K, A, self.parametre)
@@ -0,0 +1,366 @@
+# -*- coding: utf8 -*-
+"""Fordelt beregning av strekninger med koordinator og arbeidere over TCP.
+
+Koordinatoren deler mastepunktene i en :class:`strekning.Strekning`
+i blokker og sender dem til arbeidere som kobler seg til over TCP.
+Arbeiderne kan kjøre på andre maskiner, og startes med
+``python klynge.py --vert <koordinator> --port <port>``.
+
+Meldinger sendes som JSON, én melding per linje:
+
+- Koordinator til arbeider: ``grunnlag`` (felles inndata, sendes én
+  gang per tilkobling), ``oppgave`` (blokk med mastepunkter) og
+  ``ferdig``.
+- Arbeider til koordinator: ``resultat`` (oppsummering per mastepunkt,
+  se :meth:`strekning.Strekning.oppsummering`, og beregningstid) og ``feil``.
+
+Dersom en arbeider kobles fra eller ikke svarer innen
+``tidsavbrudd``, legges blokken tilbake i køen og tildeles en annen
+arbeider. Resultatene samles i mastepunktenes rekkefølge og skrives
+til én .csv-fil.
+
+Dersom en resultatfil for :mod:`resultatlager` er gitt, beregner
+arbeiderne samtlige master og skriver postene for sine mastepunkter
+direkte til filen. Arbeidere på andre maskiner må da ha tilgang til
+filen på samme sti, f.eks. via et delt filsystem.
+
+Blokkene tildeles i synkende rekkefølge etter estimert kostnad, se
+:class:`planlegger.Kostnadsmodell`. Arbeiderne måler beregningstiden
+for hver blokk, og tidene registreres i modellen.
+
+Hver arbeider beholder mastekatalogen og sin egen spenntabell for
+fastavspente ledninger mellom blokkene, se
+:meth:`system.Fastavspent._strekklikevekt`.
+"""
+from __future__ import unicode_literals
+import argparse
+import asyncio
+import csv
+import json
+import multiprocessing
+import socket
+import time
+import beregning
+import inndata
+import mast as module_mast
+import planlegger
+import resultatlager
+import strekning as module_strekning
+
+# Kolonner i resultatfilen
+KOLONNER = ("km", "mastenr", "radius", "a1", "a2", "h",
+            "gittermast", "UR_gittermast", "bjelkemast", "UR_bjelkemast")
+
+# Største tillatte melding [byte]
+_MAKS_MELDING = 2 ** 24
+
+
+class Koordinator(object):
+    """Klasse for å fordele beregning av en strekning på arbeidere."""
+
+    def __init__(self, strekning, blokkstorrelse=50, tidsavbrudd=600.0, total_tidsavbrudd=None,
+                 lager=None, modell=None):
+        """Initialiserer :class:`Koordinator`-objekt.
+
+        :param Strekning strekning: Strekning som skal beregnes
+        :param int blokkstorrelse: Antall mastepunkter per blokk
+        :param float tidsavbrudd: Lengste ventetid på resultat for én blokk :math:`[s]`
+        :param float total_tidsavbrudd: Lengste ventetid på hele strekningen :math:`[s]`,
+         ``None`` gir ingen grense
+        :param str lager: Sti til resultatfil som opprettes med
+         :func:`resultatlager.opprett`, ``None`` gir ingen resultatfil
+        :param Kostnadsmodell modell: Modell for rekkefølgen blokkene tildeles i,
+         ``None`` gir standardvekter
+        """
+        self.strekning = strekning
+        self.lager = lager
+        self.tidsavbrudd = tidsavbrudd
+        self.total_tidsavbrudd = total_tidsavbrudd
+        n = len(strekning)
+        self.blokker = [list(range(start, min(start + blokkstorrelse, n)))
+                        for start in range(0, n, blokkstorrelse)]
+        self.modell = modell if modell is not None else planlegger.Kostnadsmodell()
+        kostnad = [sum(self.modell.estimer(strekning.inndata(m)) for m in blokk)
+                   for blokk in self.blokker]
+        self.rekkefolge = sorted(range(len(self.blokker)), key=lambda k: -kostnad[k])
+        self.resultater = [None] * len(self.blokker)
+        self.tildelinger = 0
+        self._ko = None
+        self._ferdig = None
+        self._feil = None
+        self._server = None
+        self._tilkoblinger = set()
+        if lager is not None:
+            resultatlager.opprett(lager, n, [rad["navn"] for rad in module_mast.hent_katalog()])
+
+    async def start(self, vert="127.0.0.1", port=0):
+        """Starter server som arbeidere kobler seg til.
+
+        :param str vert: Adresse serveren lytter på
+        :param int port: Port serveren lytter på, 0 gir ledig port
+        :return: Faktisk port
+        :rtype: :class:`int`
+        """
+        self._ko = asyncio.Queue()
+        for k in self.rekkefolge:
+            self._ko.put_nowait(k)
+        self._ferdig = asyncio.Event()
+        if not self.blokker:
+            self._ferdig.set()
+        self._server = await asyncio.start_server(
+            self._behandle_arbeider, vert, port, limit=_MAKS_MELDING)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def vent(self):
+        """Venter til samtlige blokker er beregnet, og stopper serveren.
+
+        :return: Oppsummering per mastepunkt i strekningens rekkefølge
+        :rtype: :class:`list`
+        """
+        try:
+            await asyncio.wait_for(self._ferdig.wait(), self.total_tidsavbrudd)
+        except asyncio.TimeoutError:
+            self._feil = "Strekningen ble ikke beregnet innen {} s, {} av {} blokker mangler.".format(
+                self.total_tidsavbrudd, self.resultater.count(None), len(self.resultater))
+        finally:
+            self._server.close()
+            for skriver in list(self._tilkoblinger):
+                await self._avslutt(skriver)
+            await self._server.wait_closed()
+        if self._feil is not None:
+            raise RuntimeError(self._feil)
+        return [rad for blokk in self.resultater for rad in blokk]
+
+    async def _behandle_arbeider(self, leser, skriver):
+        """Tildeler blokker til én arbeider til samtlige blokker er beregnet.
+
+        :param asyncio.StreamReader leser: Innkommende data
+        :param asyncio.StreamWriter skriver: Utgående data
+        """
+        k = None
+        self._tilkoblinger.add(skriver)
+        try:
+            await _send(skriver, {"type": "grunnlag", "inndata": vars(self.strekning.i),
+                                  "Dz_grense": self.strekning.Dz_grense,
+                                  "phi_grense": self.strekning.phi_grense,
+                                  "lager": self.lager})
+            while not self._ferdig.is_set():
+                k = await self._neste_blokk()
+                if k is None:
+                    break
+                self.tildelinger += 1
+                await _send(skriver, {"type": "oppgave", "blokk": k, "indekser": self.blokker[k],
+                                      "punkter": [self.strekning.endringer(n)
+                                                  for n in self.blokker[k]]})
+                linje = await asyncio.wait_for(leser.readline(), self.tidsavbrudd)
+                if not linje:
+                    raise ConnectionError("Arbeider koblet fra.")
+                melding = json.loads(linje.decode("utf-8"))
+                if melding["type"] == "feil":
+                    self._feil = "Blokk {}: {}".format(k, melding["feil"])
+                    self._ferdig.set()
+                    break
+                if self.resultater[k] is None:
+                    self.resultater[k] = melding["rader"]
+                    if "tid" in melding:
+                        self.modell.registrer([self.strekning.inndata(m)
+                                               for m in self.blokker[k]], melding["tid"])
+                k = None
+                if all(r is not None for r in self.resultater):
+                    self._ferdig.set()
+        except (ConnectionError, asyncio.TimeoutError, ValueError, KeyError):
+            self._tilkoblinger.discard(skriver)
+        finally:
+            if k is not None and self.resultater[k] is None:
+                self._ko.put_nowait(k)
+            await self._avslutt(skriver)
+
+    async def _avslutt(self, skriver):
+        """Sender ``ferdig`` til en arbeider og lukker tilkoblingen.
+
+        Meldingen sendes kun dersom tilkoblingen fortsatt er åpen.
+
+        :param asyncio.StreamWriter skriver: Utgående data
+        """
+        if skriver in self._tilkoblinger:
+            self._tilkoblinger.discard(skriver)
+            try:
+                await _send(skriver, {"type": "ferdig"})
+            except ConnectionError:
+                pass
+        skriver.close()
+        try:
+            await skriver.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def _neste_blokk(self):
+        """Henter neste blokk fra køen.
+
+        :return: Blokkens indeks, ``None`` dersom samtlige blokker er beregnet
+        :rtype: :class:`int`
+        """
+        henting = asyncio.ensure_future(self._ko.get())
+        ferdig = asyncio.ensure_future(self._ferdig.wait())
+        await asyncio.wait([henting, ferdig], return_when=asyncio.FIRST_COMPLETED)
+        if henting.done():
+            ferdig.cancel()
+            return henting.result()
+        henting.cancel()
+        return None
+
+
+def koordiner(strekning, sti, blokkstorrelse=50, vert="127.0.0.1", port=0,
+              tidsavbrudd=600.0, total_tidsavbrudd=None, lokale_arbeidere=0, lager=None,
+              modell=None):
+    """Beregner en strekning fordelt på arbeidere og skriver resultatet til .csv-fil.
+
+    :param Strekning strekning: Strekning som skal beregnes
+    :param str sti: Sti til resultatfil (.csv)
+    :param int blokkstorrelse: Antall mastepunkter per blokk
+    :param str vert: Adresse koordinatoren lytter på
+    :param int port: Port koordinatoren lytter på, 0 gir ledig port
+    :param float tidsavbrudd: Lengste ventetid på resultat for én blokk :math:`[s]`
+    :param float total_tidsavbrudd: Lengste ventetid på hele strekningen :math:`[s]`
+    :param int lokale_arbeidere: Antall arbeidere som startes på denne maskinen
+    :param str lager: Sti til resultatfil, se :mod:`resultatlager`
+    :param Kostnadsmodell modell: Modell for rekkefølgen blokkene tildeles i
+    :return: Oppsummering per mastepunkt i strekningens rekkefølge
+    :rtype: :class:`list`
+    """
+    koordinator = Koordinator(strekning, blokkstorrelse, tidsavbrudd, total_tidsavbrudd, lager,
+                              modell)
+    prosesser = []
+
+    async def kjor():
+        faktisk_port = await koordinator.start(vert, port)
+        print("Koordinator lytter på {}:{}".format(vert, faktisk_port))
+        for n in range(lokale_arbeidere):
+            prosess = multiprocessing.Process(target=arbeider, args=(vert, faktisk_port))
+            prosess.start()
+            prosesser.append(prosess)
+        return await koordinator.vent()
+
+    try:
+        rader = asyncio.run(kjor())
+    finally:
+        for prosess in prosesser:
+            prosess.join(10)
+            if prosess.is_alive():
+                prosess.terminate()
+    skriv_resultater(sti, rader)
+    return rader
+
+
+def skriv_resultater(sti, rader):
+    """Skriver oppsummering per mastepunkt til .csv-fil.
+
+    :param str sti: Sti til resultatfil (.csv)
+    :param list rader: Oppsummering per mastepunkt
+    """
+    with open(sti, "w", newline="") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=KOLONNER)
+        writer.writeheader()
+        for rad in rader:
+            writer.writerow({k: ("" if rad[k] is None else rad[k]) for k in KOLONNER})
+
+
+def arbeider(vert, port, ini="input.ini"):
+    """Kobler til koordinator og beregner tildelte blokker til koordinatoren er ferdig.
+
+    :param str vert: Koordinatorens adresse
+    :param int port: Koordinatorens port
+    :param str ini: .ini-fil som mal for inndata
+    """
+    mal = inndata.Inndata(ini)
+    module_mast.hent_katalog()
+    with socket.create_connection((vert, port)) as tilkobling:
+        fil = tilkobling.makefile("rwb")
+        _arbeid(fil, mal)
+
+
+def _arbeid(fil, mal):
+    """Mottar og beregner blokker til koordinatoren er ferdig eller kobler fra.
+
+    :param fil: Tilkobling til koordinatoren som binær fil
+    :param Inndata mal: Mal for inndata
+    """
+    spenntabell = {}
+    i, Dz_grense, phi_grense, lager = None, None, None, None
+    try:
+        for linje in fil:
+            melding = json.loads(linje.decode("utf-8"))
+            if melding["type"] == "ferdig":
+                break
+            if melding["type"] == "grunnlag":
+                i = mal.kopi(**melding["inndata"])
+                Dz_grense, phi_grense = melding["Dz_grense"], melding["phi_grense"]
+                if melding.get("lager") is not None:
+                    lager = resultatlager.Resultatlager(melding["lager"], "r+")
+                continue
+            try:
+                start = time.perf_counter()
+                svar = {"type": "resultat", "blokk": melding["blokk"],
+                        "rader": _beregn_blokk(i, melding["punkter"], spenntabell,
+                                               Dz_grense, phi_grense, lager,
+                                               melding.get("indekser")),
+                        "tid": time.perf_counter() - start}
+            except Exception as feil:
+                svar = {"type": "feil", "blokk": melding["blokk"],
+                        "feil": "{}: {}".format(type(feil).__name__, feil)}
+            fil.write(json.dumps(svar).encode("utf-8") + b"\n")
+            fil.flush()
+    except ConnectionError:
+        pass
+
+
+def _beregn_blokk(i, punkter, spenntabell, Dz_grense, phi_grense, lager=None, indekser=None):
+    """Beregner anbefalte master for en blokk med mastepunkter.
+
+    Med resultatfil beregnes samtlige master, og postene skrives
+    til filen før oppsummeringen returneres.
+
+    :param Inndata i: Felles inndata for strekningen
+    :param list punkter: Endringer i inndata per mastepunkt
+    :param dict spenntabell: Spenntabell som beholdes mellom blokkene
+    :param float Dz_grense: Største tillatte forskyvning :math:`D_z` (KL) :math:`[mm]`
+    :param float phi_grense: Største tillatte torsjonsvinkel :math:`\\phi` (KL) :math:`[^{\\circ}]`
+    :param Resultatlager lager: Resultatfil, ``None`` gir ingen resultatfil
+    :param list indekser: Mastepunktenes indeks i strekningen
+    :return: Oppsummering per mastepunkt
+    :rtype: :class:`list`
+    """
+    rader = []
+    for n, endringer in enumerate(punkter):
+        i_n = i.kopi(**endringer)
+        if lager is None:
+            gittermast, bjelkemast, forkastet = beregning.anbefal(
+                i_n, Dz_grense, phi_grense, spenntabell)
+        else:
+            master = beregning.beregn(i_n, spenntabell)
+            for mast in master:
+                mast.sorter_grenseverdier()
+            gittermast, bjelkemast = lager.skriv(indekser[n], i_n, master, Dz_grense, phi_grense)
+        rader.append(module_strekning._oppsummering(i_n, gittermast, bjelkemast))
+    if lager is not None:
+        lager.flush()
+    return rader
+
+
+async def _send(skriver, melding):
+    """Sender én melding.
+
+    :param asyncio.StreamWriter skriver: Utgående data
+    :param dict melding: Melding
+    """
+    skriver.write(json.dumps(melding).encode("utf-8") + b"\n")
+    await skriver.drain()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Arbeider for fordelt beregning av strekninger.")
+    parser.add_argument("--vert", default="127.0.0.1")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--ini", default="input.ini")
+    args = parser.parse_args()
+    arbeider(args.vert, args.port, args.ini)
@@ -8,6 +8,9 @@ from functools import total_ordering
 class Kraft(object):
     """Generell klasse for konsentrerte/fordelte laster."""
 
+    __slots__ = ("navn", "type", "f", "q", "b", "e", "T", "vindretning", "s",
+                 "statisk", "fordelt", "kl_sidekraft", "_storrelse")
+
     def __init__(self, navn="", type=(0, 0), f=(0, 0, 0),
                  q=(0, 0, 0), b=0, e=(0, 0, 0), T=None, vindretning=None, s=None):
         """Initialiserer :class:`Kraft`-objekt.
@@ -19,7 +22,13 @@ class Kraft(object):
         - 2: Vind parallelt spor
 
         Variabelen ``statisk`` settes avhengig av om lasten
-        varierer med klimatiske forhold.
+        varierer med klimatiske forhold. Tilsvarende angir
+        ``fordelt`` om lasten er en fordelt last, og ``kl_sidekraft``
+        om lasten er en sidekraft fra KL.
+
+        Vektorene ``f``, ``q`` og ``e`` deler ett felles
+        ``numpy.array``. Kraftens størrelse beregnes først ved
+        behov og lagres deretter.
 
         Klassen bruker ``@total_ordering``-dekoratoren for enkel
         sammenlikning av :class:`Kraft`-objekter.
@@ -36,17 +45,15 @@ class Kraft(object):
         """
         self.navn = navn
         self.type = type
-        self.f = numpy.array(f)
-        self.q = numpy.array(q)
+        self.f, self.q, self.e = numpy.array((f, q, e), dtype=float)
         self.b = b
-        self.e = numpy.array(e)
         self.T = T
         self.vindretning = vindretning
         self.s = s
-        if self.T is None and self.vindretning is None:
-            self.statisk = True
-        else:
-            self.statisk = False
+        self.statisk = self.T is None and self.vindretning is None
+        self.fordelt = bool(numpy.count_nonzero(self.q))
+        self.kl_sidekraft = self.navn.startswith("Sidekraft: KL")
+        self._storrelse = None
 
 
     def __repr__(self):
@@ -54,7 +61,7 @@ class Kraft(object):
         if self.T is not None:
             rep += "    T = {}".format(self.T)
         rep += "\n"
-        if not numpy.count_nonzero(self.q) == 0:
+        if self.fordelt:
             rep += "q*b = {}\n".format(self.q * self.b)
         else:
             rep += "f = {}\n".format(self.f)
@@ -62,9 +69,128 @@ class Kraft(object):
         return rep
 
 
+    @property
+    def storrelse(self):
+        """Kraftens størrelse :math:`|f|` :math:`[N]`."""
+        if self._storrelse is None:
+            self._storrelse = float(numpy.linalg.norm(self.f))
+        return self._storrelse
+
+
     def __lt__(self, other):
-        return numpy.linalg.norm(self.f) - numpy.linalg.norm(other.f) < 0
+        return self.storrelse - other.storrelse < 0
 
 
     def __eq__(self, other):
-        return numpy.linalg.norm(self.f) - numpy.linalg.norm(other.f) == 0
+        return self.storrelse - other.storrelse == 0
+
+
+def beregn_reaksjonskrefter(F):
+    """Beregner reaksjonskrefter ved masteinnspenning grunnet krefter i ``F``.
+
+    Samtlige krefter behandles samlet som ``numpy.array``-objekter,
+    og bidragene summeres inn i R-matrisen med én spredt addisjon.
+    Fortegnet på torsjonsbidrag fra krefter som ikke er sidekrefter
+    i KL bestemmes av :func:`fortegnsjusterte_bidrag` med samme
+    resultat som ved fortløpende summering kraft for kraft.
+
+    :param list F: Liste med :class:`Kraft`-objekter påført systemet
+    :return: Matrise med reaksjonskrefter
+    :rtype: :class:`numpy.array`
+    """
+    # Initierer R-matrisen for reaksjonskrefter
+    R = numpy.zeros((5, 8, 6))
+    if not F:
+        return R
+    rad, etasje, f, q, b, e, kl = kraftdata(F)
+    # Resultant av fordelte laster
+    fordelt = numpy.any(q != 0, axis=1)
+    f = numpy.where(fordelt[:, None], q * b[:, None], f)
+    # Sorterer bidrag til reaksjonskrefter
+    R_0 = numpy.empty((len(F), 6))
+    R_0[:, 0] = f[:, 0] * e[:, 2] + f[:, 2] * (-e[:, 0])
+    R_0[:, 1] = f[:, 1]
+    R_0[:, 2] = f[:, 0] * (-e[:, 1]) + f[:, 1] * e[:, 0]
+    R_0[:, 3] = f[:, 2]
+    R_0[:, 4] = f[:, 0]
+    R_0[:, 5] = fortegnsjusterte_bidrag(
+        f[:, 1] * (-e[:, 2]) + f[:, 2] * e[:, 1],
+        numpy.abs(f[:, 1] * (-e[:, 2])) + numpy.abs(f[:, 2] * e[:, 1]), kl)
+    numpy.add.at(R, (etasje, rad), R_0)
+    return R
+
+
+def kraftdata(F):
+    """Samler data fra :class:`Kraft`-objekter i ``numpy.array``-objekter.
+
+    :param list F: Liste med :class:`Kraft`-objekter påført systemet
+    :return: Radindekser ``rad``, etasjeindekser ``etasje``, kraftvektorer ``f``,
+     fordelte laster ``q``, utstrekning ``b``, eksentrisiteter ``e``
+     og maske ``kl`` for sidekrefter i KL
+    :rtype: :class:`numpy.array`, :class:`numpy.array`, :class:`numpy.array`,
+     :class:`numpy.array`, :class:`numpy.array`, :class:`numpy.array`,
+     :class:`numpy.array`
+    """
+    n = len(F)
+    rad = numpy.empty(n, dtype=int)
+    etasje = numpy.empty(n, dtype=int)
+    f = numpy.empty((n, 3))
+    q = numpy.empty((n, 3))
+    b = numpy.empty(n)
+    e = numpy.empty((n, 3))
+    kl = numpy.empty(n, dtype=bool)
+    for k, j in enumerate(F):
+        rad[k], etasje[k] = j.type
+        f[k] = j.f
+        q[k] = j.q
+        b[k] = j.b
+        e[k] = j.e
+        kl[k] = j.kl_sidekraft
+    return rad, etasje, f, q, b, e, kl
+
+
+def fortegnsjusterte_bidrag(signert, absolutt, kl, faktor=None):
+    """Bestemmer fortegn på torsjonsbidrag etter løpende totaltorsjon.
+
+    Sidekrefter i KL (``kl``) gir bidrag med eget fortegn, ``signert``.
+    Øvrige krefter gir bidrag ``absolutt`` med fortegnet til summen av
+    alle foregående bidrag (positivt dersom summen er null), slik at
+    disse alltid virker i samme retning som torsjonen fra KL.
+
+    Dersom ingen av de øvrige kreftene med bidrag forskjellig fra null
+    kommer foran en sidekraft i KL, er fortegnet konstant og gitt av
+    summen av bidrag fra KL alene. Bidragene beregnes da samlet.
+    Ellers summeres bidragene fortløpende i opprinnelig rekkefølge.
+
+    ``faktor`` angir en eventuell skalering av bidragene før summering,
+    f.eks. omregning fra torsjonsmoment til torsjonsvinkel.
+
+    :param numpy.array signert: Bidrag med fortegn
+    :param numpy.array absolutt: Bidrag uten fortegn
+    :param numpy.array kl: Maske for sidekrefter i KL
+    :param numpy.array faktor: Skalering av bidrag ved summering
+    :return: Fortegnsjusterte bidrag (uskalert)
+    :rtype: :class:`numpy.array`
+    """
+    if faktor is None:
+        faktor = numpy.ones(len(kl))
+    ovrige = ~kl & (absolutt * faktor != 0)
+    bidrag_kl = numpy.flatnonzero(kl & (signert * faktor != 0))
+    bidrag_ovrige = numpy.flatnonzero(ovrige)
+    if (not bidrag_ovrige.size or not bidrag_kl.size
+            or bidrag_ovrige[0] > bidrag_kl[-1]) \
+            and numpy.all(faktor[ovrige] > 0):
+        sign = numpy.sign(numpy.sum(signert[kl] * faktor[kl]))
+        sign = 1 if sign == 0 else sign
+        return numpy.where(kl, signert, sign * absolutt)
+    bidrag = numpy.empty(len(kl))
+    total = 0
+    for k in range(len(kl)):
+        if kl[k]:
+            bidrag[k] = signert[k]
+        else:
+            sign = numpy.sign(total)
+            sign = 1 if sign == 0 else sign
+            bidrag[k] = sign * absolutt[k]
+        total += bidrag[k] * faktor[k]
+    return bidrag
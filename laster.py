@@ -30,7 +30,8 @@ def laster_mast(i, sys, mast):
         e_z_kl_vandre = mast.bredde(i.fh) / 2000  # [m]
         for temperatur in ["5C", "0C", "-25C", "-40C"]:
             T = int(temperatur[0:-1])
-            delta_T = T - 5
+            # Laveste temperatur er gitt av i.T_min
+            delta_T = (i.T_min if temperatur == "-40C" else T) - 5
             delta_l = abs(delta_T * sys.alpha_kl * i.avstand_fixpunkt)
             f_y_kl_vandre = sys.f_z_kl * (delta_l / sys.arm)
             F.append(Kraft(navn="Vandringskraft: KL", type=(1, 2),
@@ -339,6 +340,26 @@ def ulykkeslast(i, sys, T):
 
     F = []
 
+    f_z_kl, f_z_kl_avsp, e = sidekrefter_ulykke(i, sys)
+
+    f_z_ulykke = max(abs(T + f_z_kl), abs(T + f_z_kl + f_z_kl_avsp))
+
+    F.append(Kraft(navn="Sidekraft: KL (ulykke)", type=(1, 1),
+                   f=(0, 0, f_z_ulykke), e=e))
+
+    return F
+
+
+def sidekrefter_ulykke(i, sys):
+    """Beregner sidekrefter fra KL som inngår i ulykkeslast.
+
+    :param Inndata i: Input fra bruker
+    :param System sys: Data for ledninger og utligger
+    :return: Sidekraft KL :math:`[N]`, tilleggskraft ved avspenning :math:`[N]`,
+     eksentrisitet for ulykkeslast [x, y, z] :math:`[m]`
+    :rtype: :class:`float`, :class:`float`, :class:`tuple`
+    """
+
     r = i.radius
     fh, sh = i.fh, i.sh
     a1, a2 = i.a1, i.a2
@@ -357,9 +378,4 @@ def ulykkeslast(i, sys, T):
         if not i.master_bytter_side:
             f_z_kl_avsp = -f_z_kl_avsp
 
-    f_z_ulykke = max(abs(T + f_z_kl), abs(T + f_z_kl + f_z_kl_avsp))
-
-    F.append(Kraft(navn="Sidekraft: KL (ulykke)", type=(1, 1),
-                   f=(0, 0, f_z_ulykke), e=(-(fh + sh / 2), i.traverslengde, arm)))
-
-    return F
+    return f_z_kl, f_z_kl_avsp, (-(fh + sh / 2), i.traverslengde, arm)
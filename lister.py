@@ -1,5 +1,6 @@
 # -*- coding: utf8 -*-
 from __future__ import unicode_literals
+import numpy
 
 
 def _hent_tall(str):
@@ -276,3 +277,54 @@ def hent_lastkombinasjoner(ec3):
             "G": (1.3, 1.0), "L": (1.3, 1.0), "T": (1.3, 0),
             "S": (1.3, 0), "V": (1.3, 0)}
     return lastsituasjoner, lastfaktorer
+
+
+def kombinasjonsfaktorer(lastsituasjoner, lastfaktorer):
+    """Setter opp faktorer per etasje for samtlige lastkombinasjoner.
+
+    Rekkefølgen følger :func:`kraftlister`, med tre
+    vindretninger for hver lastsituasjon.
+
+    :param dict lastsituasjoner: Lastsituasjoner med kombinasjonsfaktorer og temperatur
+    :param dict lastfaktorer: Lastfaktorer for hver lasttype
+    :return: Faktorer [lastsituasjon/vindretning, lastkombinasjon, etasje]
+    :rtype: :class:`numpy.array`
+    """
+    C = []
+    for lastsituasjon in lastsituasjoner:
+        psi = lastsituasjoner[lastsituasjon]
+        G, L, T, S, V = numpy.meshgrid(
+            lastfaktorer["G"], lastfaktorer["L"], lastfaktorer["T"],
+            lastfaktorer["S"], lastfaktorer["V"], indexing="ij")
+        c = numpy.stack([G, L, psi["psi_T"] * T, psi["psi_S"] * S,
+                         psi["psi_V"] * V], axis=-1).reshape(-1, 5)
+        C.extend([c] * 3)
+    return numpy.array(C)
+
+
+def kraftlister(lastsituasjoner, F_statisk, F_dynamisk):
+    """Genererer dimensjonerende krefter for hver lastsituasjon og vindretning.
+
+    Vindretninger:
+
+    - 0: Vind fra mast mot spor
+    - 1: Vind fra spor mot mast
+    - 2: Vind parallelt sporet
+
+    :param dict lastsituasjoner: Lastsituasjoner med kombinasjonsfaktorer og temperatur
+    :param list F_statisk: Laster uavhengige av temperatur, snø og vind
+    :param list F_dynamisk: Laster som varierer med én eller flere klimaforhold
+    :return: Lastsituasjon, vindretning og liste med krefter ``F``
+    :rtype: :class:`str`, :class:`int`, :class:`list`
+    """
+    for lastsituasjon in lastsituasjoner:
+        temp = lastsituasjoner.get(lastsituasjon)["T"]
+        # F_T = klimaavhengige laster ved gitt temperatur
+        F_T = []
+        F_T.extend([f for f in F_dynamisk if f.T==temp or f.T==None])
+        for vindretning in range(3):
+            # F = alle dimensjonerende krefter ved gitte klimaforhold
+            F = []
+            F.extend(F_statisk)
+            F.extend([f for f in F_T if f.vindretning==vindretning or f.vindretning==None])
+            yield lastsituasjon, vindretning, F
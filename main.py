@@ -34,6 +34,21 @@ def beregn_master(ini):
     return gittermaster_sortert, bjelkemaster_sortert, i
 
 
+def anbefal_master(ini):
+    """Kjører beregningsprosedyre kun for anbefalte master.
+
+    Se :func:`beregning.anbefal` for utvelgelse av master.
+
+    :return: Anbefalt gittermast og bjelkemast (``None`` dersom ingen
+     mast av gitt type tilfredsstiller kravene), antall master forkastet
+     uten fullstendig beregning, kopi av input for aktuell beregning ``i``
+    :rtype: :class:`Mast`, :class:`Mast`, :class:`int`, :class:`Inndata`
+    """
+    i = inndata.Inndata(ini)  # Oppretter inndataobjekt fra .ini-fil
+    gittermast, bjelkemast, forkastet = beregning.anbefal(i)
+    return gittermast, bjelkemast, forkastet, i
+
+
 def cycle_through_masts():
     print()
     print("Velkommen til Bane NORs fantastiske nye beregningsverktøy!")
@@ -2,6 +2,21 @@
 from __future__ import unicode_literals
 import math
 import csv
+import collections
+import copy
+import hashlib
+import os
+import numpy
+
+csv.register_dialect('masts', delimiter=',', quoting=csv.QUOTE_NONNUMERIC, skipinitialspace=True)
+
+# Buffer for innleste mastekataloger, {sti: (mtime, rader)}
+_katalogbuffer = {}
+# Buffer for ferdig konstruerte master,
+# {(sti, mtime, navn, høyde, s235, bardunert): Mast}, eldste fjernes først
+_mastebuffer = collections.OrderedDict()
+# Største antall master i _mastebuffer
+MASTEBUFFER_STORRELSE = 512
 
 
 class Mast(object):
@@ -165,6 +180,12 @@ class Mast(object):
             # Vippeparametre
             self.psi_v = math.sqrt(1 + (self.E * self.Cw / (self.G * self.It)) * (math.pi / self.L_e) ** 2)
             self.M_cr_0 = (math.pi / self.L_e) * math.sqrt(self.G * self.It * self.E * self.Iz(self.h)) * self.psi_v
+        # Buffer for ekvivalente arealmomenter til forskyvningsberegninger
+        self.stivhetskoeffisienter = {}
+        self.nullstill_tilstander()
+
+    def nullstill_tilstander(self):
+        """Fjerner lagrede tilstander fra tidligere beregninger."""
         # Lister for å holde last/forskvningstilstander
         self.bruddgrense = []
         self.forskyvning_tot = []
@@ -528,14 +549,10 @@ class Mast(object):
         :rtype: :class:`float`
         """
 
-        phi = 0
-
-        x = int(10*x)
-        H = [h/10 for h in range(0, x+5, 5)]
-        for h in H:
-            phi += self._massivitetsforhold(h)
+        A, b_mid = self._vindareal_snitt(x)
+        phi = numpy.minimum(A * 10**6 / (500*b_mid), 1.0)
 
-        return phi/len(H)
+        return float(numpy.sum(phi)/len(phi))
 
     def _massivitetsforhold(self, x):
         """Beregner tverrsnittets massivitetsforhold ved gitt høyde.
@@ -580,14 +597,41 @@ class Mast(object):
         :rtype: :class:`float`
         """
 
-        A_ref = 0
+        A_ref, b_mid = self._vindareal_snitt(x)
 
-        x = int(10 * x)
-        H = [h / 10 for h in range(0, x + 5, 5)]
-        for h in H:
-            A_ref += self.vindareal(h)
+        return float(numpy.sum(A_ref)/len(A_ref))
 
-        return A_ref/len(H)
+    def _vindareal_snitt(self, x):
+        """Beregner vindareal og midlere bredde for samtlige
+        :math:`0.5m` høydesnitt innenfor lengden ``x``.
+
+        Vektorisert utgave av :func:`vindareal` og :func:`_b_mid`
+        for gitterstruktur, der alle høydesnitt evalueres samtidig.
+
+        :param float x: Avstand fra mastens toppunkt :math:`[m]`
+        :return: Vindareal :math:`[\\frac{m^2}{m}]` og midlere bredde :math:`[mm]` per høydesnitt
+        :rtype: :class:`numpy.array`, :class:`numpy.array`
+        """
+
+        H = numpy.arange(0, int(10*x) + 5, 5) / 10
+        H_0 = H - 0.5
+
+        if self.type == "bjelke":
+            b = b0 = numpy.full(H.shape, self.b, dtype=float)
+        else:
+            # x = 0 gir bredden ved mastefot, jf. :func:`bredde`
+            b = self.toppmaal + 2 * self.stigning * numpy.where(H == 0, self.h, H) * 1000
+            b0 = self.toppmaal + 2 * self.stigning * numpy.where(H_0 == 0, self.h, H_0) * 1000
+        b_mid = (numpy.where(H >= 0.5, b0, b) + b) / 2
+
+        l = (b_mid-2*self.b_f)*math.sqrt(2)
+        A_ref = 2*self.b_f*500 + self.d_h*l
+
+        if self.type == "H":
+            # Tilleggsareal fra kryssforsterkning, likt :func:`vindareal`
+            A_ref = A_ref + (b_mid - 2 * self.b_f) * 75
+
+        return A_ref/10**6, b_mid
 
     def vindareal(self, x):
         """Beregner effektivt vindareal ved gitt høyde for gitterstruktur.
@@ -729,33 +773,172 @@ class Mast(object):
 
 
 def hent_master(hoyde, s235, materialkoeff, avspenningsmast,
-                fixavspenningsmast, avspenningsbardun):
+                fixavspenningsmast, avspenningsbardun, sti="data/masts.csv"):
     """Henter liste med master til beregning.
+
+    Masteobjekter med avledede tverrsnitts- og kapasitetsparametre
+    bufres for hver kombinasjon av mastekatalog, mastetype, høyde,
+    stålkvalitet og bardunering. Hvert kall returnerer kopier uten lagrede
+    tilstander, slik at kun nye kombinasjoner konstrueres på nytt.
+    Bufferen rommer inntil :data:`MASTEBUFFER_STORRELSE` master og
+    tømmes med :func:`tom_buffer`.
+
     :param float hoyde: Valgt mastehøyde :math:`[m]`
     :param Boolean s235: Angir valg av flytespenning
     :param float materialkoeff: Materialkoeffisient for dimensjonering
     :param Boolean avspenningsmast: Angir om avspenningsmast er valgt
     :param Boolean fixavspenningsmast: Angir om fixavspenningsmast er valgt
     :param Boolean avspenningsbardun: Angir om avspenningsbardun er valgt
+    :param str sti: Sti til mastekatalog
     :return: Liste inneholdende samtlige av programmets master
     :rtype: :class:`list`
     """
+    bardunert = (avspenningsmast or fixavspenningsmast) and avspenningsbardun
     Mast.h = hoyde
     Mast.s235 = s235
     Mast.materialkoeff = materialkoeff
     Mast.L_e = hoyde*1000  # [mm]
     Mast.L_cr_y = Mast.L_e*2
-    if (avspenningsmast or fixavspenningsmast) and avspenningsbardun:
+    if bardunert:
         Mast.L_cr_z = Mast.L_e
     else:
         Mast.L_cr_z = Mast.L_e*2
     master = []
-    csv.register_dialect('masts', delimiter=',', quoting=csv.QUOTE_NONNUMERIC, skipinitialspace=True)
-    with open("data/masts.csv", 'r') as csvfile:
+    katalog = hent_katalog(sti)
+    mtime = _katalogbuffer[sti][0]
+    for rad in katalog:
+        nokkel = (sti, mtime, rad["navn"], hoyde, s235, bardunert)
+        mal = _mastebuffer.get(nokkel)
+        if mal is None:
+            mal = Mast(**rad)
+            # Knytter parametre for aktuell høyde og stålkvalitet til objektet
+            for parameter in ("h", "s235", "L_e", "L_cr_y", "L_cr_z"):
+                setattr(mal, parameter, getattr(Mast, parameter))
+            _mastebuffer[nokkel] = mal
+            if len(_mastebuffer) > MASTEBUFFER_STORRELSE:
+                _mastebuffer.popitem(last=False)
+        else:
+            _mastebuffer.move_to_end(nokkel)
+        mast = copy.copy(mal)
+        mast.materialkoeff = materialkoeff
+        mast.nullstill_tilstander()
+        master.append(mast)
+    return master
+
+
+def hent_katalog(sti="data/masts.csv"):
+    """Henter mastekatalogen som liste med parametre per mast.
+
+    Katalogen bufres i minnet og leses kun på nytt dersom kildefilen
+    er endret. Dersom en gyldig kompilert katalog (se
+    :func:`kompiler_katalog`) finnes, leses denne istedenfor .csv-filen.
+    Returnerte ordbøker deles mellom kall og skal ikke endres.
+
+    :param str sti: Sti til mastekatalog (.csv)
+    :return: Liste med ordbøker {parameter: verdi} for hver mast
+    :rtype: :class:`list`
+    """
+    mtime = os.path.getmtime(sti)
+    buffret = _katalogbuffer.get(sti)
+    if buffret is not None and buffret[0] == mtime:
+        return buffret[1]
+    rader = _les_kompilert_katalog(sti, mtime)
+    if rader is None:
+        rader = _les_katalog(sti)
+    _katalogbuffer[sti] = (mtime, rader)
+    return rader
+
+
+def tom_buffer():
+    """Tømmer buffrede mastekataloger og master.
+
+    Kompilerte kataloger (.npz) på disk berøres ikke.
+    """
+    _katalogbuffer.clear()
+    _mastebuffer.clear()
+
+
+def kompiler_katalog(sti="data/masts.csv"):
+    """Kompilerer mastekatalogen til binærformat (.npz) ved siden av kildefilen.
+
+    Kolonner med tallverdier lagres som ``numpy.array`` med ``nan``
+    for tomme felt. Kildefilens endringstidspunkt og SHA-1-sum lagres
+    for validering ved innlesing.
+
+    :param str sti: Sti til mastekatalog (.csv)
+    :return: Sti til kompilert katalog
+    :rtype: :class:`str`
+    """
+    rader = _les_katalog(sti)
+    kolonner = []
+    for rad in rader:
+        kolonner.extend([k for k in rad if k not in kolonner])
+    data = {"kolonner": numpy.array(kolonner),
+            "kilde_mtime": numpy.array(os.path.getmtime(sti)),
+            "kilde_sha1": numpy.array(_sha1(sti))}
+    for k in kolonner:
+        if k in ("navn", "type"):
+            data["kol_" + k] = numpy.array([rad[k] for rad in rader])
+        else:
+            data["kol_" + k] = numpy.array([rad.get(k, numpy.nan) for rad in rader], dtype=float)
+    kompilert = _kompilert_sti(sti)
+    with open(kompilert, "wb") as fil:
+        numpy.savez(fil, **data)
+    return kompilert
+
+
+def _les_katalog(sti):
+    """Leser mastekatalog fra .csv-fil.
+
+    :param str sti: Sti til mastekatalog (.csv)
+    :return: Liste med ordbøker {parameter: verdi} for hver mast
+    :rtype: :class:`list`
+    """
+    rader = []
+    with open(sti, 'r') as csvfile:
         reader = csv.DictReader(csvfile, dialect='masts')
         for row in reader:
-            mast = {k:v for k, v in row.items() if v!=''}
-            # ~ print(mast)
-            master.append(Mast(**mast))
-    # ~ print(master)
-    return master
+            rader.append({k: v for k, v in row.items() if v != ''})
+    return rader
+
+
+def _les_kompilert_katalog(sti, mtime):
+    """Leser kompilert mastekatalog dersom den er gyldig for kildefilen.
+
+    Katalogen er gyldig dersom lagret endringstidspunkt er likt
+    kildefilens, eller dersom SHA-1-summen av kildefilen er uendret.
+
+    :param str sti: Sti til mastekatalog (.csv)
+    :param float mtime: Kildefilens endringstidspunkt
+    :return: Liste med ordbøker {parameter: verdi}, ``None`` dersom ugyldig
+    :rtype: :class:`list`
+    """
+    kompilert = _kompilert_sti(sti)
+    if not os.path.exists(kompilert):
+        return None
+    with numpy.load(kompilert, allow_pickle=False) as data:
+        if float(data["kilde_mtime"]) != mtime and str(data["kilde_sha1"]) != _sha1(sti):
+            return None
+        kolonner = [str(k) for k in data["kolonner"]]
+        verdier = {k: data["kol_" + k] for k in kolonner}
+    rader = []
+    for n in range(len(verdier["navn"])):
+        rad = {}
+        for k in kolonner:
+            if k in ("navn", "type"):
+                rad[k] = str(verdier[k][n])
+            elif not numpy.isnan(verdier[k][n]):
+                rad[k] = float(verdier[k][n])
+        rader.append(rad)
+    return rader
+
+
+def _kompilert_sti(sti):
+    """Returnerer sti til kompilert katalog for gitt kildefil."""
+    return os.path.splitext(sti)[0] + ".npz"
+
+
+def _sha1(sti):
+    """Beregner SHA-1-sum av fil."""
+    with open(sti, "rb") as fil:
+        return hashlib.sha1(fil.read()).hexdigest()
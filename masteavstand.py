@@ -0,0 +1,120 @@
+# -*- coding: utf8 -*-
+"""Beregning av største tillatte masteavstand for hver mast.
+
+Masteavstanden ``a`` settes lik på begge sider av masten
+(``a1 = a2 = a``). For hver mast søkes største ``a`` der
+utnyttelsesgraden ikke overstiger 1.0 og eventuelle grenser for
+forskyvning i kontakttrådhøyde er overholdt, begrenset oppad av
+:func:`hjelpefunksjoner.beregn_masteavstand_max`.
+
+Masteobjekter og stivhetskoeffisienter gjenbrukes mellom iterasjonene,
+mens systemet og lastene fra ledningene beregnes én gang per
+masteavstand og deles mellom mastene.
+"""
+from __future__ import unicode_literals
+import math
+import beregning
+import hjelpefunksjoner
+import laster
+import lister
+import mast as module_mast
+import system
+import utvelgelse
+
+
+def maks_masteavstand(i, stromavtakerbredde=lister.stromavtaker_list[2],
+                      hoyfjellsgrense=False, Dz_grense=None, phi_grense=None, a_min=20.0):
+    """Beregner største tillatte masteavstand for samtlige master.
+
+    Grensen finnes ved nullpunktsøk (:func:`scipy.optimize.brentq`)
+    mellom ``a_min`` og øvre grense for masteavstand. For hver
+    masteavstand kontrolleres først nedre grense for utnyttelsesgrad
+    fra :func:`utvelgelse.nedre_grense_utnyttelse`, og fullstendig
+    beregning av masten utføres kun dersom denne er :math:`\\leq 1.0`.
+    Resultatet avrundes nedover til nærmeste :math:`0.1m`.
+
+    :param Inndata i: Input fra bruker
+    :param str stromavtakerbredde: Bredde av valgt strømavtaker
+    :param Boolean hoyfjellsgrense: Angir om strekningen ligger over høyfjellsgrensen
+    :param float Dz_grense: Største tillatte forskyvning :math:`D_z` (KL) :math:`[mm]`
+    :param float phi_grense: Største tillatte torsjonsvinkel :math:`\\phi` (KL) :math:`[^{\\circ}]`
+    :param float a_min: Minste masteavstand som undersøkes :math:`[m]`
+    :return: Største tillatte masteavstand per mastenavn :math:`[m]`,
+     ``None`` dersom masten ikke tilfredsstiller kravene ved ``a_min``
+    :rtype: :class:`dict`
+    """
+    systemnavn = i.systemnavn.split()[1] if i.systemnavn.startswith("System") else i.systemnavn
+    a_max = hjelpefunksjoner.beregn_masteavstand_max(
+        systemnavn, i.radius, i.fh, stromavtakerbredde, hoyfjellsgrense)
+    a_max = math.floor(a_max * 10) / 10
+    master = module_mast.hent_master(
+        i.h, i.s235, i.materialkoeff, i.avspenningsmast,
+        i.fixavspenningsmast, i.avspenningsbardun)
+    ledningslaster = {}
+    masteavstander = {}
+    for mast in master:
+        if mast.h_max < i.h:
+            masteavstander[mast.navn] = None
+            continue
+        masteavstander[mast.navn] = _storste_masteavstand(
+            lambda a: _overskridelse(i, mast, a, ledningslaster, Dz_grense, phi_grense),
+            a_min, a_max)
+    return masteavstander
+
+
+def _storste_masteavstand(overskridelse, a_min, a_max):
+    """Finner største masteavstand der ``overskridelse`` er :math:`\\leq 0`.
+
+    :param overskridelse: Funksjon av masteavstand, positiv ved brudd på krav
+    :param float a_min: Nedre grense for søket :math:`[m]`
+    :param float a_max: Øvre grense for søket :math:`[m]`
+    :return: Største tillatte masteavstand :math:`[m]`, ``None`` dersom kravene
+     ikke er oppfylt ved ``a_min``
+    :rtype: :class:`float`
+    """
+    from scipy.optimize import brentq
+
+    if overskridelse(a_max) <= 0:
+        return a_max
+    if overskridelse(a_min) > 0:
+        return None
+    a = brentq(overskridelse, a_min, a_max, xtol=0.05)
+    a = math.floor(a * 10) / 10
+    while a > a_min and overskridelse(a) > 0:
+        a = round(a - 0.1, 1)
+    return a
+
+
+def _overskridelse(i, mast, a, ledningslaster, Dz_grense, phi_grense):
+    """Beregner største relative overskridelse av krav ved gitt masteavstand.
+
+    :param Inndata i: Input fra bruker
+    :param Mast mast: Aktuell mast
+    :param float a: Masteavstand :math:`[m]`
+    :param dict ledningslaster: Buffer for system og ledningslaster per masteavstand
+    :param float Dz_grense: Største tillatte forskyvning :math:`D_z` (KL) :math:`[mm]`
+    :param float phi_grense: Største tillatte torsjonsvinkel :math:`\\phi` (KL) :math:`[^{\\circ}]`
+    :return: Største verdi av :math:`UR - 1` og relative overskridelser av forskyvningsgrenser
+    :rtype: :class:`float`
+    """
+    if a not in ledningslaster:
+        i_a = i.kopi(a1=a, a2=a)
+        sys = system.hent_system(i_a)
+        F_statisk_ledn, F_dynamisk_ledn = laster.laster_ledninger(i_a, sys, mastehoyde=i.h)
+        ledningslaster[a] = (i_a, sys, F_statisk_ledn, F_dynamisk_ledn)
+    i_a, sys, F_statisk_ledn, F_dynamisk_ledn = ledningslaster[a]
+
+    UR_min = utvelgelse.nedre_grense_utnyttelse(
+        i_a, sys, [mast], F_statisk_ledn, F_dynamisk_ledn)[0]
+    if UR_min > 1.0 + utvelgelse.TOLERANSE:
+        return UR_min - 1.0
+
+    mast.nullstill_tilstander()
+    beregning.beregn_mast(i_a, sys, mast, F_statisk_ledn, F_dynamisk_ledn)
+    mast.sorter_grenseverdier()
+    overskridelse = mast.tilstand_UR_max.utnyttelsesgrad - 1.0
+    if Dz_grense is not None:
+        overskridelse = max(overskridelse, abs(mast.tilstand_Dz_kl_max.K_D[1]) / Dz_grense - 1.0)
+    if phi_grense is not None:
+        overskridelse = max(overskridelse, abs(mast.tilstand_phi_kl_max.K_D[2]) / phi_grense - 1.0)
+    return overskridelse
@@ -0,0 +1,197 @@
+# -*- coding: utf8 -*-
+"""Optimal plassering av master langs en strekning.
+
+Mulige mastepunkter legges i et rutenett med fast avstand ``steg``
+langs strekningen, utenom hindringer. Optimal plassering finnes ved
+dynamisk programmering over mastepunktene, der tilstanden er de to
+siste mastene. Kostnaden for en mast avhenger dermed av masteavstanden
+på begge sider, ``a1`` og ``a2``.
+
+For hvert mastepunkt velges letteste godkjente mast blant oppgitte
+mastehøyder og begge mastetyper (se :func:`beregning.anbefal`).
+Vurderingen avhenger kun av kurveradius og masteavstander, og bufres
+slik at mastepunkter med like forhold beregnes én gang.
+
+Endemaster regnes med samme masteavstand på begge sider.
+"""
+from __future__ import unicode_literals
+import numpy
+import beregning
+import hjelpefunksjoner
+import lister
+
+
+def optimer(i, km_start, km_slutt, kurvatur, hindringer=(), steg=2.5,
+            hoyder=None, malfunksjon="antall",
+            stromavtakerbredde=lister.stromavtaker_list[2], hoyfjellsgrense=False,
+            Dz_grense=None, phi_grense=None):
+    """Finner masteplassering med lavest kostnad for en strekning.
+
+    Alternativer for ``malfunksjon``:
+
+    - antall: Minimerer antall master
+    - vekt: Minimerer samlet stålvekt :math:`\\sum egenvekt \\cdot h`
+
+    :param Inndata i: Input fra bruker, felles for alle master
+    :param float km_start: Strekningens start :math:`[km]`
+    :param float km_slutt: Strekningens slutt :math:`[km]`
+    :param list kurvatur: Liste med (km, radius) der radius gjelder fra gitt km
+    :param list hindringer: Liste med (km_fra, km_til) der master ikke kan plasseres
+    :param float steg: Avstand mellom mulige mastepunkter :math:`[m]`
+    :param list hoyder: Mulige mastehøyder :math:`[m]`, standard er ``i.h``
+    :param str malfunksjon: Størrelse som minimeres
+    :param str stromavtakerbredde: Bredde av valgt strømavtaker
+    :param Boolean hoyfjellsgrense: Angir om strekningen ligger over høyfjellsgrensen
+    :param float Dz_grense: Største tillatte forskyvning :math:`D_z` (KL) :math:`[mm]`
+    :param float phi_grense: Største tillatte torsjonsvinkel :math:`\\phi` (KL) :math:`[^{\\circ}]`
+    :return: Liste med ordbøker for hver mast (km, radius, a1, a2, mast, h),
+     samlet kostnad. ``None``, ``None`` dersom ingen gyldig plassering finnes
+    :rtype: :class:`list`, :class:`float`
+    :raises ValueError: Dersom start- eller sluttpunktet ligger i en hindring
+    """
+    if malfunksjon not in ("antall", "vekt"):
+        raise ValueError("Ukjent målfunksjon: {}".format(malfunksjon))
+    hoyder = [i.h] if hoyder is None else list(hoyder)
+
+    x = _mastepunkter(km_start, km_slutt, hindringer, steg)
+    radier = _radier(km_start + x / 1000, kurvatur)
+    systemnavn = i.systemnavn.split()[1] if i.systemnavn.startswith("System") else i.systemnavn
+    a_max = hjelpefunksjoner.beregn_masteavstand_max(
+        systemnavn, radier, i.fh, stromavtakerbredde, hoyfjellsgrense)
+    # Avstandene avrundes til rutenettet for å gi treff i bufferen
+    desimaler = max(0, -int(numpy.floor(numpy.log10(steg)))) + 3
+
+    buffer = {}
+
+    def kostnad(n, a1, a2):
+        nokkel = (float(radier[n]), round(a1, desimaler), round(a2, desimaler))
+        if nokkel not in buffer:
+            buffer[nokkel] = _vurder_mastepunkt(
+                i, nokkel[0], nokkel[1], nokkel[2], hoyder, malfunksjon, Dz_grense, phi_grense)
+        return buffer[nokkel]
+
+    N = len(x)
+    # naboer[n] = mastepunkter som kan følge etter n innenfor tillatt masteavstand
+    naboer = []
+    for n in range(N):
+        a = x[n + 1:] - x[n]
+        gyldig = (a <= a_max[n]) & (a <= a_max[n + 1:])
+        naboer.append(numpy.nonzero(gyldig)[0] + n + 1)
+
+    # beste[k][j] = (kostnad for master til og med j, mast før j), med j og k som to siste master
+    beste = [{} for n in range(N)]
+    for k in naboer[0]:
+        a = x[k] - x[0]
+        vurdering = kostnad(0, a, a)
+        if vurdering is not None:
+            beste[k][0] = (vurdering[0], None)
+    for k in range(1, N - 1):
+        for l in naboer[k]:
+            for j, (sum_kostnad, _) in beste[k].items():
+                vurdering = kostnad(k, x[k] - x[j], x[l] - x[k])
+                if vurdering is None:
+                    continue
+                ny = sum_kostnad + vurdering[0]
+                if k not in beste[l] or ny < beste[l][k][0]:
+                    beste[l][k] = (ny, j)
+
+    # Siste mast
+    forrige, total = None, None
+    for j, (sum_kostnad, _) in beste[N - 1].items():
+        a = x[N - 1] - x[j]
+        vurdering = kostnad(N - 1, a, a)
+        if vurdering is None:
+            continue
+        if total is None or sum_kostnad + vurdering[0] < total:
+            forrige, total = j, sum_kostnad + vurdering[0]
+    if forrige is None:
+        return None, None
+
+    # Tilbakesporing
+    punkter = [N - 1]
+    while forrige is not None:
+        punkter.append(forrige)
+        forrige = beste[punkter[-2]][forrige][1]
+    punkter.reverse()
+
+    plasseringer = []
+    for m, n in enumerate(punkter):
+        a1 = x[n] - x[punkter[m - 1]] if m > 0 else x[punkter[1]] - x[n]
+        a2 = x[punkter[m + 1]] - x[n] if m < len(punkter) - 1 else a1
+        a1, a2 = round(a1, desimaler), round(a2, desimaler)
+        vurdering = kostnad(n, a1, a2)
+        plasseringer.append({"km": km_start + x[n] / 1000, "radius": float(radier[n]),
+                             "a1": a1, "a2": a2, "mast": vurdering[1], "h": vurdering[2]})
+    return plasseringer, total
+
+
+def _vurder_mastepunkt(i, radius, a1, a2, hoyder, malfunksjon, Dz_grense, phi_grense):
+    """Finner letteste godkjente mast for gitt kurveradius og masteavstander.
+
+    :param Inndata i: Input fra bruker
+    :param float radius: Kurveradius :math:`[m]`
+    :param float a1: Avstand forrige mast :math:`[m]`
+    :param float a2: Avstand neste mast :math:`[m]`
+    :param list hoyder: Mulige mastehøyder :math:`[m]`
+    :param str malfunksjon: Størrelse som minimeres
+    :param float Dz_grense: Største tillatte forskyvning :math:`D_z` (KL) :math:`[mm]`
+    :param float phi_grense: Største tillatte torsjonsvinkel :math:`\\phi` (KL) :math:`[^{\\circ}]`
+    :return: Kostnad, mastenavn og mastehøyde, ``None`` dersom ingen mast er godkjent
+    :rtype: :class:`tuple`
+    """
+    beste = None
+    for h in hoyder:
+        gittermast, bjelkemast, forkastet = beregning.anbefal(
+            i.kopi(radius=radius, a1=a1, a2=a2, h=h), Dz_grense, phi_grense)
+        for mast in (gittermast, bjelkemast):
+            if mast is None:
+                continue
+            vekt = mast.egenvekt * mast.h
+            if beste is None or vekt < beste[0]:
+                beste = (vekt, mast.navn, mast.h)
+    if beste is None:
+        return None
+    if malfunksjon == "antall":
+        return (1,) + beste[1:]
+    return beste
+
+
+def _mastepunkter(km_start, km_slutt, hindringer, steg):
+    """Setter opp mulige mastepunkter langs strekningen.
+
+    Start- og sluttpunktet inngår alltid.
+
+    :param float km_start: Strekningens start :math:`[km]`
+    :param float km_slutt: Strekningens slutt :math:`[km]`
+    :param list hindringer: Liste med (km_fra, km_til) der master ikke kan plasseres
+    :param float steg: Avstand mellom mulige mastepunkter :math:`[m]`
+    :return: Mastepunktenes avstand fra start :math:`[m]`
+    :rtype: :class:`numpy.array`
+    :raises ValueError: Dersom start- eller sluttpunktet ligger i en hindring
+    """
+    lengde = (km_slutt - km_start) * 1000
+    x = numpy.arange(0, lengde, steg)
+    x = numpy.append(x[x < lengde], lengde)
+    km = km_start + x / 1000
+    gyldig = numpy.ones(len(x), dtype=bool)
+    for km_fra, km_til in hindringer:
+        gyldig &= ~((km >= km_fra) & (km <= km_til))
+    if not (gyldig[0] and gyldig[-1]):
+        raise ValueError("Strekningens start ({} km) og slutt ({} km) kan ikke ligge "
+                         "i en hindring.".format(km_start, km_slutt))
+    return x[gyldig]
+
+
+def _radier(km, kurvatur):
+    """Henter kurveradius for gitte posisjoner.
+
+    :param numpy.array km: Posisjoner :math:`[km]`
+    :param list kurvatur: Liste med (km, radius) der radius gjelder fra gitt km
+    :return: Kurveradius for hver posisjon :math:`[m]`
+    :rtype: :class:`numpy.array`
+    """
+    kurvatur = sorted(kurvatur)
+    km_kurve = numpy.array([k for k, r in kurvatur])
+    radius = numpy.array([r for k, r in kurvatur])
+    n = numpy.searchsorted(km_kurve, km, side="right") - 1
+    return radius[numpy.clip(n, 0, len(radius) - 1)]
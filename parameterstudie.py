@@ -0,0 +1,144 @@
+# -*- coding: utf8 -*-
+"""Parameterstudier med gjenbruk av mellomresultater.
+
+Beregningen av en mast består av tre trinn:
+
+1. Masteobjekter fra :func:`mast.hent_master`
+2. System og laster fra ledninger fra :func:`system.hent_system`
+   og :func:`laster.laster_ledninger`
+3. Laster på masten og lastkombinasjoner fra :func:`beregning.beregn_mast`
+
+Trinn 1 og 2 utføres kun på nytt når et parameter i henholdsvis
+:data:`MASTEFELT` og :data:`LEDNINGSFELT` endres, og resultatene
+gjenbrukes ellers mellom punktene i studien. Trinn 3 utføres for
+hvert punkt.
+"""
+from __future__ import unicode_literals
+import numpy
+import beregning
+import laster
+import mast as module_mast
+import system
+
+# Inndataparametre som påvirker masteobjektene
+MASTEFELT = frozenset([
+    "h", "s235", "materialkoeff", "avspenningsmast", "fixavspenningsmast",
+    "avspenningsbardun"])
+
+# Inndataparametre som påvirker systemet og lastene fra ledningene
+LEDNINGSFELT = frozenset([
+    "a1", "a2", "a_vind", "a_vind_par", "at_ledn", "at_type", "auto_differansestrekk",
+    "avspenningsbardun", "avspenningsmast", "brukerdefinert_last", "delta_h1",
+    "delta_h2", "differansestrekk", "e", "e_x", "e_y", "e_z", "ec3", "f_x", "f_y",
+    "f_z", "fh", "fiberoptisk_ledn", "fixavspenningsmast", "fixpunktmast",
+    "forbigang_ledn", "h", "hf", "hfj", "hj", "hr", "islast", "isklasse", "jord_ledn",
+    "jord_type", "linjemast_utliggere", "master_bytter_side", "matefjern_antall",
+    "matefjern_ledn", "radius", "retur_ledn", "sh", "siste_for_avspenning", "sms",
+    "strekkutligger", "systemnavn", "T_min", "traverslengde", "vindkasthastighetstrykk"])
+
+
+def sveip(i, felt, verdier):
+    """Beregner samtlige master for en rekke verdier av ett parameter.
+
+    ``felt`` kan også være en tuple med flere parametre som gis
+    samme verdi, f.eks. ``("a1", "a2")``.
+
+    :param Inndata i: Input fra bruker
+    :param felt: Navn på inndataparameter som varieres
+    :param list verdier: Verdier for parameteret
+    :return: Mastenavn, utnyttelsesgrad, forskyvning :math:`D_z` (KL) :math:`[mm]`
+     og torsjonsvinkel :math:`\\phi` (KL) :math:`[^{\\circ}]` [verdi, mast]
+    :rtype: :class:`list`, :class:`numpy.array`, :class:`numpy.array`, :class:`numpy.array`
+    :raises ValueError: Dersom en liste med verdier er tom
+    """
+    endringer = [_endring(felt, verdi) for verdi in verdier]
+    return _beregn(i, endringer, (len(endringer),))
+
+
+def rutenett(i, felt_a, verdier_a, felt_b, verdier_b):
+    """Beregner samtlige master for alle kombinasjoner av to parametre.
+
+    Parameteret som påvirker flest beregningstrinn bør gis som ``felt_a``,
+    slik at beregninger som avhenger av dette gjenbrukes lengst mulig.
+
+    :param Inndata i: Input fra bruker
+    :param felt_a: Navn på første inndataparameter, se :func:`sveip`
+    :param list verdier_a: Verdier for første parameter
+    :param felt_b: Navn på andre inndataparameter, se :func:`sveip`
+    :param list verdier_b: Verdier for andre parameter
+    :return: Mastenavn, utnyttelsesgrad, forskyvning :math:`D_z` (KL) :math:`[mm]`
+     og torsjonsvinkel :math:`\\phi` (KL) :math:`[^{\\circ}]` [verdi a, verdi b, mast]
+    :rtype: :class:`list`, :class:`numpy.array`, :class:`numpy.array`, :class:`numpy.array`
+    :raises ValueError: Dersom en liste med verdier er tom
+    """
+    endringer = []
+    for verdi_a in verdier_a:
+        for verdi_b in verdier_b:
+            endring = _endring(felt_a, verdi_a)
+            endring.update(_endring(felt_b, verdi_b))
+            endringer.append(endring)
+    return _beregn(i, endringer, (len(verdier_a), len(verdier_b)))
+
+
+def _endring(felt, verdi):
+    """Setter opp endringer i inndata for gitt verdi.
+
+    :param felt: Navn på inndataparameter, eller tuple med navn
+    :param verdi: Verdi for parameteret
+    :return: Ordbok med endringer {parameter: verdi}
+    :rtype: :class:`dict`
+    """
+    if isinstance(felt, str):
+        felt = (felt,)
+    return {navn: verdi for navn in felt}
+
+
+def _beregn(i, endringer, form):
+    """Beregner samtlige master for gitte endringer i inndata.
+
+    :param Inndata i: Input fra bruker
+    :param list endringer: Ordbøker med endringer {parameter: verdi} per punkt
+    :param tuple form: Form på resultatene, uten mastedimensjonen
+    :return: Mastenavn, utnyttelsesgrad, forskyvning :math:`D_z` (KL)
+     og torsjonsvinkel :math:`\\phi` (KL)
+    :rtype: :class:`list`, :class:`numpy.array`, :class:`numpy.array`, :class:`numpy.array`
+    :raises ValueError: Dersom det ikke er noen punkter å beregne
+    """
+    if not endringer:
+        raise ValueError("Parameterstudien må ha minst én verdi for hvert parameter.")
+    felt = sorted(set().union(*endringer))
+    ledningsfelt = [f for f in felt if f in LEDNINGSFELT]
+    mastefelt = [f for f in felt if f in MASTEFELT]
+
+    ledningslaster, masteliste = {}, {}
+    navn, UR, Dz, phi = None, None, None, None
+    for n, endring in enumerate(endringer):
+        i_n = i.kopi(**endring)
+
+        nokkel = tuple(endring[f] for f in ledningsfelt)
+        if nokkel not in ledningslaster:
+            sys = system.hent_system(i_n)
+            F_statisk_ledn, F_dynamisk_ledn = laster.laster_ledninger(i_n, sys, mastehoyde=i_n.h)
+            ledningslaster[nokkel] = (sys, F_statisk_ledn, F_dynamisk_ledn)
+        sys, F_statisk_ledn, F_dynamisk_ledn = ledningslaster[nokkel]
+
+        nokkel = tuple(endring[f] for f in mastefelt)
+        if nokkel not in masteliste:
+            masteliste[nokkel] = module_mast.hent_master(
+                i_n.h, i_n.s235, i_n.materialkoeff, i_n.avspenningsmast,
+                i_n.fixavspenningsmast, i_n.avspenningsbardun)
+        master = masteliste[nokkel]
+
+        if navn is None:
+            navn = [mast.navn for mast in master]
+            UR, Dz, phi = (numpy.empty((len(endringer), len(master))) for k in range(3))
+        for k, mast in enumerate(master):
+            mast.nullstill_tilstander()
+            beregning.beregn_mast(i_n, sys, mast, F_statisk_ledn, F_dynamisk_ledn)
+            mast.sorter_grenseverdier()
+            UR[n, k] = mast.tilstand_UR_max.utnyttelsesgrad
+            Dz[n, k] = mast.tilstand_Dz_kl_max.K_D[1]
+            phi[n, k] = mast.tilstand_phi_kl_max.K_D[2]
+
+    form = tuple(form) + (len(navn),)
+    return navn, UR.reshape(form), Dz.reshape(form), phi.reshape(form)
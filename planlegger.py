@@ -0,0 +1,244 @@
+# -*- coding: utf8 -*-
+"""Kostnadsbasert fordeling av mastepunkter på prosesser.
+
+Beregningstiden for et mastepunkt varierer mye med inndata. Ulykkeslast
+(``siste_for_avspenning`` eller ``linjemast_utliggere > 1``) gir en
+ekstra lastsituasjon, avspennings- og fixpunktmaster gir flere krefter,
+og hver fastavspent ledning gir krefter i samtlige lastsituasjoner.
+Med faste blokker står prosesser ledige mot slutten av en beregning.
+
+:class:`Kostnadsmodell` estimerer beregningstiden for et mastepunkt
+som antall master i katalogen ganger en lineær funksjon av egenskapene
+i :data:`EGENSKAPER`. Målte beregningstider registreres og vektene
+tilpasses med minste kvadraters metode, regularisert mot gjeldende
+vekter.
+
+:class:`Planlegger` fordeler mastepunktene på prosessene etter
+estimert kostnad med lengste først (LPT), slik at hver prosess får en
+egen kø med omtrent lik total kostnad. Hver prosess henter fra
+starten av egen kø, og en prosess med tom kø stjeler fra slutten av
+køen med størst gjenværende kostnad. Beregningstiden måles i
+prosessen og registreres i modellen.
+"""
+from __future__ import unicode_literals
+import collections
+import concurrent.futures
+import io
+import json
+import time
+import numpy
+import mast as module_mast
+
+# Egenskaper for et mastepunkt som inngår i kostnadsmodellen
+EGENSKAPER = ("grunnlast", "ledninger", "ulykke", "avspenning", "brukerdefinert")
+
+# Innledende beregningstid per mast og egenskap [s]
+STANDARDVEKTER = (0.045, 0.005, 0.007, 0.002, 0.005)
+
+
+class Kostnadsmodell(object):
+    """Klasse for estimert beregningstid per mastepunkt."""
+
+    def __init__(self, vekter=STANDARDVEKTER, antall_master=None, regularisering=1.0):
+        """Initialiserer :class:`Kostnadsmodell`-objekt.
+
+        :param tuple vekter: Beregningstid per mast for hver egenskap :math:`[s]`
+        :param int antall_master: Antall master som beregnes per mastepunkt,
+         ``None`` gir antall master i mastekatalogen
+        :param float regularisering: Vekt på gjeldende vekter ved tilpasning
+        """
+        if antall_master is None:
+            antall_master = len(module_mast.hent_katalog())
+        self.vekter = numpy.array(vekter, dtype=float)
+        self.antall_master = antall_master
+        self.regularisering = regularisering
+        self.observasjoner = []
+
+    def egenskaper(self, i):
+        """Setter opp egenskaper for et mastepunkt, se :data:`EGENSKAPER`.
+
+        :param Inndata i: Input fra bruker
+        :return: Egenskaper multiplisert med antall master
+        :rtype: :class:`numpy.array`
+        """
+        ledninger = (i.matefjern_antall * i.matefjern_ledn + 2 * i.at_ledn + i.forbigang_ledn
+                     + i.jord_ledn + i.fiberoptisk_ledn + 2 * i.retur_ledn)
+        ulykke = i.siste_for_avspenning or i.linjemast_utliggere > 1
+        avspenning = i.avspenningsmast or i.fixavspenningsmast or i.fixpunktmast
+        return self.antall_master * numpy.array(
+            [1.0, ledninger, ulykke, avspenning, i.brukerdefinert_last], dtype=float)
+
+    def estimer(self, i):
+        """Estimerer beregningstid for et mastepunkt.
+
+        :param Inndata i: Input fra bruker
+        :return: Estimert beregningstid :math:`[s]`
+        :rtype: :class:`float`
+        """
+        return float(self.egenskaper(i).dot(self.vekter))
+
+    def registrer(self, i, tid):
+        """Registrerer målt beregningstid for ett eller flere mastepunkter.
+
+        For flere mastepunkter som er beregnet samlet, registreres
+        summen av egenskapene mot samlet beregningstid.
+
+        :param i: Input fra bruker, eller liste med input for hvert mastepunkt
+        :type i: :class:`Inndata` eller :class:`list`
+        :param float tid: Målt beregningstid :math:`[s]`
+        """
+        punkter = i if isinstance(i, list) else [i]
+        x = numpy.sum([self.egenskaper(p) for p in punkter], axis=0)
+        self.observasjoner.append((x.tolist(), float(tid)))
+
+    def tilpass(self):
+        """Tilpasser vektene til registrerte beregningstider.
+
+        Vektene :math:`w` løser
+        :math:`(X^T X + \\lambda I) w = X^T t + \\lambda w_0`,
+        der :math:`w_0` er gjeldende vekter og :math:`\\lambda`
+        er regulariseringen skalert med antall master. Negative
+        vekter settes lik null.
+
+        :return: Nye vekter
+        :rtype: :class:`numpy.array`
+        """
+        if self.observasjoner:
+            X = numpy.array([x for x, t in self.observasjoner])
+            t = numpy.array([t for x, t in self.observasjoner])
+            lam = self.regularisering * self.antall_master ** 2
+            A = X.T.dot(X) + lam * numpy.eye(len(self.vekter))
+            w = numpy.linalg.solve(A, X.T.dot(t) + lam * self.vekter)
+            self.vekter = numpy.maximum(w, 0.0)
+        return self.vekter
+
+    def lagre(self, sti):
+        """Lagrer vekter og registrerte beregningstider til .json-fil.
+
+        :param str sti: Sti til fil
+        """
+        with io.open(sti, "w", encoding="utf-8") as fil:
+            json.dump({"vekter": self.vekter.tolist(), "antall_master": self.antall_master,
+                       "regularisering": self.regularisering,
+                       "observasjoner": self.observasjoner}, fil)
+
+    @classmethod
+    def les(cls, sti):
+        """Leser kostnadsmodell lagret med :meth:`lagre`.
+
+        :param str sti: Sti til fil
+        :return: Kostnadsmodell
+        :rtype: :class:`Kostnadsmodell`
+        """
+        with io.open(sti, encoding="utf-8") as fil:
+            data = json.load(fil)
+        modell = cls(data["vekter"], data["antall_master"], data["regularisering"])
+        modell.observasjoner = [(x, t) for x, t in data["observasjoner"]]
+        return modell
+
+
+class Planlegger(object):
+    """Klasse for kostnadsbasert fordeling av mastepunkter på prosesser."""
+
+    def __init__(self, prosesser=2, modell=None, initializer=None, initargs=()):
+        """Initialiserer :class:`Planlegger`-objekt.
+
+        :param int prosesser: Antall prosesser
+        :param Kostnadsmodell modell: Kostnadsmodell, ``None`` gir standardvekter
+        :param initializer: Funksjon som kalles i hver prosess før første beregning
+        :param tuple initargs: Argumenter til ``initializer``
+        """
+        self.prosesser = prosesser
+        self.modell = modell if modell is not None else Kostnadsmodell()
+        self.initializer = initializer
+        self.initargs = initargs
+        self.stjalet = 0
+
+    def fordel(self, punkter):
+        """Fordeler mastepunkter på prosessenes køer med lengste først.
+
+        :param list punkter: Inndata for hvert mastepunkt
+        :return: Kø med mastepunktenes indeks for hver prosess,
+         sortert synkende etter estimert kostnad
+        :rtype: :class:`list`
+        """
+        kostnad = [self.modell.estimer(i) for i in punkter]
+        koer = [collections.deque() for k in range(max(1, self.prosesser))]
+        last = [0.0] * len(koer)
+        for n in sorted(range(len(punkter)), key=lambda n: -kostnad[n]):
+            k = last.index(min(last))
+            koer[k].append(n)
+            last[k] += kostnad[n]
+        return koer
+
+    def kjor(self, funksjon, punkter):
+        """Beregner samtlige mastepunkter og registrerer beregningstidene.
+
+        Vektene i kostnadsmodellen tilpasses til slutt, se
+        :meth:`Kostnadsmodell.tilpass`.
+
+        :param funksjon: Funksjon som beregner ett mastepunkt fra inndata,
+         må kunne overføres til andre prosesser
+        :param list punkter: Inndata for hvert mastepunkt
+        :return: Resultat for hvert mastepunkt i gitt rekkefølge
+        :rtype: :class:`list`
+        """
+        koer = self.fordel(punkter)
+        resultater = [None] * len(punkter)
+        if self.prosesser <= 1:
+            if self.initializer is not None:
+                self.initializer(*self.initargs)
+            for n in koer[0]:
+                resultater[n], tid = _beregn_med_tid(funksjon, punkter[n])
+                self.modell.registrer(punkter[n], tid)
+        else:
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.prosesser, initializer=self.initializer,
+                    initargs=self.initargs) as pool:
+                pagaende = {}
+                for k in range(len(koer)):
+                    self._tildel(pool, funksjon, punkter, koer, k, pagaende)
+                while pagaende:
+                    ferdige, _ = concurrent.futures.wait(
+                        pagaende, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for fremtid in ferdige:
+                        k, n = pagaende.pop(fremtid)
+                        resultater[n], tid = fremtid.result()
+                        self.modell.registrer(punkter[n], tid)
+                        self._tildel(pool, funksjon, punkter, koer, k, pagaende)
+        self.modell.tilpass()
+        return resultater
+
+    def _tildel(self, pool, funksjon, punkter, koer, k, pagaende):
+        """Sender neste mastepunkt til prosess ``k``, om nødvendig fra en annen kø.
+
+        :param concurrent.futures.ProcessPoolExecutor pool: Prosesspool
+        :param funksjon: Funksjon som beregner ett mastepunkt
+        :param list punkter: Inndata for hvert mastepunkt
+        :param list koer: Kø for hver prosess
+        :param int k: Prosessens indeks
+        :param dict pagaende: Pågående beregninger {fremtid: (prosess, mastepunkt)}
+        """
+        if koer[k]:
+            n = koer[k].popleft()
+        elif any(koer):
+            gjenstar = [sum(self.modell.estimer(punkter[m]) for m in ko) if ko else -1.0
+                        for ko in koer]
+            n = koer[gjenstar.index(max(gjenstar))].pop()
+            self.stjalet += 1
+        else:
+            return
+        pagaende[pool.submit(_beregn_med_tid, funksjon, punkter[n])] = (k, n)
+
+
+def _beregn_med_tid(funksjon, i):
+    """Beregner ett mastepunkt og måler beregningstiden.
+
+    :param funksjon: Funksjon som beregner ett mastepunkt
+    :param Inndata i: Input fra bruker
+    :return: Resultat, beregningstid :math:`[s]`
+    :rtype: :class:`tuple`
+    """
+    start = time.perf_counter()
+    resultat = funksjon(i)
+    return resultat, time.perf_counter() - start
@@ -0,0 +1,235 @@
+# -*- coding: utf8 -*-
+"""Resultatdatabase i SQLite for beregnede mastepunkter.
+
+Databasen har to tabeller:
+
+- ``mastepunkt``: Én rad per mastepunkt med banestrekning, kilometrering,
+  utvalgte inndata som egne kolonner, samtlige inndata som JSON og
+  anbefalt gittermast og bjelkemast.
+- ``mast``: Én rad per beregnet mast og mastepunkt med dimensjonerende
+  verdier (se :data:`MASTEKOLONNER`), dimensjonerende lastsituasjon og
+  krefter til FUNDAMAST (se :data:`FUNDAMASTKOLONNER`).
+
+Databasen benytter WAL-modus, slik at spørringer kan gjøres mens
+resultater skrives, og hver skriving av mastepunkter gjøres med
+samlede innsettinger i én transaksjon. Tabellene har indekser på
+banestrekning, kilometrering, mastenavn, mastetype og utnyttelsesgrad.
+
+Eksempel::
+
+    db = Resultatdatabase("resultater.db")
+    db.skriv_strekning(s)
+    db.sok(banestrekning="0560", mast="B4", UR_over=1.0)
+    db.sok(km=(61.0, 80.0), sorter="phi_kl", antall=20)
+    db.sok(lastsituasjon="Ulykkeslast", anbefalt=True)
+"""
+from __future__ import unicode_literals
+import json
+import sqlite3
+import beregning
+import fundamast
+
+# Dimensjonerende absoluttverdier per mast: utnyttelsesgrad,
+# moment My [kNm] og torsjon T [kNm] (bruddgrense), forskyvning Dz [mm]
+# og torsjonsvinkel phi [grader] (KL og totalt), samt utnyttelsesgrad
+# og torsjon ved ulykkeslast (NULL dersom ingen ulykkeslast)
+MASTEKOLONNER = ("UR", "My", "T", "Dz_kl", "phi_kl", "Dz_tot", "phi_tot",
+                 "UR_ulykke", "T_ulykke")
+
+# Krefter til FUNDAMAST, se :func:`fundamast.krefter`
+FUNDAMASTKOLONNER = fundamast.KREFTER
+
+# Inndata som lagres i egne kolonner for mastepunktet
+PUNKTKOLONNER = ("banestrekning", "km", "mastenr", "radius", "a1", "a2", "h")
+
+_SKJEMA = """
+CREATE TABLE IF NOT EXISTS mastepunkt (
+    id INTEGER PRIMARY KEY,
+    banestrekning TEXT, km REAL, mastenr TEXT, radius REAL,
+    a1 REAL, a2 REAL, h REAL, inndata TEXT,
+    gittermast TEXT, bjelkemast TEXT);
+CREATE TABLE IF NOT EXISTS mast (
+    mastepunkt INTEGER NOT NULL REFERENCES mastepunkt(id),
+    navn TEXT, type TEXT, anbefalt INTEGER, lastsituasjon TEXT,
+    {mast});
+CREATE INDEX IF NOT EXISTS mastepunkt_strekning_km ON mastepunkt(banestrekning, km);
+CREATE INDEX IF NOT EXISTS mastepunkt_km ON mastepunkt(km);
+CREATE INDEX IF NOT EXISTS mast_mastepunkt ON mast(mastepunkt);
+CREATE INDEX IF NOT EXISTS mast_navn_UR ON mast(navn, UR);
+CREATE INDEX IF NOT EXISTS mast_type ON mast(type);
+CREATE INDEX IF NOT EXISTS mast_UR ON mast(UR);
+""".format(mast=", ".join("{} REAL".format(k) for k in MASTEKOLONNER + FUNDAMASTKOLONNER))
+
+
+class Resultatdatabase(object):
+    """Klasse for å representere en resultatdatabase i SQLite."""
+
+    def __init__(self, sti):
+        """Initialiserer :class:`Resultatdatabase`-objekt.
+
+        Databasen og tabellene opprettes dersom de ikke finnes.
+
+        :param str sti: Sti til databasefil
+        """
+        self.sti = sti
+        self._db = sqlite3.connect(sti)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SKJEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.lukk()
+
+    def lukk(self):
+        """Lukker databasen."""
+        self._db.close()
+
+    def skriv(self, mastepunkter, Dz_grense=None, phi_grense=None):
+        """Skriver beregnede mastepunkter i én transaksjon.
+
+        Anbefalt gittermast og bjelkemast for hvert mastepunkt
+        velges blant gitte master med :func:`beregning.velg_anbefalt`.
+
+        :param list mastepunkter: (Inndata, master med sorterte tilstander)
+         for hvert mastepunkt
+        :param float Dz_grense: Største tillatte forskyvning :math:`D_z` (KL) :math:`[mm]`
+        :param float phi_grense: Største tillatte torsjonsvinkel :math:`\\phi` (KL) :math:`[^{\\circ}]`
+        :return: Id for skrevne mastepunkter
+        :rtype: :class:`list`
+        """
+        punktrader, masterader = [], []
+        with self._db:
+            neste = self._db.execute(
+                "SELECT COALESCE(MAX(id), 0) + 1 FROM mastepunkt").fetchone()[0]
+            for n, (i, master) in enumerate(mastepunkter):
+                anbefalt = [beregning.velg_anbefalt(
+                    [mast for mast in master if (mast.type == "bjelke") == bjelke],
+                    i.h, Dz_grense, phi_grense) for bjelke in (False, True)]
+                punktrader.append(
+                    (neste + n,) + tuple(getattr(i, k) for k in PUNKTKOLONNER)
+                    + (json.dumps(vars(i), sort_keys=True),)
+                    + tuple(mast.navn if mast is not None else None for mast in anbefalt))
+                masterader.extend(
+                    (neste + n, mast.navn, mast.type, mast in anbefalt, _lastsituasjon(mast))
+                    + _mastedata(mast) + fundamast.krefter(mast) for mast in master)
+            self._db.executemany("INSERT INTO mastepunkt VALUES ({})".format(
+                ", ".join("?" * (len(PUNKTKOLONNER) + 4))), punktrader)
+            self._db.executemany("INSERT INTO mast VALUES ({})".format(
+                ", ".join("?" * (5 + len(MASTEKOLONNER) + len(FUNDAMASTKOLONNER)))), masterader)
+        return [rad[0] for rad in punktrader]
+
+    def skriv_strekning(self, strekning):
+        """Skriver anbefalte master for samtlige mastepunkter på en strekning.
+
+        :param Strekning strekning: Strekning, beregnes dersom nødvendig
+        :return: Id for skrevne mastepunkter
+        :rtype: :class:`list`
+        """
+        resultater = strekning.beregn()
+        return self.skriv([(strekning.inndata(n), [m for m in anbefalt if m is not None])
+                           for n, anbefalt in enumerate(resultater)],
+                          strekning.Dz_grense, strekning.phi_grense)
+
+    def sok(self, banestrekning=None, km=None, mast=None, type=None, UR_over=None,
+            lastsituasjon=None, anbefalt=None, sorter=None, antall=None):
+        """Søker etter master i databasen.
+
+        Samtlige gitte kriterier må være oppfylt. Uten ``sorter``
+        sorteres treffene etter banestrekning og kilometrering,
+        ellers synkende etter gitt kolonne.
+
+        :param str banestrekning: Banestrekning
+        :param tuple km: Nedre og øvre kilometrering (inklusive)
+        :param str mast: Mastenavn, f.eks. ``"B4"``
+        :param str type: Mastetype, f.eks. ``"bjelke"``
+        :param float UR_over: Utnyttelsesgrad større enn gitt verdi
+        :param str lastsituasjon: Dimensjonerende lastsituasjon, f.eks. ``"Ulykkeslast"``
+        :param bool anbefalt: Kun anbefalte (``True``) eller ikke anbefalte (``False``) master
+        :param str sorter: Kolonne i :data:`MASTEKOLONNER` eller :data:`FUNDAMASTKOLONNER`
+        :param int antall: Største antall treff
+        :return: Treff med kolonner fra ``mastepunkt`` (uten ``inndata``) og ``mast``
+        :rtype: :class:`list`
+        :raises ValueError: Dersom ``sorter`` ikke er en gyldig kolonne
+        """
+        kriterier, parametre = [], []
+        for kolonne, verdi in (("p.banestrekning = ?", banestrekning), ("m.navn = ?", mast),
+                               ("m.type = ?", type), ("m.UR > ?", UR_over),
+                               ("m.lastsituasjon = ?", lastsituasjon),
+                               ("m.anbefalt = ?", anbefalt)):
+            if verdi is not None:
+                kriterier.append(kolonne)
+                parametre.append(verdi)
+        if km is not None:
+            kriterier.append("p.km BETWEEN ? AND ?")
+            parametre.extend(km)
+        if sorter is None:
+            rekkefolge = "p.banestrekning, p.km, p.id"
+        elif sorter in MASTEKOLONNER + FUNDAMASTKOLONNER:
+            rekkefolge = "m.{} DESC".format(sorter)
+        else:
+            raise ValueError("Ugyldig kolonne for sortering: {}".format(sorter))
+        sporring = ("SELECT p.id, {}, p.gittermast, p.bjelkemast, m.navn, m.type, "
+                    "m.anbefalt, m.lastsituasjon, {} "
+                    "FROM mast m JOIN mastepunkt p ON m.mastepunkt = p.id").format(
+                        ", ".join("p." + k for k in PUNKTKOLONNER),
+                        ", ".join("m." + k for k in MASTEKOLONNER + FUNDAMASTKOLONNER))
+        if kriterier:
+            sporring += " WHERE " + " AND ".join(kriterier)
+        sporring += " ORDER BY " + rekkefolge
+        if antall is not None:
+            sporring += " LIMIT ?"
+            parametre.append(antall)
+        return [dict(rad) for rad in self._db.execute(sporring, parametre)]
+
+    def inndata(self, mastepunkt):
+        """Henter samtlige inndata for et mastepunkt.
+
+        :param int mastepunkt: Mastepunktets id
+        :return: Inndata {parameter: verdi}
+        :rtype: :class:`dict`
+        """
+        rad = self._db.execute("SELECT inndata FROM mastepunkt WHERE id = ?",
+                               (mastepunkt,)).fetchone()
+        return json.loads(rad[0]) if rad is not None else None
+
+
+def _mastedata(mast):
+    """Henter dimensjonerende verdier for en beregnet mast.
+
+    :param Mast mast: Mast med sorterte tilstander
+    :return: Verdier i rekkefølgen gitt av :data:`MASTEKOLONNER`
+    :rtype: :class:`tuple`
+    """
+    UR_ulykke, T_ulykke = None, None
+    if mast.ulykke:
+        UR_ulykke = max(float(t.utnyttelsesgrad) for t in mast.ulykke)
+        T_ulykke = abs(float(mast.tilstand_T_max_ulykke.K[5])) / 1000
+    return (float(mast.tilstand_UR_max.utnyttelsesgrad),
+            abs(float(mast.tilstand_My_max.K[0])) / 1000,
+            abs(float(mast.tilstand_T_max.K[5])) / 1000,
+            abs(float(mast.tilstand_Dz_kl_max.K_D[1])),
+            abs(float(mast.tilstand_phi_kl_max.K_D[2])),
+            abs(float(mast.tilstand_Dz_tot_max.K_D[1])),
+            abs(float(mast.tilstand_phi_tot_max.K_D[2])),
+            UR_ulykke, T_ulykke)
+
+
+def _lastsituasjon(mast):
+    """Finner dimensjonerende lastsituasjon for en beregnet mast.
+
+    Ulykkeslast er dimensjonerende dersom utnyttelsesgraden ved
+    ulykkeslast er større enn største utnyttelsesgrad i bruddgrense.
+
+    :param Mast mast: Mast med sorterte tilstander
+    :return: Dimensjonerende lastsituasjon
+    :rtype: :class:`str`
+    """
+    tilstand = mast.tilstand_UR_max
+    for t in mast.ulykke:
+        if t.utnyttelsesgrad > tilstand.utnyttelsesgrad:
+            tilstand = t
+    return tilstand.lastsituasjon
@@ -0,0 +1,144 @@
+# -*- coding: utf8 -*-
+"""Resultater per mastepunkt i minnetilordnede filer for svært store beregninger.
+
+Resultatene lagres som én post med fast lengde per mastepunkt i en
+binærfil som åpnes med :class:`numpy.memmap`. Skjemaet beskrives i en
+JSON-fil (``sti + ".json"``) med antall mastepunkter, mastenavn i
+samme rekkefølge som verdiene per mast og datatypen til postene, slik
+at filen kan åpnes uten denne modulen.
+
+Hver post inneholder:
+
+- ``beregnet``: 1 dersom mastepunktet er beregnet
+- ``anbefalt``: Indeks for anbefalt gittermast og bjelkemast, -1 dersom ingen
+- ``UR``: Største utnyttelsesgrad per mast
+- ``K``: Dimensjonerende reaksjonskrefter per mast :math:`[N, Nm]`,
+  for tilstanden med største utnyttelsesgrad
+- ``Dz_kl``, ``phi_kl``, ``Dz_tot``, ``phi_tot``: Største forskyvning
+  :math:`[mm]` og torsjonsvinkel :math:`[^{\\circ}]` per mast, for KL og totalt
+
+Verdier for master som ikke er beregnet er NaN. Filen opprettes med
+:func:`opprett`, og hver prosess åpner den med :class:`Resultatlager`
+og skriver sine egne mastepunkter direkte. Analyse av resultatene kan
+gjøres direkte på :attr:`Resultatlager.data` uten kopiering.
+"""
+from __future__ import unicode_literals
+import io
+import json
+import numpy
+import beregning
+
+# Versjon av filformatet
+VERSJON = 1
+
+
+def datatype(antall_master):
+    """Setter opp datatype for én post.
+
+    :param int antall_master: Antall master i katalogen
+    :return: Datatype
+    :rtype: :class:`numpy.dtype`
+    """
+    m = antall_master
+    return numpy.dtype([("beregnet", "u1"), ("anbefalt", "<i2", (2,)), ("UR", "<f8", (m,)),
+                        ("K", "<f8", (m, 6)), ("Dz_kl", "<f8", (m,)), ("phi_kl", "<f8", (m,)),
+                        ("Dz_tot", "<f8", (m,)), ("phi_tot", "<f8", (m,))])
+
+
+def opprett(sti, antall, master):
+    """Oppretter fil med plass til samtlige mastepunkter, samt skjema.
+
+    :param str sti: Sti til resultatfil
+    :param int antall: Antall mastepunkter
+    :param list master: Mastenavn
+    :return: Resultatlager åpnet for skriving
+    :rtype: :class:`Resultatlager`
+    """
+    dtype = datatype(len(master))
+    skjema = {"versjon": VERSJON, "antall": int(antall), "master": list(master),
+              "dtype": dtype.descr}
+    with io.open(sti + ".json", "w", encoding="utf-8") as fil:
+        json.dump(skjema, fil, indent=1)
+    data = numpy.memmap(sti, dtype=dtype, mode="w+", shape=(int(antall),))
+    data["anbefalt"] = -1
+    for felt in ("UR", "K", "Dz_kl", "phi_kl", "Dz_tot", "phi_tot"):
+        data[felt] = numpy.nan
+    data.flush()
+    del data
+    return Resultatlager(sti, "r+")
+
+
+class Resultatlager(object):
+    """Klasse for resultater per mastepunkt i en minnetilordnet fil."""
+
+    def __init__(self, sti, modus="r"):
+        """Initialiserer :class:`Resultatlager`-objekt.
+
+        :param str sti: Sti til resultatfil opprettet med :func:`opprett`
+        :param str modus: ``"r"`` for lesing, ``"r+"`` for skriving
+        :raises ValueError: Dersom filen har ukjent versjon eller feil størrelse
+        """
+        with io.open(sti + ".json", encoding="utf-8") as fil:
+            skjema = json.load(fil)
+        if not skjema["versjon"] == VERSJON:
+            raise ValueError("Ukjent versjon av resultatfil: {}".format(skjema["versjon"]))
+        self.sti = sti
+        self.antall = skjema["antall"]
+        self.master = skjema["master"]
+        self._indeks = {navn: n for n, navn in enumerate(self.master)}
+        dtype = numpy.dtype([tuple(felt[0:2]) + (tuple(felt[2]),) if len(felt) > 2
+                             else tuple(felt) for felt in skjema["dtype"]])
+        if not dtype == datatype(len(self.master)):
+            raise ValueError("Datatypen i {} stemmer ikke med mastene.".format(sti + ".json"))
+        self.data = numpy.memmap(sti, dtype=dtype, mode=modus, shape=(self.antall,))
+
+    def __len__(self):
+        return self.antall
+
+    def skriv(self, n, i, master, Dz_grense=None, phi_grense=None):
+        """Skriver resultater for mastepunkt ``n``.
+
+        Anbefalt gittermast og bjelkemast velges blant gitte master
+        med :func:`beregning.velg_anbefalt`. Master som ikke er gitt
+        får verdien NaN.
+
+        :param int n: Mastepunktets indeks
+        :param Inndata i: Mastepunktets inndata
+        :param list master: Beregnede master med sorterte tilstander
+        :param float Dz_grense: Største tillatte forskyvning :math:`D_z` (KL) :math:`[mm]`
+        :param float phi_grense: Største tillatte torsjonsvinkel :math:`\\phi` (KL) :math:`[^{\\circ}]`
+        :return: Anbefalt gittermast og bjelkemast, ``None`` dersom ingen
+        :rtype: :class:`Mast`, :class:`Mast`
+        """
+        post = numpy.zeros((), dtype=self.data.dtype)
+        for felt in ("UR", "K", "Dz_kl", "phi_kl", "Dz_tot", "phi_tot"):
+            post[felt] = numpy.nan
+        for mast in master:
+            k = self._indeks[mast.navn]
+            post["UR"][k] = mast.tilstand_UR_max.utnyttelsesgrad
+            post["K"][k] = mast.tilstand_UR_max.K
+            post["Dz_kl"][k] = abs(mast.tilstand_Dz_kl_max.K_D[1])
+            post["phi_kl"][k] = abs(mast.tilstand_phi_kl_max.K_D[2])
+            post["Dz_tot"][k] = abs(mast.tilstand_Dz_tot_max.K_D[1])
+            post["phi_tot"][k] = abs(mast.tilstand_phi_tot_max.K_D[2])
+        anbefalt = [beregning.velg_anbefalt(
+            [mast for mast in master if (mast.type == "bjelke") == bjelke],
+            i.h, Dz_grense, phi_grense) for bjelke in (False, True)]
+        post["anbefalt"] = [self._indeks[mast.navn] if mast is not None else -1
+                            for mast in anbefalt]
+        post["beregnet"] = 1
+        self.data[n] = post
+        return anbefalt[0], anbefalt[1]
+
+    def flush(self):
+        """Skriver endringer til disk."""
+        self.data.flush()
+
+    def anbefalt(self, n):
+        """Henter navn på anbefalt gittermast og bjelkemast for mastepunkt ``n``.
+
+        :param int n: Mastepunktets indeks
+        :return: Mastenavn, ``None`` dersom ingen mast
+        :rtype: :class:`list`
+        """
+        return [self.master[k] if k >= 0 else None for k in self.data["anbefalt"][n]]
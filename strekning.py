@@ -0,0 +1,237 @@
+# -*- coding: utf8 -*-
+"""Beregning av samtlige master langs en strekning.
+
+Nabomaster deler spenn: masteavstanden ``a2`` for mast k er lik
+masteavstanden ``a1`` for mast k+1. Kabelstrekk for fastavspente
+ledninger lagres derfor per spenn i en spenntabell som tilhører
+strekningen og gis eksplisitt til :func:`beregning.anbefal` og dermed
+:func:`system.hent_system` for hvert mastepunkt, se
+:meth:`system.Fastavspent._strekklikevekt`. Tabellen beholdes mellom
+beregningene.
+
+Hvert mastepunkt avhenger kun av egne parametre og masteavstandene
+på begge sider. Ved endring av en masteavstand beregnes derfor kun
+de to mastepunktene ved spennets ender på nytt, og mastepunkter med
+like forhold beregnes én gang.
+
+Endemaster regnes med samme masteavstand på begge sider.
+"""
+from __future__ import unicode_literals
+import csv
+import numpy
+import beregning
+import hjelpefunksjoner
+
+
+class Strekning(object):
+    """Klasse for å representere en strekning med master i gitt rekkefølge."""
+
+    def __init__(self, i, masteavstander, punkter=None, Dz_grense=None, phi_grense=None):
+        """Initialiserer :class:`Strekning`-objekt.
+
+        :param Inndata i: Input fra bruker, felles for alle mastepunkter
+        :param list masteavstander: Masteavstand mellom påfølgende mastepunkter :math:`[m]`
+        :param list punkter: Ordbøker med endringer i inndata for hvert mastepunkt,
+         f.eks. ``{"radius": 600}``
+        :param float Dz_grense: Største tillatte forskyvning :math:`D_z` (KL) :math:`[mm]`
+        :param float phi_grense: Største tillatte torsjonsvinkel :math:`\\phi` (KL) :math:`[^{\\circ}]`
+        """
+        if len(masteavstander) < 1:
+            raise ValueError("Strekningen må ha minst to mastepunkter.")
+        if punkter is None:
+            punkter = [{} for n in range(len(masteavstander) + 1)]
+        if not len(punkter) == len(masteavstander) + 1:
+            raise ValueError("Antall mastepunkter må være én mer enn antall masteavstander.")
+
+        self.i = i
+        self.masteavstander = [float(a) for a in masteavstander]
+        self.punkter = [dict(p) for p in punkter]
+        self.Dz_grense = Dz_grense
+        self.phi_grense = phi_grense
+        self.spenntabell = {}
+        self.resultater = [None] * len(self.punkter)
+        self._buffer = {}
+
+    def __len__(self):
+        return len(self.punkter)
+
+    def inndata(self, n):
+        """Henter inndata for mastepunkt ``n``.
+
+        :param int n: Mastepunktets indeks
+        :return: Inndata med masteavstander og endringer for mastepunktet
+        :rtype: :class:`Inndata`
+        """
+        return self.i.kopi(**self.endringer(n))
+
+    def endringer(self, n):
+        """Henter endringer i felles inndata for mastepunkt ``n``.
+
+        :param int n: Mastepunktets indeks
+        :return: Ordbok med masteavstander og endringer for mastepunktet
+        :rtype: :class:`dict`
+        """
+        a1, a2 = self._masteavstander(n)
+        endringer = {"a1": a1, "a2": a2}
+        endringer.update(self.punkter[n])
+        return endringer
+
+    def endre_masteavstand(self, k, a):
+        """Endrer masteavstanden mellom mastepunkt ``k`` og ``k+1``.
+
+        :param int k: Spennets indeks
+        :param float a: Ny masteavstand :math:`[m]`
+        :return: Indekser for mastepunkter som må beregnes på nytt
+        :rtype: :class:`list`
+        """
+        self.masteavstander[k] = float(a)
+        for n in (k, k + 1):
+            self.resultater[n] = None
+        return [k, k + 1]
+
+    def endre_punkt(self, n, **endringer):
+        """Endrer inndata for mastepunkt ``n``.
+
+        :param int n: Mastepunktets indeks
+        :param endringer: Parametre som skal endres, f.eks. ``h=9.0``
+        :return: Indekser for mastepunkter som må beregnes på nytt
+        :rtype: :class:`list`
+        """
+        self.i.kopi(**endringer)  # Kontrollerer parameternavn
+        self.punkter[n].update(endringer)
+        self.resultater[n] = None
+        return [n]
+
+    def sett_vindkasthastighetstrykk(self, v_b_0, region, H, terrengkategori=2, z=10.0,
+                                     c_dir=1.0, c_season=1.0, c_prob=1.0, C_0=1.0):
+        """Beregner vindkasthastighetstrykk for hvert mastepunkt fra stedets klimadata.
+
+        Parametrene gis enten felles for strekningen eller som én verdi
+        per mastepunkt. Nivåfaktoren beregnes med :func:`hjelpefunksjoner.c_alt`
+        og vindkasthastighetstrykket med
+        :func:`hjelpefunksjoner.vindkasthastighetstrykk` for samtlige
+        mastepunkter samlet.
+
+        :param float v_b_0: Referansevindhastighet :math:`[\\frac{m}{s}]`
+        :param str region: Region
+        :param float H: Høyde over havet :math:`[m]`
+        :param int terrengkategori: Terrengkategori
+        :param float z: Høyde over bakken :math:`[m]`
+        :param float c_dir: Retningsfaktor
+        :param float c_season: Årstidsfaktor
+        :param float c_prob: Faktor dersom returperioden er mer enn 50 år
+        :param float C_0: Terrengformfaktor
+        :return: Indekser for mastepunkter som må beregnes på nytt
+        :rtype: :class:`list`
+        """
+        n = len(self)
+        v_b_0, region, H = (numpy.broadcast_to(numpy.asarray(a), (n,)) for a in (v_b_0, region, H))
+        q_p = hjelpefunksjoner.vindkasthastighetstrykk(
+            v_b_0, c_dir, c_season, hjelpefunksjoner.c_alt(v_b_0, region, H), c_prob, C_0,
+            terrengkategori, z)[0]
+        endret = []
+        for k in range(n):
+            if not self.inndata(k).vindkasthastighetstrykk == q_p[k]:
+                endret.extend(self.endre_punkt(k, vindkasthastighetstrykk=float(q_p[k])))
+        return endret
+
+    def beregn(self):
+        """Beregner mastepunkter uten gyldig resultat.
+
+        For hvert mastepunkt finnes anbefalt gittermast og bjelkemast
+        med :func:`beregning.anbefal`.
+
+        :return: Anbefalt gittermast og bjelkemast for hvert mastepunkt
+        :rtype: :class:`list`
+        """
+        for n in range(len(self.punkter)):
+            if self.resultater[n] is not None:
+                continue
+            nokkel = self._masteavstander(n) + tuple(sorted(self.punkter[n].items()))
+            if nokkel not in self._buffer:
+                gittermast, bjelkemast, forkastet = beregning.anbefal(
+                    self.inndata(n), self.Dz_grense, self.phi_grense, self.spenntabell)
+                self._buffer[nokkel] = (gittermast, bjelkemast)
+            self.resultater[n] = self._buffer[nokkel]
+        return self.resultater
+
+    def oppsummering(self):
+        """Setter opp oppsummering for hvert mastepunkt.
+
+        :return: Ordbøker med masteavstander og anbefalte master
+         med utnyttelsesgrad for hvert mastepunkt
+        :rtype: :class:`list`
+        """
+        return [_oppsummering(self.inndata(n), gittermast, bjelkemast)
+                for n, (gittermast, bjelkemast) in enumerate(self.beregn())]
+
+    def _masteavstander(self, n):
+        """Henter masteavstander på begge sider av mastepunkt ``n``.
+
+        :param int n: Mastepunktets indeks
+        :return: Avstand forrige mast, avstand neste mast :math:`[m]`
+        :rtype: :class:`tuple`
+        """
+        a1 = self.masteavstander[n - 1] if n > 0 else self.masteavstander[0]
+        a2 = self.masteavstander[n] if n < len(self.masteavstander) else a1
+        return a1, a2
+
+
+def _oppsummering(i, gittermast, bjelkemast):
+    """Setter opp oppsummering for ett mastepunkt.
+
+    :param Inndata i: Inndata for mastepunktet
+    :param Mast gittermast: Anbefalt gittermast, ``None`` dersom ingen
+    :param Mast bjelkemast: Anbefalt bjelkemast, ``None`` dersom ingen
+    :return: Masteavstander og anbefalte master med utnyttelsesgrad
+    :rtype: :class:`dict`
+    """
+    rad = {"km": i.km, "mastenr": i.mastenr, "radius": i.radius,
+           "a1": i.a1, "a2": i.a2, "h": i.h}
+    for mastetype, mast in (("gittermast", gittermast), ("bjelkemast", bjelkemast)):
+        rad[mastetype] = mast.navn if mast is not None else None
+        rad["UR_" + mastetype] = (float(mast.tilstand_UR_max.utnyttelsesgrad)
+                                  if mast is not None else None)
+    return rad
+
+
+def les_strekning(i, sti, Dz_grense=None, phi_grense=None):
+    """Leser mastepunkter for en strekning fra .csv-fil.
+
+    Filen har én rad per mastepunkt i stigende rekkefølge etter
+    kilometrering, med kolonne ``km`` og eventuelle andre
+    inndataparametre (f.eks. ``radius``, ``h``, ``mastenr``).
+    Tomme felt gir verdien fra ``i``. Masteavstandene beregnes
+    fra kilometreringen.
+
+    :param Inndata i: Input fra bruker, felles for alle mastepunkter
+    :param str sti: Sti til .csv-fil
+    :param float Dz_grense: Største tillatte forskyvning :math:`D_z` (KL) :math:`[mm]`
+    :param float phi_grense: Største tillatte torsjonsvinkel :math:`\\phi` (KL) :math:`[^{\\circ}]`
+    :return: Strekning med mastepunkter fra filen
+    :rtype: :class:`Strekning`
+    """
+    punkter = []
+    with open(sti, 'r') as csvfile:
+        reader = csv.DictReader(csvfile, skipinitialspace=True)
+        for row in reader:
+            punkter.append({k: _tolk(i, k, v) for k, v in row.items() if v != ''})
+    km = [p["km"] for p in punkter]
+    masteavstander = [round(1000 * (km[n + 1] - km[n]), 6) for n in range(len(km) - 1)]
+    return Strekning(i, masteavstander, punkter, Dz_grense, phi_grense)
+
+
+def _tolk(i, navn, verdi):
+    """Konverterer verdi fra .csv-fil til samme type som inndataparameteren.
+
+    :param Inndata i: Input fra bruker
+    :param str navn: Parameterens navn
+    :param str verdi: Verdi fra .csv-fil
+    :return: Konvertert verdi
+    """
+    if not hasattr(i, navn):
+        raise AttributeError("Ukjent inndataparameter: {}".format(navn))
+    standard = getattr(i, navn)
+    if isinstance(standard, bool):
+        return verdi.strip().lower() in ("1", "true", "ja")
+    return type(standard)(verdi)
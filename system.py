@@ -4,7 +4,6 @@ import hjelpefunksjoner
 import math
 import numpy
 
-import lister
 
 
 class System(object):
@@ -84,6 +83,7 @@ class Ledning(object):
     G_sno_lett = 0.0
     rho_sno_tung = 0.0
     rho_sno_lett = 0.0
+    T_min = -40.0
     ec3 = True
 
     def __init__(self, navn="", type="", G_0=0.0, d=0.0, A=0.0, L=None, e=(0, 0, 0)):
@@ -182,7 +182,7 @@ class Fastavspent(Ledning):
     auto_differansestrekk = True
     differansestrekk_manuelt = 0.0
 
-    def __init__(self, E, alpha, s, n=1, isolatorvekt=0, **kwargs):
+    def __init__(self, E, alpha, s, n=1, isolatorvekt=0, spenntabell=None, **kwargs):
         """Initialiserer :class:`Fastavspent`-objekt.
 
         Strekk i ledning under forskjellige klimatiske forhold
@@ -195,6 +195,8 @@ class Fastavspent(Ledning):
         :param tuple s: Initiell strekkraft ved spennlengde hhv. (30m, 70m) :math:`[kN]`
         :param float n: Antall eksemplarer av gitt ledning
         :param float isolatorvekt: Vekt av isolator (per. ledning) :math:`[N]`
+        :param dict spenntabell: Spenntabell som deles mellom mastepunkter,
+         se :meth:`_strekklikevekt`
         :param kwargs: Argumenter til superklasse :class:`Ledning`
         """
         super().__init__(**kwargs)
@@ -202,6 +204,8 @@ class Fastavspent(Ledning):
         self.alpha = alpha
         self.n = n
         self.isolatorvekt = isolatorvekt
+        self.s_init = tuple(s)
+        self.spenntabell = spenntabell
         # Initialstrekk ved 5C (ingen snø)
         self.temperaturdata["5C"].update(self._strekk_initiell(s))
         # Bruker initialstrekk ved 5C som standard strekkverdi
@@ -210,8 +214,8 @@ class Fastavspent(Ledning):
         self.temperaturdata["0C"].update(self._strekk(G_sno=Ledning.G_sno_tung, T=0))
         # Strekk ved -25C (lett snø)
         self.temperaturdata["-25C"].update(self._strekk(G_sno=Ledning.G_sno_lett, T=-25))
-        # Strekk ved -40C (ingen snø)
-        self.temperaturdata["-40C"].update(self._strekk(G_sno=0.0, T=-40))
+        # Strekk ved laveste temperatur, normalt -40C (ingen snø)
+        self.temperaturdata["-40C"].update(self._strekk(G_sno=0.0, T=Ledning.T_min))
 
 
     def _strekk_initiell(self, s_init):
@@ -263,6 +267,13 @@ class Fastavspent(Ledning):
 
         Løsningen finnes ved å finne den reelle, positive egenverdien
         tilhørende "companion matrix" for residualfunksjonens koeffisienter.
+        Dersom ledningen har en spenntabell, slås resultatet opp i tabellen
+        før likevekten eventuelt løses. Tabellen har én oppføring per spenn,
+        gitt ved ledningens tabulerte data, referansespennet ``a_mid`` som
+        initialstrekket ved :math:`T=5^{\\circ}C` interpoleres for og
+        spennlengden ``L``. Hver oppføring inneholder kabelstrekket for
+        alle beregnede klimatilstander :math:`(G_{sno}, T)`, og deles av
+        samtlige mastepunkter med samme spenn og referansespenn.
 
         :param float H_0: Initiell spennkraft i kabel :math:`[N]`
         :param float E: Kabelens E-modul :math:`[\\frac{N}{mm^2}]`
@@ -280,6 +291,24 @@ class Fastavspent(Ledning):
             H_0 = H_0
         else:
             H_0 = self.temperaturdata["5C"]["s"]
+        if self.spenntabell is None:
+            return self._kabellikevekt(L, G_sno, T, H_0)
+        spenn = (self.E, self.A, self.G_0, self.alpha) + self.s_init + (Ledning.a_mid, L)
+        klima = self.spenntabell.setdefault(spenn, {})
+        if (G_sno, T) not in klima:
+            klima[(G_sno, T)] = self._kabellikevekt(L, G_sno, T, H_0)
+        return klima[(G_sno, T)]
+
+    def _kabellikevekt(self, L, G_sno, T, H_0):
+        """Løser kabellikevekten, se :meth:`_strekklikevekt`.
+
+        :param float L: Masteavstand :math:`[m]`
+        :param float G_sno: Egenvekt snølast :math:`[\\frac{N}{m}]`
+        :param float T: Lufttemperatur :math:`[^{\\circ}C]`
+        :param float H_0: Initiell spennkraft i kabel :math:`[N]`
+        :return: Endelig kabelstrekk ``H_x`` :math:`[N]`
+        :rtype: :class:`float`
+        """
         E = self.E
         A = self.A
         G_0 = self.G_0
@@ -298,15 +327,35 @@ class Fastavspent(Ledning):
         return H_x
 
 
-def hent_system(i):
+def hent_islast(i):
+    """Henter linjelast for lett snø :math:`G_{sno,lett}`.
+
+    Islasten ``i.islast`` benyttes dersom den er gitt,
+    ellers hentes verdien fra isklassen ``i.isklasse``.
+
+    :param Inndata i: Input fra bruker
+    :return: Linjelast lett snø :math:`[\\frac{N}{m}]`
+    :rtype: :class:`float`
+    """
+    if i.islast is not None:
+        return float(i.islast)
+    return float(i.isklasse[i.isklasse.find("(")+1:i.isklasse.find("N")-1])
+
+
+def hent_system(i, spenntabell=None):
     """Henter :class:`System` med data for ledninger, utliggere og strømavtaker.
 
-    Ledningenes strekkraft ved snøfri line og :math:`T = -40^{\\circ}C`
+    Ledningenes strekkraft ved snøfri line og laveste temperatur
+    ``i.T_min`` (normalt :math:`T = -40^{\\circ}C`)
     samt strekk ved snøbelastet line og :math:`T = -25^{\\circ}C` beregnes
     via en kabellikevekt ut fra tabulerte verdier for
     kabelstrekk ved :math:`T = 5^{\\circ}C`.
 
+    Kabelstrekk for fastavspente ledninger slås opp i ``spenntabell``
+    dersom den er gitt, se :meth:`Fastavspent._strekklikevekt`.
+
     :param Inndata i: Input fra bruker
+    :param dict spenntabell: Spenntabell som deles mellom mastepunkter
     :return: Systemkonfigurasjon
     :rtype: :class:`System`
     """
@@ -318,10 +367,11 @@ def hent_system(i):
     Ledning.delta_h1 = i.delta_h1
     Ledning.delta_h2 = i.delta_h2
     Ledning.sporhoyde_e = i.e
-    Ledning.G_sno_lett = float(i.isklasse[i.isklasse.find("(")+1:i.isklasse.find("N")-1])
+    Ledning.G_sno_lett = hent_islast(i)
     Ledning.G_sno_tung = Ledning.G_sno_lett * 2
     Ledning.rho_sno_tung = 700
     Ledning.rho_sno_lett = 600
+    Ledning.T_min = i.T_min
     Ledning.ec3 = i.ec3
     Fastavspent.auto_differansestrekk = i.auto_differansestrekk
     Fastavspent.differansestrekk_manuelt = i.differansestrekk
@@ -395,25 +445,25 @@ def hent_system(i):
     Al_240_61 = Fastavspent(
         navn="Al 240-61", type="Forbigangsledning", G_0=6.43, d=20.3,
         A=242.54, E=56000, alpha=2.3 * 10 ** (-5), s=(2.48, 2.78),
-        isolatorvekt=150, e=[-i.hf, 0, e_z_forbigang])
+        isolatorvekt=150, e=[-i.hf, 0, e_z_forbigang], spenntabell=spenntabell)
     # Returledninger
     Al_240_61_iso = Fastavspent(
         navn="Al 240-61 isolert", type="Returledninger", G_0=7.63,
         d=23.9, A=242.54, E=56000, alpha=2.3 * 10 ** (-5), s=(2.95,
-        3.28), n=2, isolatorvekt=100, e=[-i.hr, 0, -0.5])
+        3.28), n=2, isolatorvekt=100, e=[-i.hr, 0, -0.5], spenntabell=spenntabell)
     # Mate-/fjernledninger
     ending = "er" if i.matefjern_antall > 1 else ""
     SAHF_120_26_7 = Fastavspent(
         navn="SAHF 120 Feral",
         type="Mate-/fjernledning{}".format(ending), G_0=7.56, d=19.38,
         A=222.35, E=76000, alpha=1.9 * 10 ** (-5), s=(2.77, 3.06),
-        n=i.matefjern_antall, isolatorvekt=110, e=[-i.hfj, 0, 0])
+        n=i.matefjern_antall, isolatorvekt=110, e=[-i.hfj, 0, 0], spenntabell=spenntabell)
     # Fiberoptiske kabler
     # Det antas en (konservativ) oppspenningskraft på 1.5kN for fiberoptisk kabel.
     ADSS_GRHSLLDV_9_125 = Fastavspent(
         navn="ADSS GRHSLLDV 9/125", type="Fiberoptisk ledning",
         G_0=2.65, d=18.5, A=268.9, E=12000, alpha=3.94 * 10 ** (-5),
-        s=(1.5, 1.5), e=[-i.hf, 0, -0.3])
+        s=(1.5, 1.5), e=[-i.hf, 0, -0.3], spenntabell=spenntabell)
     # AT-ledninger
     # Ved manglende strekktabeller for Al 400-37 og 240-19 er verdier for
     # Al 400-61 og 240-61 benyttet. Strekkverdier for Al 150-19 ekstrapoleres
@@ -422,15 +472,15 @@ def hent_system(i):
     Al_400_37 = Fastavspent(
         navn="Al 400-37", type="AT-ledninger", G_0=10.31, d=25.34,
         A=381.0, E=56000, alpha=2.3 * 10 ** (-5), s=(4.09, 4.59), n=2,
-        e=e_at)
+        e=e_at, spenntabell=spenntabell)
     Al_240_19 = Fastavspent(
         navn="Al 240-19", type="AT-ledninger", G_0=6.46, d=20.0,
         A=238.76, E=56000, alpha=2.3 * 10 ** (-5), s=(2.48, 2.78), n=2,
-        e=e_at)
+        e=e_at, spenntabell=spenntabell)
     Al_150_19 = Fastavspent(
         navn="Al 150-19", type="AT-ledninger", G_0=4.07, d=15.9,
         A=150.90, E=56000, alpha=2.3 * 10 ** (-5), s=(0.4 * 4.09, 0.4 *
-        4.59), n=2, e=e_at)
+        4.59), n=2, e=e_at, spenntabell=spenntabell)
     # Jordledninger
     e_z_jord = -0.3
     if not i.matefjern_ledn and not i.at_ledn and not i.forbigang_ledn:
@@ -438,10 +488,10 @@ def hent_system(i):
     e_jord = [-i.hj, 0, e_z_jord]
     KHF_70 = Fastavspent(
         navn="KHF-70", type="Jordledning", G_0=5.81, d=10.5, A=66.75,
-        E=116000, alpha=1.7 * 10 ** (-5), s=(2.09, 2.25), e=e_jord)
+        E=116000, alpha=1.7 * 10 ** (-5), s=(2.09, 2.25), e=e_jord, spenntabell=spenntabell)
     KHF_95 = Fastavspent(
         navn="KHF-95", type="Jordledning", G_0=8.25, d=12.5, A=94.7,
-        E=116000, alpha=1.7 * 10 ** (-5), s=(2.97, 3.20), e=e_jord)
+        E=116000, alpha=1.7 * 10 ** (-5), s=(2.97, 3.20), e=e_jord, spenntabell=spenntabell)
     # Utliggere (s2x for system 20A/20B/25, s3x for system 35)
     utligger_s2x = {"Egenvekt": 170, "Momentarm": 0.35}
     utligger_s3x = {"Egenvekt": 200, "Momentarm": 0.40}
@@ -503,28 +553,20 @@ def _beregn_arm(systemnavn, radius, sms, fh, strekkutligger, B1):
     Det antas i dette tilfellet at én mast har trykkutligger, mens
     den andre har strekkutligger.
 
-    :param int radius: Sporkurvaturens radius :math:`[m]`
+    :param float radius: Sporkurvaturens radius :math:`[m]`
     :param float sms: Avstand senter mast - senter spor :math:`[m]`
     :param float fh: Kontakttrådhøyde :math:`[m]`
     :param float B1: Første sikksakkverdi :math:`[m]`
     :return: Momentarmer ``arm`` og ``arm_sum`` :math:`[m]`
     :rtype: :class:`float`
     """
-    r = radius
     b = abs(B1)
     # Overhøyde, UE i [m], pga kurveradius i [m]
-    if systemnavn=="20A":
-        ue = lister.D_20A
-    elif systemnavn == "20B":
-        ue = lister.D_20B_35
-    elif systemnavn=="25":
-        ue = lister.D_25
-    else:  # System 35
-        ue = lister.D_20B_35
+    ue = hjelpefunksjoner.overhoyde(systemnavn, radius)
     # Momentarm [m] for strekkutligger
-    a_T = sms + fh * (ue[str(r)] / 1.435) - b
+    a_T = sms + fh * (ue / 1.435) - b
     # Momentarm [m] for trykkutligger
-    a_T_dot = sms - fh * (ue[str(r)] / 1.435) + b
+    a_T_dot = sms - fh * (ue / 1.435) + b
     arm = a_T
     if not strekkutligger:
         arm = a_T_dot
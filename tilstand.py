@@ -110,6 +110,8 @@ class Tilstand(object):
 
         Funksjonen undersøker utnyttelsesgrad for alle relevante
         bruddsituasjoner, og returnerer den høyeste verdien.
+        Kontrollen gjøres med :func:`utnyttelsesgrad`, som også
+        lagrer dimensjonerende faktorer.
 
         :param Inndata i: Input fra bruker
         :param Mast mast: Aktuell mast
@@ -118,56 +120,16 @@ class Tilstand(object):
         :rtype: :class:`float`
         """
 
-        u = self.N_kap + self.My_kap + self.Mz_kap
-
         A, B = self._beregn_momentfordeling()
 
         self.dimensjonerende_faktorer["A (M_vind)"] = A
         self.dimensjonerende_faktorer["B (M_punkt)"] = B
         self.dimensjonerende_faktorer["bredde_fot [mm]"] = mast.bredde(mast.h)
 
-        # Konverterer [Nm] til [Nmm]
-        My_Ed, Mz_Ed = 1000 * abs(K[0]), 1000 * abs(K[2])
-        Vy_Ed, Vz_Ed, N_Ed = abs(K[1]), abs(K[3]), abs(K[4])
-
-        My_Rk, Mz_Rk, N_Rk = mast.My_Rk, mast.Mz_Rk, mast.N_Rk
-
-        self.dimensjonerende_faktorer["My_Rk"] = My_Rk / 10**6  # [kNm]
-        self.dimensjonerende_faktorer["Mz_Rk"] = Mz_Rk / 10**6  # [kNm]
-        self.dimensjonerende_faktorer["N_Rk"] = N_Rk / 1000  # [kN]
-
-        X_y, lam_y = self._reduksjonsfaktor_knekking(mast, "y")
-        X_z, lam_z = self._reduksjonsfaktor_knekking(mast, "z")
-        X_LT = self._reduksjonsfaktor_vipping(mast, A, B, My_Ed)
-
-        self.dimensjonerende_faktorer["X_y"] = X_y
-        self.dimensjonerende_faktorer["lam_y"] = lam_y
-        self.dimensjonerende_faktorer["X_z"] = X_z
-        self.dimensjonerende_faktorer["lam_z"] = lam_z
-        self.dimensjonerende_faktorer["X_LT"] = X_LT
-
-        k_yy, k_yz, k_zy, k_zz = self._interaksjonsfaktorer(mast, lam_y, N_Ed, X_y, X_z, lam_z)
+        UR = utnyttelsesgrad(mast, K[None, :], numpy.array([A]),
+                             faktorer=self.dimensjonerende_faktorer)
 
-        self.dimensjonerende_faktorer["k_yy"] = k_yy
-        self.dimensjonerende_faktorer["k_yz"] = k_yz
-        self.dimensjonerende_faktorer["k_zy"] = k_zy
-        self.dimensjonerende_faktorer["k_zz"] = k_zz
-
-        # EC3, 6.3.3(4) ligning (6.61)
-        UR_y = mast.materialkoeff*(N_Ed/(X_y*N_Rk) + k_yy*My_Ed/(X_LT*My_Rk) + k_yz*Mz_Ed/Mz_Rk)
-
-        # EC3, 6.3.3(4) ligning (6.62)
-        UR_z = mast.materialkoeff*(N_Ed/(X_z*N_Rk) + k_zy*My_Ed/(X_LT*My_Rk) + k_zz*Mz_Ed/Mz_Rk)
-
-        UR_d, UR_g = self._knekking_lokal(mast, My_Ed, Mz_Ed, Vy_Ed, Vz_Ed, N_Ed)
-
-        self.dimensjonerende_faktorer["UR_diag"] = UR_d
-        self.dimensjonerende_faktorer["UR_gurt"] = UR_g
-        self.dimensjonerende_faktorer["UR_y"] = UR_y
-        self.dimensjonerende_faktorer["UR_z"] = UR_z
-        self.dimensjonerende_faktorer["UR"] = max(u, UR_y, UR_z, UR_d, UR_g)
-
-        return max(u, UR_y, UR_z, UR_d, UR_g)
+        return float(UR[0])
 
     def _beregn_momentfordeling(self):
         """Beregner momentandeler til kritisk moment.
@@ -187,7 +149,7 @@ class Tilstand(object):
         if self.vindretning == 0 or 1:
             M_total = self.K[0]
             for j in self.F:
-                if not numpy.count_nonzero(j.q) == 0:
+                if j.fordelt:
                     M_vind += j.q[2] * j.b * (-j.e[0])
             M_vind *= self.faktorer["V"] * self.faktorer["psi_V"]
 
@@ -195,7 +157,7 @@ class Tilstand(object):
         elif self.vindretning == 2:
             M_total = self.K[2]
             for j in self.F:
-                if not numpy.count_nonzero(j.q) == 0:
+                if j.fordelt:
                     M_vind += j.q[1] * j.b * (-j.e[0])
             M_vind *= self.faktorer["V"] * self.faktorer["psi_V"]
 
@@ -204,183 +166,255 @@ class Tilstand(object):
 
         return A, B
 
-    def _reduksjonsfaktor_knekking(self, mast, akse):
-        """Beregner reduksjonsfaktor for stavknekking etter NS-EN 1993-1-1 seksjon 6.3.1.2.
-
-        ``akse`` styrer beregning om hhv. sterk og svak akse:
-
-        - y: Beregner knekkfaktorer om mastas sterke akse
-        - z: Beregner knekkfaktorer om mastas svake akse
-
-        :param Mast mast: Aktuell mast
-        :param str akse: Aktuell akse
-        :return: Reduksjonsfaktor for stavknekking ``X`` for knekking, slankhet ``lam``
-        :rtype: :class:`float`, :class:`float`
-        """
-
-        if akse == "y":
-            lam = mast.lam_y
-            alpha = 0.34 if not mast.type == "B" else 0.49
-            phi = 0.5 * (1 + alpha * (lam - 0.2) + lam ** 2)
-            X = 1 / (phi + math.sqrt(phi ** 2 - lam ** 2))
-
-            self.dimensjonerende_faktorer["N_cr_y"] = mast.N_cr_y / 1000  # [kN]
-            self.dimensjonerende_faktorer["lam_y"] = lam
-            self.dimensjonerende_faktorer["alpha_y"] = alpha
-
-        else:  # z-akse
-            lam = mast.lam_z
-            alpha = 0.49 if not mast.type == "H" else 0.34
-            phi = 0.5 * (1 + alpha * (lam - 0.2) + lam ** 2)
-            X = 1 / (phi + math.sqrt(phi ** 2 - lam ** 2))
-
-            self.dimensjonerende_faktorer["N_cr_z"] = mast.N_cr_z / 1000  # [kN]
-            self.dimensjonerende_faktorer["lam_z"] = lam
-            self.dimensjonerende_faktorer["alpha_z"] = alpha
-
-        X = X if X <= 1.0 else 1.0
-
-        return X, lam
-
-    def _reduksjonsfaktor_vipping(self, mast, A, B, My_Ed):
-        """Bestemmer reduksjonsfaktoren for vipping etter NS-EN 1993-1-1 seksjon 6.3.2.2 og 6.3.2.3.
-
-        Det antas at alle laster angriper midt i tverrsnittet,
-        dvs. :math:`z_a = 0`.
-
-        :param Mast mast: Aktuell mast
-        :param float A: Momentandel fra vindlast
-        :param float B: Momentandel fra punktlaster
-        :return: Reduksjonsfaktor for vipping
-        :rtype: :class:`float`
-        """
-
-        X_LT = 1.0
-
-        if not mast.type == "H":
-            psi_vind, psi_punkt = 2.05, 1.28
-            M_cr = (A * psi_vind + B * psi_punkt) * mast.M_cr_0
-            lam_LT = math.sqrt(mast.My_Rk / M_cr)
-
-            if mast.type == "B":
-                alpha_LT = 0.76
-                phi_LT = 0.5 * (1 + alpha_LT * (lam_LT - 0.2) + lam_LT**2)
-                X_LT = 1 / (phi_LT + math.sqrt(phi_LT**2 - lam_LT**2))
-                X_LT = X_LT if X_LT <= 1.0 else 1.0
-            else:  # bjelke
-                alpha_LT = 0.34
-                lam_LT_0, beta_LT = 0.4, 0.75
-                phi_LT = 0.5 * (1 + alpha_LT * (lam_LT - lam_LT_0) + beta_LT * lam_LT**2)
-                X_LT = 1 / (phi_LT + math.sqrt(phi_LT**2 - beta_LT * lam_LT**2))
-                if X_LT > min(1.0, (1 / lam_LT**2)):
-                    X_LT = min(1.0, (1 / lam_LT**2))
-
-                self.dimensjonerende_faktorer["lam_LT_0"] = lam_LT_0
-                self.dimensjonerende_faktorer["beta_LT"] = beta_LT
-
-            self.dimensjonerende_faktorer["alpha_LT"] = alpha_LT
-            self.dimensjonerende_faktorer["phi_LT"] = phi_LT
-            self.dimensjonerende_faktorer["C_W [10^-7 m^6]"] = mast.Cw / 1000**6 * 10**7
-            self.dimensjonerende_faktorer["I_T [10^-7 m^4]"] = mast.It / 1000**4 * 10**7
-            self.dimensjonerende_faktorer["I_z [10^-7 m^4]"] = mast.Iz(mast.h) / 10**7
-            self.dimensjonerende_faktorer["I_y [10^-7 m^4]"] = mast.Iy(mast.h) / 10**7
-            self.dimensjonerende_faktorer["psi_v"] = mast.psi_v
-            self.dimensjonerende_faktorer["M_cr_0"] = mast.M_cr_0 / 10**6  # [kNm]
-            self.dimensjonerende_faktorer["M_cr"] = M_cr / 10**6  # [kNm]
-            self.dimensjonerende_faktorer["lam_LT"] = lam_LT
-
-        return X_LT
-
-    def _interaksjonsfaktorer(self, mast, lam_y, N_Ed, X_y, X_z, lam_z):
-        """Beregner interaksjonsfaktorer etter NS-EN 1993-1-1 tabell B.2.
-
-        Det antas at alle master tilhører tverrsnittsklasse #1.
-
-        :param Mast mast: Aktuell mast
-        :param float lam_y: Relativ slankhet for knekking om y-aksen
-        :param float N_Ed: Dimensjonerende aksialkraft :math:`[N]`
-        :param float X_y: Reduksjonsfaktor for knekking om y-aksen
-        :param float X_z: Reduksjonsfaktor for knekking om z-aksen
-        :param float lam_z: Relativ slankhet for knekking om y-aksen
-        :return: Interaksjonsfaktorer ``k_yy``, ``k_yz``, ``k_zy``, ``k_zz``
-        :rtype: :class:`float`, :class:`float`, :class:`float`, :class:`float`
-        """
-
-        N_Rk = mast.N_Rk
-        matkoeff = mast.materialkoeff
-
-        k_yy = 0.6 * (1 + (lam_y - 0.2) * (matkoeff * N_Ed / (X_y*N_Rk)))
-        k_yy_max = 0.6 * (1 + 0.8 * (matkoeff * N_Ed / (X_y*N_Rk)))
-        if k_yy > k_yy_max:
-            k_yy = k_yy_max
-
-        if lam_z < 0.4:
-            k_zy = 0.6 + lam_z
-            k_zy_max = 1 - (0.1 * lam_z / (0.6 - 0.25)) * (matkoeff * N_Ed / (X_z*N_Rk))
-            if k_zy > k_zy_max:
-                k_zy = k_zy_max
-        else:
-            k_zy_1 = 1 - (0.1 * lam_z / (0.6 - 0.25)) * (matkoeff * N_Ed / (X_z*N_Rk))
-            k_zy_2 = 1 - (0.1 / (0.6 - 0.25)) * (matkoeff * N_Ed / (X_z*N_Rk))
-            k_zy = max(k_zy_1, k_zy_2)
-
-        k_zz = 0.6 * (1 + (2 * lam_z - 0.6) * (matkoeff * N_Ed / (X_z*N_Rk)))
-        k_zz_max = 0.6 * (1 + 1.4 * (matkoeff * N_Ed / (X_z*N_Rk)))
-        if k_zz > k_zz_max:
-            k_zz = k_zz_max
-
-        k_yz = 0.6 * k_zz
-
-        return k_yy, k_yz, k_zy, k_zz
-
-    def _knekking_lokal(self, mast, My_Ed, Mz_Ed, Vy_Ed, Vz_Ed, N_Ed):
-        """Beregner utnyttelsesgrad for lokal stavknekking etter NS-EN 1993-1-1 seksjon 6.3.1.2.
-
-        :param Mast mast: Aktuell mast
-        :param float My_Ed: Dimensjonerende moment om mastas y-akse :math:`[Nmm]`
-        :param float Mz_Ed: Dimensjonerende moment om mastas z-akse :math:`[Nmm]`
-        :param float Vy_Ed: Dimensjonerende skjærkraft parallelt mastas y-akse :math:`[N]`
-        :param float Vz_Ed: Dimensjonerende skjærkraft parallelt mastas z-akse :math:`[N]`
-        :param float N_Ed: Dimensjonerende normaltkraft i masta :math:`[N]`
-        :return: Utnyttelsesgrader for diagonal og gurt, ``UR_d`` og ``UR_g``
-        :rtype: :class:`float`, :class:`float`
-        """
 
-        matkoeff = mast.materialkoeff
-        UR_d, UR_g = 0, 0
-
-        if not mast.type == "bjelke":
-            if mast.type == "H":
-                # Gurt (L-profil)
-                N_Ed_g = 0.5*(My_Ed/mast.bredde(mast.h-1) + Mz_Ed/mast.bredde(mast.h-1)) + N_Ed/4
-                # Diagonalstav
-                N_Ed_d = max(Vy_Ed, Vz_Ed) / math.sqrt(2)
-            else:  # B-mast
-                # Gurt (U-profil)
-                N_Ed_g = My_Ed/mast.bredde(mast.h - 1) + Mz_Ed/mast.bredde(mast.h - 1) + N_Ed/2
-                # Diagonalstav
-                N_Ed_d = Vz_Ed * math.sqrt(2)
-
-            phi_g = 0.5 * (1 + mast.alpha_g * (mast.lam_g - 0.2) + mast.lam_g**2)
-            X_g = 1 / (phi_g + math.sqrt(phi_g**2 - mast.lam_g**2))
-            UR_g = matkoeff*N_Ed_g / (X_g*mast.A_profil*mast.fy)
-
-            phi_d = 0.5 * (1 + mast.alpha_d * (mast.lam_d - 0.2) + mast.lam_d**2)
-            X_d = 1 / (phi_d + math.sqrt(phi_d**2 - mast.lam_d**2))
-            UR_d = matkoeff*N_Ed_d / (X_d*mast.d_A*mast.fy)
-
-            self.dimensjonerende_faktorer["N_Ed_gurt"] = N_Ed_g / 1000  # [kN]
-            self.dimensjonerende_faktorer["N_cr_gurt"] = mast.N_cr_g / 1000  # [kN]
-            self.dimensjonerende_faktorer["alpha_gurt"] = mast.alpha_g
-            self.dimensjonerende_faktorer["lam_gurt"] = mast.lam_g
-            self.dimensjonerende_faktorer["phi_gurt"] = phi_g
-            self.dimensjonerende_faktorer["X_gurt"] = X_g
-
-            self.dimensjonerende_faktorer["N_Ed_diag"] = N_Ed_d / 1000  # [kN]
-            self.dimensjonerende_faktorer["N_cr_diag"] = mast.N_cr_d / 1000  # [kN]
-            self.dimensjonerende_faktorer["alpha_diag"] = mast.alpha_d
-            self.dimensjonerende_faktorer["lam_diag"] = mast.lam_d
-            self.dimensjonerende_faktorer["phi_diag"] = phi_d
-            self.dimensjonerende_faktorer["X_diag"] = X_d
-
-        return UR_d, UR_g
+def kapasitetsparametre(mast):
+    """Beregner parametre for kapasitetskontroll som kun avhenger av masten.
+
+    Reduksjonsfaktorer for knekking etter NS-EN 1993-1-1 seksjon 6.3.1.2,
+    samt bredde og reduksjonsfaktorer for lokal knekking av gurt og
+    diagonal for gittermaster.
+
+    :param Mast mast: Aktuell mast
+    :return: Parametre {navn: verdi} til bruk i :func:`utnyttelsesgrad`
+    :rtype: :class:`dict`
+    """
+    parametre = {}
+
+    for akse, lam, alpha in (("y", mast.lam_y, 0.34 if not mast.type == "B" else 0.49),
+                             ("z", mast.lam_z, 0.49 if not mast.type == "H" else 0.34)):
+        phi = 0.5 * (1 + alpha * (lam - 0.2) + lam ** 2)
+        X = 1 / (phi + math.sqrt(phi ** 2 - lam ** 2))
+        parametre["X_" + akse] = X if X <= 1.0 else 1.0
+        parametre["alpha_" + akse] = alpha
+
+    if not mast.type == "bjelke":
+        parametre["b"] = mast.bredde(mast.h - 1)
+        for stav, lam, alpha in (("gurt", mast.lam_g, mast.alpha_g),
+                                 ("diag", mast.lam_d, mast.alpha_d)):
+            phi = 0.5 * (1 + alpha * (lam - 0.2) + lam**2)
+            parametre["phi_" + stav] = phi
+            parametre["X_" + stav] = 1 / (phi + math.sqrt(phi**2 - lam**2))
+
+    return parametre
+
+
+def utnyttelsesgrad(mast, K, A=None, parametre=None, faktorer=None):
+    """Beregner utnyttelsesgrad for flere lasttilstander samtidig.
+
+    Funksjonen undersøker utnyttelsesgrad for alle relevante
+    bruddsituasjoner etter NS-EN 1993-1-1, og returnerer den høyeste
+    verdien for hver tilstand. Som ved :func:`max` ses det bort fra
+    kriterier som gir ``nan``.
+
+    Dersom momentandelen ``A`` ikke er gitt, settes reduksjonsfaktoren
+    for vipping lik øvre grense :math:`\\chi_{LT} = 1.0`, og ledd med
+    negativ interaksjonsfaktor ses bort fra. Resultatet er da en nedre
+    grense for utnyttelsesgraden, se :func:`utvelgelse.nedre_grense_utnyttelse`.
+
+    :param Mast mast: Aktuell mast
+    :param numpy.array K: Dimensjonerende reaksjonskrefter [tilstand, kolonne]
+    :param numpy.array A: Momentandel fra vindlast per tilstand
+    :param dict parametre: Parametre fra :func:`kapasitetsparametre`, beregnes dersom ikke gitt
+    :param dict faktorer: Lagrer dimensjonerende faktorer for første tilstand dersom gitt
+    :return: Utnyttelsesgrad per tilstand
+    :rtype: :class:`numpy.array`
+    """
+    if parametre is None:
+        parametre = kapasitetsparametre(mast)
+    matkoeff = mast.materialkoeff
+
+    u = (numpy.abs(K[:, 4] * matkoeff / (mast.fy * mast.A))
+         + numpy.abs(1000 * K[:, 0] * matkoeff / (mast.fy * mast.Wy_el))
+         + numpy.abs(1000 * K[:, 2] * matkoeff / (mast.fy * mast.Wz_el)))
+
+    # Konverterer [Nm] til [Nmm]
+    My_Ed, Mz_Ed = 1000 * numpy.abs(K[:, 0]), 1000 * numpy.abs(K[:, 2])
+    Vy_Ed, Vz_Ed, N_Ed = numpy.abs(K[:, 1]), numpy.abs(K[:, 3]), numpy.abs(K[:, 4])
+    My_Rk, Mz_Rk, N_Rk = mast.My_Rk, mast.Mz_Rk, mast.N_Rk
+
+    X_y, X_z = parametre["X_y"], parametre["X_z"]
+    lam_y, lam_z = mast.lam_y, mast.lam_z
+
+    if A is None or mast.type == "H":
+        X_LT = numpy.ones(len(K))
+    else:
+        X_LT = _reduksjonsfaktor_vipping(mast, numpy.asarray(A), faktorer)
+
+    k_yy, k_yz, k_zy, k_zz = _interaksjonsfaktorer(mast, N_Ed, X_y, X_z)
+
+    # EC3, 6.3.3(4) ligning (6.61) og (6.62)
+    vipping_y = k_yy*My_Ed/(X_LT*My_Rk)
+    vipping_z = k_zy*My_Ed/(X_LT*My_Rk)
+    if A is None and not mast.type == "H":
+        # chi_LT <= 1.0 gir kun nedre grense for ledd med ikke-negativ faktor
+        vipping_y = numpy.where(k_yy >= 0, vipping_y, -numpy.inf)
+        vipping_z = numpy.where(k_zy >= 0, vipping_z, -numpy.inf)
+    UR_y = matkoeff*(N_Ed/(X_y*N_Rk) + vipping_y + k_yz*Mz_Ed/Mz_Rk)
+    UR_z = matkoeff*(N_Ed/(X_z*N_Rk) + vipping_z + k_zz*Mz_Ed/Mz_Rk)
+
+    UR_d, UR_g = numpy.zeros(len(K)), numpy.zeros(len(K))
+    if not mast.type == "bjelke":
+        UR_d, UR_g = _knekking_lokal(mast, parametre, My_Ed, Mz_Ed, Vy_Ed, Vz_Ed, N_Ed, faktorer)
+
+    UR = u
+    for kriterium in (UR_y, UR_z, UR_d, UR_g):
+        UR = numpy.where(kriterium > UR, kriterium, UR)
+
+    if faktorer is not None:
+        faktorer["My_Rk"] = My_Rk / 10**6  # [kNm]
+        faktorer["Mz_Rk"] = Mz_Rk / 10**6  # [kNm]
+        faktorer["N_Rk"] = N_Rk / 1000  # [kN]
+        faktorer["N_cr_y"] = mast.N_cr_y / 1000  # [kN]
+        faktorer["N_cr_z"] = mast.N_cr_z / 1000  # [kN]
+        faktorer["alpha_y"] = parametre["alpha_y"]
+        faktorer["alpha_z"] = parametre["alpha_z"]
+        faktorer["X_y"] = X_y
+        faktorer["lam_y"] = lam_y
+        faktorer["X_z"] = X_z
+        faktorer["lam_z"] = lam_z
+        faktorer["X_LT"] = X_LT[0]
+        faktorer["k_yy"] = k_yy[0]
+        faktorer["k_yz"] = k_yz[0]
+        faktorer["k_zy"] = k_zy[0]
+        faktorer["k_zz"] = k_zz[0]
+        faktorer["UR_diag"] = UR_d[0]
+        faktorer["UR_gurt"] = UR_g[0]
+        faktorer["UR_y"] = UR_y[0]
+        faktorer["UR_z"] = UR_z[0]
+        faktorer["UR"] = UR[0]
+
+    return UR
+
+
+def _reduksjonsfaktor_vipping(mast, A, faktorer=None):
+    """Bestemmer reduksjonsfaktoren for vipping etter NS-EN 1993-1-1 seksjon 6.3.2.2 og 6.3.2.3.
+
+    Det antas at alle laster angriper midt i tverrsnittet,
+    dvs. :math:`z_a = 0`.
+
+    :param Mast mast: Aktuell mast, B-mast eller bjelkemast
+    :param numpy.array A: Momentandel fra vindlast per tilstand
+    :param dict faktorer: Lagrer dimensjonerende faktorer for første tilstand dersom gitt
+    :return: Reduksjonsfaktor for vipping per tilstand
+    :rtype: :class:`numpy.array`
+    """
+    psi_vind, psi_punkt = 2.05, 1.28
+    M_cr = (A * psi_vind + (1 - A) * psi_punkt) * mast.M_cr_0
+    lam_LT = numpy.sqrt(mast.My_Rk / M_cr)
+
+    if mast.type == "B":
+        alpha_LT = 0.76
+        phi_LT = 0.5 * (1 + alpha_LT * (lam_LT - 0.2) + lam_LT**2)
+        X_LT = 1 / (phi_LT + numpy.sqrt(phi_LT**2 - lam_LT**2))
+        X_LT = numpy.where(X_LT <= 1.0, X_LT, 1.0)
+    else:  # bjelke
+        alpha_LT = 0.34
+        lam_LT_0, beta_LT = 0.4, 0.75
+        phi_LT = 0.5 * (1 + alpha_LT * (lam_LT - lam_LT_0) + beta_LT * lam_LT**2)
+        X_LT = 1 / (phi_LT + numpy.sqrt(phi_LT**2 - beta_LT * lam_LT**2))
+        X_LT_max = numpy.where(1 / lam_LT**2 < 1.0, 1 / lam_LT**2, 1.0)
+        X_LT = numpy.where(X_LT > X_LT_max, X_LT_max, X_LT)
+
+        if faktorer is not None:
+            faktorer["lam_LT_0"] = lam_LT_0
+            faktorer["beta_LT"] = beta_LT
+
+    if faktorer is not None:
+        faktorer["alpha_LT"] = alpha_LT
+        faktorer["phi_LT"] = phi_LT[0]
+        faktorer["C_W [10^-7 m^6]"] = mast.Cw / 1000**6 * 10**7
+        faktorer["I_T [10^-7 m^4]"] = mast.It / 1000**4 * 10**7
+        faktorer["I_z [10^-7 m^4]"] = mast.Iz(mast.h) / 10**7
+        faktorer["I_y [10^-7 m^4]"] = mast.Iy(mast.h) / 10**7
+        faktorer["psi_v"] = mast.psi_v
+        faktorer["M_cr_0"] = mast.M_cr_0 / 10**6  # [kNm]
+        faktorer["M_cr"] = M_cr[0] / 10**6  # [kNm]
+        faktorer["lam_LT"] = lam_LT[0]
+
+    return X_LT
+
+
+def _interaksjonsfaktorer(mast, N_Ed, X_y, X_z):
+    """Beregner interaksjonsfaktorer etter NS-EN 1993-1-1 tabell B.2.
+
+    Det antas at alle master tilhører tverrsnittsklasse #1.
+
+    :param Mast mast: Aktuell mast
+    :param numpy.array N_Ed: Dimensjonerende aksialkraft per tilstand :math:`[N]`
+    :param float X_y: Reduksjonsfaktor for knekking om y-aksen
+    :param float X_z: Reduksjonsfaktor for knekking om z-aksen
+    :return: Interaksjonsfaktorer ``k_yy``, ``k_yz``, ``k_zy``, ``k_zz``
+    :rtype: :class:`numpy.array`, :class:`numpy.array`, :class:`numpy.array`,
+     :class:`numpy.array`
+    """
+
+    N_Rk = mast.N_Rk
+    matkoeff = mast.materialkoeff
+    lam_y, lam_z = mast.lam_y, mast.lam_z
+
+    k_yy = numpy.minimum(0.6 * (1 + (lam_y - 0.2) * (matkoeff * N_Ed / (X_y*N_Rk))),
+                         0.6 * (1 + 0.8 * (matkoeff * N_Ed / (X_y*N_Rk))))
+
+    if lam_z < 0.4:
+        k_zy = numpy.minimum(0.6 + lam_z,
+                             1 - (0.1 * lam_z / (0.6 - 0.25)) * (matkoeff * N_Ed / (X_z*N_Rk)))
+    else:
+        k_zy = numpy.maximum(1 - (0.1 * lam_z / (0.6 - 0.25)) * (matkoeff * N_Ed / (X_z*N_Rk)),
+                             1 - (0.1 / (0.6 - 0.25)) * (matkoeff * N_Ed / (X_z*N_Rk)))
+
+    k_zz = numpy.minimum(0.6 * (1 + (2 * lam_z - 0.6) * (matkoeff * N_Ed / (X_z*N_Rk))),
+                         0.6 * (1 + 1.4 * (matkoeff * N_Ed / (X_z*N_Rk))))
+
+    k_yz = 0.6 * k_zz
+
+    return k_yy, k_yz, k_zy, k_zz
+
+
+def _knekking_lokal(mast, parametre, My_Ed, Mz_Ed, Vy_Ed, Vz_Ed, N_Ed, faktorer=None):
+    """Beregner utnyttelsesgrad for lokal stavknekking etter NS-EN 1993-1-1 seksjon 6.3.1.2.
+
+    :param Mast mast: Aktuell gittermast
+    :param dict parametre: Parametre fra :func:`kapasitetsparametre`
+    :param numpy.array My_Ed: Dimensjonerende moment om mastas y-akse :math:`[Nmm]`
+    :param numpy.array Mz_Ed: Dimensjonerende moment om mastas z-akse :math:`[Nmm]`
+    :param numpy.array Vy_Ed: Dimensjonerende skjærkraft parallelt mastas y-akse :math:`[N]`
+    :param numpy.array Vz_Ed: Dimensjonerende skjærkraft parallelt mastas z-akse :math:`[N]`
+    :param numpy.array N_Ed: Dimensjonerende normaltkraft i masta :math:`[N]`
+    :param dict faktorer: Lagrer dimensjonerende faktorer for første tilstand dersom gitt
+    :return: Utnyttelsesgrader for diagonal og gurt, ``UR_d`` og ``UR_g``
+    :rtype: :class:`numpy.array`, :class:`numpy.array`
+    """
+
+    matkoeff = mast.materialkoeff
+    b = parametre["b"]
+
+    if mast.type == "H":
+        # Gurt (L-profil)
+        N_Ed_g = 0.5*(My_Ed/b + Mz_Ed/b) + N_Ed/4
+        # Diagonalstav
+        N_Ed_d = numpy.maximum(Vy_Ed, Vz_Ed) / math.sqrt(2)
+    else:  # B-mast
+        # Gurt (U-profil)
+        N_Ed_g = My_Ed/b + Mz_Ed/b + N_Ed/2
+        # Diagonalstav
+        N_Ed_d = Vz_Ed * math.sqrt(2)
+
+    UR_g = matkoeff*N_Ed_g / (parametre["X_gurt"]*mast.A_profil*mast.fy)
+    UR_d = matkoeff*N_Ed_d / (parametre["X_diag"]*mast.d_A*mast.fy)
+
+    if faktorer is not None:
+        faktorer["N_Ed_gurt"] = N_Ed_g[0] / 1000  # [kN]
+        faktorer["N_cr_gurt"] = mast.N_cr_g / 1000  # [kN]
+        faktorer["alpha_gurt"] = mast.alpha_g
+        faktorer["lam_gurt"] = mast.lam_g
+        faktorer["phi_gurt"] = parametre["phi_gurt"]
+        faktorer["X_gurt"] = parametre["X_gurt"]
+
+        faktorer["N_Ed_diag"] = N_Ed_d[0] / 1000  # [kN]
+        faktorer["N_cr_diag"] = mast.N_cr_d / 1000  # [kN]
+        faktorer["alpha_diag"] = mast.alpha_d
+        faktorer["lam_diag"] = mast.lam_d
+        faktorer["phi_diag"] = parametre["phi_diag"]
+        faktorer["X_diag"] = parametre["X_diag"]
+
+    return UR_d, UR_g
@@ -0,0 +1,449 @@
+# -*- coding: utf8 -*-
+"""Lokal beregningstjeneste over HTTP/JSON.
+
+Tjenesten holder en pool av prosesser med ferdig importerte moduler og
+mastekatalog, slik at hver beregning slipper oppstartskostnaden til
+Python, NumPy og SciPy.
+
+Endepunkter:
+
+- ``POST /beregn``: Beregner samtlige master med :func:`beregning.beregn`.
+  Forespørselen er et JSON-objekt med endringer i inndata fra
+  ``input.ini``, f.eks. ``{"a1": 60, "radius": 800}``. Svaret er en
+  liste med resultater per mast, se :func:`_resultat`.
+- ``GET /metrikker``: Antall forespørsler, pågående beregninger og
+  svartider.
+
+Ugyldige forespørsler besvares med statuskode 400, og forespørsler med
+innhold større enn :data:`_MAKS_INNHOLD` med 413. Dersom en prosess i
+poolen avsluttes uventet, besvares berørte forespørsler med 500 og
+poolen opprettes på nytt.
+
+Med ``delt_minne`` publiseres mastekatalogen og en eventuell
+spenntabell i delt minne, og prosessene i poolen kobler seg til disse
+istedenfor å lese katalogen selv, se :mod:`deltminne`. Hver prosess
+beholder da også kabelstrekk for fastavspente ledninger mellom
+beregningene.
+
+Identiske forespørsler som pågår samtidig slås sammen til én
+beregning, og svar på tidligere forespørsler hentes fra en LRU-buffer.
+
+Tjenesten startes med ``python tjeneste.py --port 8080``.
+"""
+from __future__ import unicode_literals
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import concurrent.futures.process
+import json
+import time
+import beregning
+import deltminne
+import inndata
+import mast as module_mast
+
+# Statustekster for HTTP-svar
+_STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+
+# Største tillatte innhold i en forespørsel [byte]
+_MAKS_INNHOLD = 2 ** 20
+
+
+class Beregningstjeneste(object):
+    """Klasse for å representere en lokal beregningstjeneste."""
+
+    def __init__(self, prosesser=2, bufferstorrelse=256, latensvindu=1000, ini="input.ini",
+                 delt_minne=False, spenntabell=None):
+        """Initialiserer :class:`Beregningstjeneste`-objekt.
+
+        :param int prosesser: Antall prosesser i poolen
+        :param int bufferstorrelse: Største antall svar i LRU-bufferen
+        :param int latensvindu: Antall svartider som inngår i metrikkene
+        :param str ini: .ini-fil med standardverdier for inndata
+        :param bool delt_minne: ``True`` dersom mastekatalog og spenntabell
+         skal deles med prosessene via delt minne
+        :param dict spenntabell: Ferdig beregnet spenntabell som deles
+         med prosessene, se :func:`system.hent_system`
+        """
+        self.prosesser = prosesser
+        self.delt_minne = delt_minne
+        self.spenntabell = spenntabell
+        self.bufferstorrelse = bufferstorrelse
+        self.ini = ini
+        self.i = inndata.Inndata(ini)
+        self._pool = None
+        self._delt = None
+        self._server = None
+        self._buffer = collections.OrderedDict()
+        self._pagaende = {}
+        self._latens = collections.deque(maxlen=latensvindu)
+        self._tellere = collections.Counter()
+
+    async def start(self, vert="127.0.0.1", port=8080):
+        """Starter prosesspool og HTTP-server.
+
+        :param str vert: Adresse serveren lytter på
+        :param int port: Port serveren lytter på, 0 gir ledig port
+        :return: Faktisk port
+        :rtype: :class:`int`
+        """
+        if self.delt_minne:
+            self._delt = deltminne.Deltminne(spenntabell=self.spenntabell)
+        self._pool = self._ny_pool()
+        self._server = await asyncio.start_server(self._behandle_tilkobling, vert, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stopp(self):
+        """Stopper HTTP-server og prosesspool."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        if self._delt is not None:
+            self._delt.lukk()
+            self._delt = None
+
+    async def beregn(self, endringer):
+        """Beregner samtlige master for gitte endringer i inndata.
+
+        :param dict endringer: Endringer i inndata {parameter: verdi}
+        :return: Resultater per mast
+        :rtype: :class:`list`
+        :raises ValueError: Dersom en endring ikke er gyldig
+        :raises concurrent.futures.process.BrokenProcessPool: Dersom en prosess
+         i poolen avsluttes uventet, poolen opprettes da på nytt
+        """
+        endringer = {navn: _tolk(self.i, navn, verdi) for navn, verdi in endringer.items()}
+        nokkel = json.dumps(endringer, sort_keys=True)
+        self._tellere["foresporsler"] += 1
+
+        if nokkel in self._buffer:
+            self._buffer.move_to_end(nokkel)
+            self._tellere["bufret"] += 1
+            return self._buffer[nokkel]
+        if nokkel in self._pagaende:
+            self._tellere["sammenslatt"] += 1
+            return await asyncio.shield(self._pagaende[nokkel])
+
+        loop = asyncio.get_running_loop()
+        pool = self._pool
+        try:
+            fremtid = loop.run_in_executor(pool, _beregn, endringer)
+        except concurrent.futures.process.BrokenProcessPool:
+            self._erstatt_pool(pool)
+            raise
+        self._pagaende[nokkel] = fremtid
+        self._tellere["beregninger"] += 1
+        try:
+            resultat = await asyncio.shield(fremtid)
+        except concurrent.futures.process.BrokenProcessPool:
+            self._erstatt_pool(pool)
+            raise
+        finally:
+            del self._pagaende[nokkel]
+        self._buffer[nokkel] = resultat
+        if len(self._buffer) > self.bufferstorrelse:
+            self._buffer.popitem(last=False)
+        return resultat
+
+    def metrikker(self):
+        """Setter opp metrikker for tjenesten.
+
+        Svartider i millisekunder gjelder de siste vellykkede
+        forespørslene til ``/beregn``, inkludert svar fra bufferen.
+        ``pagaende`` er antall beregninger som pågår i poolen.
+
+        :return: Metrikker
+        :rtype: :class:`dict`
+        """
+        latens = sorted(self._latens)
+
+        def persentil(p):
+            return latens[min(len(latens) - 1, int(p * len(latens)))] if latens else None
+
+        return {"foresporsler": self._tellere["foresporsler"],
+                "bufret": self._tellere["bufret"],
+                "sammenslatt": self._tellere["sammenslatt"],
+                "beregninger": self._tellere["beregninger"],
+                "feil": self._tellere["feil"],
+                "ny_pool": self._tellere["ny_pool"],
+                "pagaende": len(self._pagaende),
+                "prosesser": self.prosesser,
+                "buffer": len(self._buffer),
+                "latens_ms": {"snitt": sum(latens) / len(latens) if latens else None,
+                              "p50": persentil(0.5), "p95": persentil(0.95),
+                              "maks": latens[-1] if latens else None}}
+
+    async def _behandle_tilkobling(self, leser, skriver):
+        """Behandler HTTP-forespørsler på én tilkobling.
+
+        Ugyldige forespørsler besvares med feilmelding før tilkoblingen lukkes.
+
+        :param asyncio.StreamReader leser: Innkommende data
+        :param asyncio.StreamWriter skriver: Utgående data
+        """
+        try:
+            while True:
+                try:
+                    foresporsel = await _les_foresporsel(leser)
+                except _UgyldigForesporsel as feil:
+                    self._tellere["feil"] += 1
+                    await _skriv_svar(skriver, feil.status, {"feil": str(feil)}, False)
+                    break
+                if foresporsel is None:
+                    break
+                metode, sti, hoder, innhold = foresporsel
+                status, svar = await self._svar(metode, sti, innhold)
+                behold = hoder.get("connection", "").lower() != "close"
+                await _skriv_svar(skriver, status, svar, behold)
+                if not behold:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            skriver.close()
+            try:
+                await skriver.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _svar(self, metode, sti, innhold):
+        """Setter opp svar på én forespørsel.
+
+        :param str metode: HTTP-metode
+        :param str sti: Forespurt sti
+        :param bytes innhold: Forespørselens innhold
+        :return: HTTP-statuskode, JSON-data
+        :rtype: :class:`int`, :class:`dict`
+        """
+        if sti == "/metrikker":
+            if not metode == "GET":
+                return 405, {"feil": "Bruk GET"}
+            return 200, self.metrikker()
+        if not sti == "/beregn":
+            return 404, {"feil": "Ukjent sti: {}".format(sti)}
+        if not metode == "POST":
+            return 405, {"feil": "Bruk POST"}
+
+        start = time.perf_counter()
+        try:
+            endringer = json.loads(innhold.decode("utf-8")) if innhold else {}
+            if not isinstance(endringer, dict):
+                raise ValueError("Forventet JSON-objekt med endringer i inndata.")
+            resultat = await self.beregn(endringer)
+        except (AttributeError, TypeError, ValueError) as feil:
+            self._tellere["feil"] += 1
+            return 400, {"feil": str(feil)}
+        except Exception as feil:
+            self._tellere["feil"] += 1
+            return 500, {"feil": "{}: {}".format(type(feil).__name__, feil)}
+        self._latens.append(1000 * (time.perf_counter() - start))
+        return 200, {"master": resultat}
+
+    def _erstatt_pool(self, pool):
+        """Erstatter en ødelagt prosesspool med en ny.
+
+        :param concurrent.futures.ProcessPoolExecutor pool: Ødelagt pool,
+         erstattes kun dersom den fortsatt er i bruk
+        """
+        if self._pool is pool:
+            self._tellere["ny_pool"] += 1
+            self._pool = self._ny_pool()
+            pool.shutdown(wait=False)
+
+    def _ny_pool(self):
+        """Oppretter prosesspool med ferdig importerte moduler og mastekatalog.
+
+        :return: Prosesspool
+        :rtype: :class:`concurrent.futures.ProcessPoolExecutor`
+        """
+        delt = self._delt.beskrivelse if self._delt is not None else None
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.prosesser, initializer=_initialiser, initargs=(self.ini, delt))
+
+
+class _UgyldigForesporsel(ValueError):
+    """Feil i forespørselens format, besvares med gitt statuskode."""
+
+    def __init__(self, melding, status=400):
+        super().__init__(melding)
+        self.status = status
+
+
+async def _skriv_svar(skriver, status, svar, behold):
+    """Skriver ett HTTP-svar med JSON-data.
+
+    :param asyncio.StreamWriter skriver: Utgående data
+    :param int status: HTTP-statuskode
+    :param dict svar: JSON-data
+    :param bool behold: ``True`` dersom tilkoblingen skal holdes åpen
+    """
+    data = json.dumps(svar).encode("utf-8")
+    skriver.write("HTTP/1.1 {} {}\r\nContent-Type: application/json\r\n"
+                  "Content-Length: {}\r\nConnection: {}\r\n\r\n".format(
+                      status, _STATUS[status], len(data),
+                      "keep-alive" if behold else "close").encode("ascii") + data)
+    await skriver.drain()
+
+
+async def _les_foresporsel(leser):
+    """Leser én HTTP-forespørsel.
+
+    :param asyncio.StreamReader leser: Innkommende data
+    :return: Metode, sti, hoder og innhold, ``None`` dersom tilkoblingen er lukket
+    :rtype: :class:`tuple`
+    :raises _UgyldigForesporsel: Dersom forespørselen ikke kan tolkes
+     eller innholdet er for stort
+    """
+    try:
+        linje = await leser.readline()
+        if not linje.strip():
+            return None
+        deler = linje.decode("latin-1").split()
+        if not len(deler) == 3:
+            raise _UgyldigForesporsel("Ugyldig forespørselslinje.")
+        metode, sti, versjon = deler
+        hoder = {}
+        while True:
+            linje = (await leser.readline()).decode("latin-1").strip()
+            if not linje:
+                break
+            if ":" not in linje:
+                raise _UgyldigForesporsel("Ugyldig hode: {}".format(linje))
+            navn, verdi = linje.split(":", 1)
+            hoder[navn.strip().lower()] = verdi.strip()
+    except _UgyldigForesporsel:
+        raise
+    except ValueError:  # Linje lengre enn bufferen til leseren
+        raise _UgyldigForesporsel("For lang linje i forespørselen.")
+    try:
+        lengde = int(hoder.get("content-length", 0))
+    except ValueError:
+        raise _UgyldigForesporsel("Ugyldig Content-Length.")
+    if lengde < 0:
+        raise _UgyldigForesporsel("Ugyldig Content-Length.")
+    if lengde > _MAKS_INNHOLD:
+        raise _UgyldigForesporsel(
+            "Innholdet kan være maksimalt {} byte.".format(_MAKS_INNHOLD), 413)
+    innhold = await leser.readexactly(lengde) if lengde else b""
+    return metode, sti.split("?")[0], hoder, innhold
+
+
+def _tolk(i, navn, verdi):
+    """Kontrollerer og konverterer verdi fra JSON til samme type som inndataparameteren.
+
+    Heltall godtas for desimaltall, og desimaltall uten desimaler for
+    heltall. Valgfrie parametre med standardverdi ``None`` er desimaltall.
+
+    :param Inndata i: Inndata med standardverdier
+    :param str navn: Parameterens navn
+    :param verdi: Verdi fra JSON
+    :return: Konvertert verdi
+    :raises TypeError: Dersom verdien har feil type
+    :raises ValueError: Dersom et heltall har desimaler
+    """
+    if not hasattr(i, navn):
+        raise AttributeError("Ukjent inndataparameter: {}".format(navn))
+    standard = getattr(i, navn)
+    if isinstance(standard, bool):
+        if not isinstance(verdi, bool):
+            raise TypeError("{} må være true eller false.".format(navn))
+        return verdi
+    if isinstance(standard, str):
+        if not isinstance(verdi, str):
+            raise TypeError("{} må være en tekst.".format(navn))
+        return verdi
+    if standard is None and verdi is None:
+        return None
+    if isinstance(verdi, bool) or not isinstance(verdi, (int, float)):
+        raise TypeError("{} må være et tall.".format(navn))
+    if isinstance(standard, int):
+        if not float(verdi).is_integer():
+            raise ValueError("{} må være et heltall.".format(navn))
+        return int(verdi)
+    return float(verdi)
+
+
+# Inndata med standardverdier og spenntabell, settes av _initialiser i hver prosess
+_arbeidsdata = {}
+
+
+def _initialiser(ini, delt=None):
+    """Laster inndata og mastekatalog i gjeldende prosess.
+
+    :param str ini: .ini-fil med standardverdier for inndata
+    :param dict delt: Beskrivelse av delt minne, se :attr:`deltminne.Deltminne.beskrivelse`,
+     ``None`` dersom katalogen leses fra disk
+    """
+    _arbeidsdata["i"] = inndata.Inndata(ini)
+    _arbeidsdata["spenntabell"] = None
+    if delt is None:
+        module_mast.hent_katalog()
+    else:
+        kolonner, _arbeidsdata["spenntabell"] = deltminne.koble_til(delt)
+
+
+def _beregn(endringer):
+    """Beregner samtlige master i en prosess fra poolen.
+
+    :param dict endringer: Endringer i inndata {parameter: verdi}
+    :return: Resultater per mast
+    :rtype: :class:`list`
+    """
+    master = beregning.beregn(_arbeidsdata["i"].kopi(**endringer), _arbeidsdata["spenntabell"])
+    for mast in master:
+        mast.sorter_grenseverdier()
+    return [_resultat(mast) for mast in master]
+
+
+def _resultat(mast):
+    """Setter opp dimensjonerende resultater for en beregnet mast.
+
+    :param Mast mast: Beregnet mast
+    :return: Mastenavn, type, høyde :math:`[m]`, utnyttelsesgrad,
+     forskyvning :math:`D_z` :math:`[mm]` og torsjonsvinkel
+     :math:`\\phi` :math:`[^{\\circ}]`, totalt og for KL
+    :rtype: :class:`dict`
+    """
+    return {"navn": mast.navn, "type": mast.type, "h": mast.h,
+            "UR": float(mast.tilstand_UR_max.utnyttelsesgrad),
+            "Dz_tot": float(mast.tilstand_Dz_tot_max.K_D[1]),
+            "phi_tot": float(mast.tilstand_phi_tot_max.K_D[2]),
+            "Dz_kl": float(mast.tilstand_Dz_kl_max.K_D[1]),
+            "phi_kl": float(mast.tilstand_phi_kl_max.K_D[2])}
+
+
+async def _kjor(vert, port, prosesser, bufferstorrelse):
+    """Kjører tjenesten til prosessen avbrytes.
+
+    :param str vert: Adresse serveren lytter på
+    :param int port: Port serveren lytter på
+    :param int prosesser: Antall prosesser i poolen
+    :param int bufferstorrelse: Største antall svar i LRU-bufferen
+    """
+    tjeneste = Beregningstjeneste(prosesser, bufferstorrelse)
+    port = await tjeneste.start(vert, port)
+    print("Beregningstjeneste lytter på http://{}:{}".format(vert, port))
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await tjeneste.stopp()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lokal beregningstjeneste for master.")
+    parser.add_argument("--vert", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--prosesser", type=int, default=2)
+    parser.add_argument("--buffer", type=int, default=256)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_kjor(args.vert, args.port, args.prosesser, args.buffer))
+    except KeyboardInterrupt:
+        pass
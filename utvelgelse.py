@@ -0,0 +1,88 @@
+# -*- coding: utf8 -*-
+"""Utvelgelse av kandidatmaster før fullstendig beregning.
+
+For hver mast beregnes en nedre grense for største utnyttelsesgrad
+i bruddgrensetilstand. Master med for lav tillatt høyde eller der
+nedre grense overstiger 1.0 forkastes uten at :class:`Tilstand`-objekter
+opprettes.
+
+Kolonnene :math:`M_y, V_y, M_z, V_z, N` i R-matrisen er lineære i
+kreftene, slik at dimensjonerende krefter ``K`` for samtlige
+lastkombinasjoner finnes ved å kombinere bidrag fra ledningene
+(felles for alle master) med bidrag fra egenvekt og vindlast på
+den enkelte mast. Kun torsjonen i kolonne 5 avhenger av rekkefølgen
+på kreftene, og denne inngår ikke i utnyttelsesgraden.
+"""
+from __future__ import unicode_literals
+import numpy
+import kraft
+import laster
+import lister
+import tilstand
+
+# Relativ toleranse for avrundingsforskjeller mot fullstendig beregning
+TOLERANSE = 1e-9
+
+
+def utvelg(i, sys, master, F_statisk_ledn, F_dynamisk_ledn):
+    """Forkaster master som beviselig ikke tilfredsstiller kravene.
+
+    :param Inndata i: Input fra bruker
+    :param System sys: Data for ledninger og utliggere
+    :param list master: Liste med :class:`Mast`-objekter
+    :param list F_statisk_ledn: Laster fra ledninger uavhengige av klimaforhold
+    :param list F_dynamisk_ledn: Laster fra ledninger avhengige av klimaforhold
+    :return: Gjenværende master i stigende rekkefølge etter egenvekt,
+     antall forkastede master
+    :rtype: :class:`list`, :class:`int`
+    """
+    kandidater = [mast for mast in master if mast.h_max >= i.h]
+    if kandidater:
+        UR_min = nedre_grense_utnyttelse(i, sys, kandidater, F_statisk_ledn, F_dynamisk_ledn)
+        kandidater = [mast for mast, UR in zip(kandidater, UR_min) if UR <= 1.0 + TOLERANSE]
+    kandidater.sort(key=lambda mast: mast.egenvekt)
+    return kandidater, len(master) - len(kandidater)
+
+
+def nedre_grense_utnyttelse(i, sys, master, F_statisk_ledn, F_dynamisk_ledn):
+    """Beregner nedre grense for største utnyttelsesgrad for hver mast.
+
+    Bidrag fra ledningene beregnes én gang for hver lastsituasjon og
+    vindretning. For hver mast evalueres så samtlige lastkombinasjoner
+    samlet med :func:`tilstand.utnyttelsesgrad`, der reduksjonsfaktoren
+    for vipping settes lik øvre grense :math:`\\chi_{LT} = 1.0`.
+
+    :param Inndata i: Input fra bruker
+    :param System sys: Data for ledninger og utliggere
+    :param list master: Liste med :class:`Mast`-objekter
+    :param list F_statisk_ledn: Laster fra ledninger uavhengige av klimaforhold
+    :param list F_dynamisk_ledn: Laster fra ledninger avhengige av klimaforhold
+    :return: Nedre grense for utnyttelsesgrad per mast
+    :rtype: :class:`numpy.array`
+    """
+    lastsituasjoner, lastfaktorer = lister.hent_lastkombinasjoner(i.ec3)
+    C = lister.kombinasjonsfaktorer(lastsituasjoner, lastfaktorer)
+    K_ledn = _etasjesummer(lastsituasjoner, F_statisk_ledn, F_dynamisk_ledn)
+    UR_min = numpy.empty(len(master))
+    for n, mast in enumerate(master):
+        F_statisk_mast, F_dynamisk_mast = laster.laster_mast(i, sys, mast)
+        K_mast = _etasjesummer(lastsituasjoner, F_statisk_mast, F_dynamisk_mast)
+        # K[lastsituasjon/vindretning, lastkombinasjon, kolonne]
+        K = numpy.einsum("sce,sek->sck", C, K_ledn + K_mast)
+        UR_min[n] = tilstand.utnyttelsesgrad(mast, K.reshape(-1, 5)).max()
+    return UR_min
+
+
+def _etasjesummer(lastsituasjoner, F_statisk, F_dynamisk):
+    """Summerer reaksjonskrefter over rader for hver etasje.
+
+    :param dict lastsituasjoner: Lastsituasjoner med kombinasjonsfaktorer og temperatur
+    :param list F_statisk: Laster uavhengige av temperatur, snø og vind
+    :param list F_dynamisk: Laster som varierer med én eller flere klimaforhold
+    :return: Summerte krefter [lastsituasjon/vindretning, etasje, kolonne 0-4]
+    :rtype: :class:`numpy.array`
+    """
+    return numpy.array([
+        numpy.sum(kraft.beregn_reaksjonskrefter(F)[:, :, 0:5], axis=1)
+        for lastsituasjon, vindretning, F
+        in lister.kraftlister(lastsituasjoner, F_statisk, F_dynamisk)])
@@ -0,0 +1,258 @@
+# -*- coding: utf8 -*-
+"""Utnyttelsesgrad som funksjon av vindkasthastighetstrykk.
+
+Samtlige vindlaster (etasje 4 i R-matrisen) er proporsjonale med
+vindkasthastighetstrykket :math:`q_p`. For hver lasttilstand gjelder
+dermed :math:`K = K_0 + q_p K_1`, der :math:`K_0` er bidraget fra
+øvrige laster og :math:`K_1` er bidraget fra vind per enhet
+:math:`q_p`. Tilsvarende er momentet fra vindlast på masten, som
+bestemmer :math:`\\chi_{LT}`, proporsjonalt med :math:`q_p`.
+
+:math:`K_0` og :math:`K_1` beregnes én gang per mast, hvoretter
+utnyttelsesgraden kan evalueres for vilkårlige :math:`q_p` uten
+at lastene settes opp på nytt. Ved ulykkeslast avhenger
+torsjonsmomentet av fortegnet på løpende totaltorsjon, og
+fortegnsjusteringen utføres derfor for hver :math:`q_p`.
+"""
+from __future__ import unicode_literals
+import numpy
+import kraft
+import laster
+import lister
+import mast as module_mast
+import system
+import tilstand
+
+
+# Antall verdier av q_p som evalueres samlet, begrenser minnebruken
+BLOKKSTORRELSE = 1000
+
+
+class Vindtrykkanalyse(object):
+    """Klasse for beregning av utnyttelsesgrad for vilkårlig vindkasthastighetstrykk."""
+
+    def __init__(self, i, sys, mast, F_statisk_ledn, F_dynamisk_ledn):
+        """Initialiserer :class:`Vindtrykkanalyse`-objekt.
+
+        System og laster fra ledninger skal være beregnet med
+        ``i.vindkasthastighetstrykk = 1.0``, se :func:`hent_analyser`.
+
+        :param Inndata i: Input fra bruker med enhetsverdi for vindkasthastighetstrykk
+        :param System sys: Data for ledninger og utliggere
+        :param Mast mast: Aktuell mast
+        :param list F_statisk_ledn: Laster fra ledninger uavhengige av klimaforhold
+        :param list F_dynamisk_ledn: Laster fra ledninger avhengige av klimaforhold
+        """
+        if not i.vindkasthastighetstrykk == 1.0:
+            raise ValueError("Lastene må beregnes med vindkasthastighetstrykk = 1.0.")
+
+        self.mast = mast
+
+        F_statisk_mast, F_dynamisk_mast = laster.laster_mast(i, sys, mast)
+        F_statisk = F_statisk_ledn + F_statisk_mast
+        F_dynamisk = F_dynamisk_ledn + F_dynamisk_mast
+        lastsituasjoner, lastfaktorer = lister.hent_lastkombinasjoner(i.ec3)
+        C = lister.kombinasjonsfaktorer(lastsituasjoner, lastfaktorer)
+
+        # Ulykkeslast regnes med torsjon fra bruksgrensetilstanden for siste
+        # lastsituasjon og vindretning parallelt spor, se beregning.beregn_mast
+        lastsituasjon_ulykke = list(lastsituasjoner)[-1]
+        F_ulykke_torsjon = None
+
+        E, M = [], []
+        for lastsituasjon, vindretning, F in lister.kraftlister(
+                lastsituasjoner, F_statisk, F_dynamisk):
+            E.append(numpy.sum(kraft.beregn_reaksjonskrefter(F), axis=1))
+            M.append(sum(f.q[2] * f.b * (-f.e[0]) for f in F if f.fordelt))
+            if lastsituasjon == lastsituasjon_ulykke and vindretning == 2:
+                F_ulykke_torsjon = F
+        E, M = numpy.array(E), numpy.array(M)
+        # K_0, K_1 [tilstand, kolonne], M_1 [tilstand]
+        K_0 = numpy.einsum("sce,sek->sck", C[:, :, 0:4], E[:, 0:4, :]).reshape(-1, 6)
+        K_1 = (C[:, :, 4, None] * E[:, None, 4, :]).reshape(-1, 6)
+        M_1 = (C[:, :, 4] * M[:, None]).reshape(-1)
+        # Tilstander med lastfaktor 0 for vind er uavhengige av q_p
+        vind = (C[:, :, 4] != 0).reshape(-1)
+        self.K_0, self.K_1, self.M_1 = K_0[vind], K_1[vind], M_1[vind]
+        self.K_konstant = K_0[~vind]
+        self.UR_konstant = _utnyttelsesgrad(
+            mast, self.K_konstant[None, :, :], numpy.zeros((1, len(self.K_konstant))))[0]
+
+        # Ulykkeslast, se beregning.beregn_mast
+        self.ulykke = i.siste_for_avspenning or i.linjemast_utliggere > 1
+        if self.ulykke:
+            self._torsjonsdata = _torsjonsdata(
+                F_ulykke_torsjon, lastsituasjoner[lastsituasjon_ulykke])
+            F_ulykke = [f for f in F_statisk if not f.kl_sidekraft]
+            self._K_ulykke = numpy.sum(numpy.sum(
+                kraft.beregn_reaksjonskrefter(F_ulykke), axis=0), axis=0)
+            self._f_z_kl, self._f_z_kl_avsp, e = laster.sidekrefter_ulykke(i, sys)
+            enhetslast = kraft.Kraft(navn="Sidekraft: KL (ulykke)", type=(1, 1), f=(0, 0, 1.0), e=e)
+            self._K_ulykke_enhet = numpy.sum(numpy.sum(
+                kraft.beregn_reaksjonskrefter([enhetslast]), axis=0), axis=0)
+
+    def krefter(self, q_p):
+        """Beregner dimensjonerende krefter for tilstander i bruddgrense med vindlast.
+
+        Største utnyttelsesgrad for øvrige tilstander er gitt ved
+        :attr:`UR_konstant`.
+
+        :param numpy.array q_p: Vindkasthastighetstrykk :math:`[\\frac{N}{m^2}]`
+        :return: Dimensjonerende reaksjonskrefter [q_p, tilstand, kolonne],
+         moment fra vindlast på masten [q_p, tilstand]
+        :rtype: :class:`numpy.array`, :class:`numpy.array`
+        """
+        K = self.K_0[None, :, :] + q_p[:, None, None] * self.K_1[None, :, :]
+        M_vind = q_p[:, None] * self.M_1[None, :]
+        return K, M_vind
+
+    def krefter_ulykke(self, q_p):
+        """Beregner dimensjonerende krefter ved ulykkeslast.
+
+        :param numpy.array q_p: Vindkasthastighetstrykk :math:`[\\frac{N}{m^2}]`
+        :return: Dimensjonerende reaksjonskrefter [q_p, kolonne]
+        :rtype: :class:`numpy.array`
+        """
+        T = _torsjon(self._torsjonsdata, q_p)
+        f_z_ulykke = numpy.maximum(numpy.abs(T + self._f_z_kl),
+                                   numpy.abs(T + self._f_z_kl + self._f_z_kl_avsp))
+        return self._K_ulykke[None, :] + f_z_ulykke[:, None] * self._K_ulykke_enhet[None, :]
+
+    def utnyttelsesgrad(self, q_p):
+        """Beregner største utnyttelsesgrad for gitt vindkasthastighetstrykk.
+
+        :param q_p: Vindkasthastighetstrykk :math:`[\\frac{N}{m^2}]`, tall eller ``numpy.array``
+        :return: Største utnyttelsesgrad for hver verdi av ``q_p``
+        :rtype: :class:`float` eller :class:`numpy.array`
+        """
+        q = numpy.atleast_1d(numpy.asarray(q_p, dtype=float))
+        UR = numpy.full(len(q), self.UR_konstant)
+        for start in range(0, len(q), BLOKKSTORRELSE):
+            blokk = slice(start, start + BLOKKSTORRELSE)
+            K, M_vind = self.krefter(q[blokk])
+            UR[blokk] = numpy.maximum(UR[blokk], _utnyttelsesgrad(self.mast, K, M_vind))
+            if self.ulykke:
+                UR[blokk] = numpy.maximum(UR[blokk], tilstand.utnyttelsesgrad(
+                    self.mast, self.krefter_ulykke(q[blokk]), numpy.zeros(len(q[blokk]))))
+        return UR if numpy.ndim(q_p) else float(UR[0])
+
+    def kritisk_vindtrykk(self, q_max=10000.0, n=101, xtol=0.01):
+        """Finner minste vindkasthastighetstrykk som gir utnyttelsesgrad 1.0.
+
+        Utnyttelsesgraden evalueres først i ``n`` punkter mellom
+        0 og ``q_max``. Første overskridelse av 1.0 bestemmes deretter
+        ved nullpunktsøk (:func:`scipy.optimize.brentq`).
+
+        :param float q_max: Øvre grense for søket :math:`[\\frac{N}{m^2}]`
+        :param int n: Antall punkter i innledende søk
+        :param float xtol: Toleranse for nullpunktsøket :math:`[\\frac{N}{m^2}]`
+        :return: Kritisk vindkasthastighetstrykk :math:`[\\frac{N}{m^2}]`,
+         ``None`` dersom utnyttelsesgraden ikke overstiger 1.0 innenfor ``q_max``
+        :rtype: :class:`float`
+        """
+        from scipy.optimize import brentq
+
+        q = numpy.linspace(0, q_max, n)
+        over = numpy.flatnonzero(self.utnyttelsesgrad(q) > 1.0)
+        if not over.size:
+            return None
+        k = over[0]
+        if k == 0:
+            return 0.0
+        return brentq(lambda q_p: self.utnyttelsesgrad(q_p) - 1.0, q[k - 1], q[k], xtol=xtol)
+
+
+def hent_analyser(i):
+    """Setter opp :class:`Vindtrykkanalyse` for samtlige master.
+
+    :param Inndata i: Input fra bruker
+    :return: Liste med analyser, én per mast
+    :rtype: :class:`list`
+    """
+    i = i.kopi(vindkasthastighetstrykk=1.0)
+    master = module_mast.hent_master(
+        i.h, i.s235, i.materialkoeff, i.avspenningsmast,
+        i.fixavspenningsmast, i.avspenningsbardun)
+    sys = system.hent_system(i)
+    F_statisk_ledn, F_dynamisk_ledn = laster.laster_ledninger(i, sys, mastehoyde=i.h)
+    return [Vindtrykkanalyse(i, sys, mast, F_statisk_ledn, F_dynamisk_ledn) for mast in master]
+
+
+def kritiske_vindtrykk(i, q_max=10000.0):
+    """Finner kritisk vindkasthastighetstrykk for samtlige master.
+
+    :param Inndata i: Input fra bruker
+    :param float q_max: Øvre grense for søket :math:`[\\frac{N}{m^2}]`
+    :return: Kritisk vindkasthastighetstrykk per mastenavn :math:`[\\frac{N}{m^2}]`,
+     se :meth:`Vindtrykkanalyse.kritisk_vindtrykk`
+    :rtype: :class:`dict`
+    """
+    return {analyse.mast.navn: analyse.kritisk_vindtrykk(q_max) for analyse in hent_analyser(i)}
+
+
+def _utnyttelsesgrad(mast, K, M_vind, flate=None):
+    """Beregner største utnyttelsesgrad i bruddgrense for hver rad i ``K``.
+
+    Momentandelen fra vindlast beregnes som i
+    :meth:`tilstand.Tilstand._beregn_momentfordeling`.
+
+    :param Mast mast: Aktuell mast
+    :param numpy.array K: Dimensjonerende reaksjonskrefter [rad, tilstand, kolonne]
+    :param numpy.array M_vind: Moment fra vindlast på masten [rad, tilstand]
+    :param Kapasitetsflate flate: Kapasitetsflate for masten, benyttes fremfor
+     :func:`tilstand.utnyttelsesgrad` dersom gitt
+    :return: Største utnyttelsesgrad per rad, ``-inf`` dersom ingen tilstander
+    :rtype: :class:`numpy.array`
+    """
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        A = numpy.abs(M_vind / K[:, :, 0])
+    if flate is None:
+        UR = tilstand.utnyttelsesgrad(mast, K.reshape(-1, 6), A.reshape(-1))
+    else:
+        UR = flate.utnyttelsesgrad(K.reshape(-1, 6), A.reshape(-1))
+    return UR.reshape(K.shape[0], -1).max(axis=1, initial=-numpy.inf)
+
+
+def _torsjonsdata(F, psi):
+    """Setter opp torsjonsbidrag per kraft for fortegnsjustering ved ulykkeslast.
+
+    :param list F: Krefter i siste lastsituasjon ved vind parallelt spor
+    :param dict psi: Lastkombinasjonsfaktorer for siste lastsituasjon
+    :return: Bidrag med og uten fortegn, maske for sidekrefter i KL,
+     maske for vindlaster og kombinasjonsfaktor per kraft
+    :rtype: :class:`tuple`
+    """
+    rad, etasje, f, q, b, e, kl = kraft.kraftdata(F)
+    fordelt = numpy.any(q != 0, axis=1)
+    f = numpy.where(fordelt[:, None], q * b[:, None], f)
+    signert = f[:, 1] * (-e[:, 2]) + f[:, 2] * e[:, 1]
+    absolutt = numpy.abs(f[:, 1] * (-e[:, 2])) + numpy.abs(f[:, 2] * e[:, 1])
+    faktor = numpy.array([0, 0, psi["psi_T"], psi["psi_S"], psi["psi_V"]])[etasje]
+    return signert, absolutt, kl, etasje == 4, faktor
+
+
+def _torsjon(torsjonsdata, q_p):
+    """Beregner torsjon fra siste bruksgrensetilstand for gitte vindkasthastighetstrykk.
+
+    Fortegnet på bidrag fra krefter som ikke er sidekrefter i KL
+    følger løpende totaltorsjon, se :func:`kraft.fortegnsjusterte_bidrag`.
+
+    :param tuple torsjonsdata: Data fra :func:`_torsjonsdata`
+    :param numpy.array q_p: Vindkasthastighetstrykk :math:`[\\frac{N}{m^2}]`
+    :return: Torsjonsmoment :math:`[Nm]` for hver verdi av ``q_p``
+    :rtype: :class:`numpy.array`
+    """
+    signert, absolutt, kl, vind, faktor = torsjonsdata
+    total = numpy.zeros(len(q_p))
+    T = numpy.zeros(len(q_p))
+    for k in range(len(kl)):
+        skala = q_p if vind[k] else 1.0
+        if kl[k]:
+            bidrag = signert[k] * skala
+        else:
+            sign = numpy.sign(total)
+            sign[sign == 0] = 1
+            bidrag = sign * (absolutt[k] * skala)
+        total += bidrag
+        T += faktor[k] * bidrag
+    return T